@@ -22,6 +22,10 @@ echo Loesche alte Build-Dateien...
 if exist "build" rmdir /s /q "build"
 if exist "dist" rmdir /s /q "dist"
 
+REM Vorskaliertes Splashbild erzeugen (fuer den Qt-Fallback-Splash)
+echo Erzeuge vorskaliertes Splashbild...
+python tools\prescale_splash.py
+
 REM Build starten
 echo.
 echo Starte Build (onedir, nativer Splash aus Bootloader)...
@@ -19,6 +19,7 @@ block_cipher = None
 ROOT_DIR = Path(SPECPATH)
 SRC_DIR = ROOT_DIR / "src"
 SPLASH_IMG = ROOT_DIR / "SplashScreen3.png"
+SPLASH_IMG_HALF = ROOT_DIR / "SplashScreen3@half.png"
 ICON_PATH = ROOT_DIR / "icon.ico"
 
 # Daten-Dateien die eingebettet werden sollen
@@ -27,6 +28,9 @@ if SPLASH_IMG.exists():
     # Splashbild auch als Datei mitliefern, damit der Fallback-Qt-Splash
     # (z.B. bei Python-Direktstart) ebenfalls funktioniert.
     datas.append((str(SPLASH_IMG), "."))
+if SPLASH_IMG_HALF.exists():
+    # Vorskaliertes Splashbild (tools/prescale_splash.py)
+    datas.append((str(SPLASH_IMG_HALF), "."))
 
 # Hidden imports fuer PyQt6 und sklearn
 hiddenimports = [
@@ -0,0 +1,8 @@
+"""
+Ermöglicht den Start per Paketausführung:
+    python -m src
+"""
+
+from src.main import main
+
+main()
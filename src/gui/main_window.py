@@ -38,7 +38,7 @@ from src.gui.settings_dialog import SettingsDialog
 from src.gui.setup_wizard import SetupWizard
 from src.core.file_manager import FileManager, FolderManager
 from src.core.pdf_cache import get_pdf_cache, PDFAnalysisResult
-from src.ml.classifier import get_classifier, Suggestion
+from src.ml.classifier import get_classifier, get_loaded_classifier, Suggestion
 from src.ml.hybrid_classifier import get_hybrid_classifier
 
 
@@ -54,7 +54,6 @@ class MainWindow(QMainWindow):
         self.db = get_database()
         self.file_manager = FileManager()
         self.folder_manager = FolderManager()
-        self.classifier = get_classifier()
         self.hybrid_classifier = get_hybrid_classifier()
         self.pdf_cache = get_pdf_cache()
 
@@ -88,6 +87,11 @@ class MainWindow(QMainWindow):
         # Initial laden
         QTimer.singleShot(100, self.initial_load)
 
+    @property
+    def classifier(self):
+        """Lokaler Klassifikator (wird beim Start im Hintergrund vorgeladen)."""
+        return get_classifier()
+
     def setup_ui(self):
         """Initialisiert die Haupt-UI-Komponenten."""
         self.setWindowTitle("PDF Sortier Meister")
@@ -495,10 +499,11 @@ class MainWindow(QMainWindow):
         # Ansicht neu aufbauen
         self.load_folders()
 
-        # Classifier-Cache invalidieren (damit neue Ordnerstruktur erkannt wird)
-        if hasattr(self, 'classifier'):
-            self.classifier._folder_cache = {}
-            self.classifier._folder_cache_roots = []
+        # Classifier-Cache invalidieren (damit neue Ordnerstruktur erkannt wird);
+        # ein noch nicht geladener Klassifikator hat keinen veralteten Cache
+        classifier = get_loaded_classifier()
+        if classifier is not None:
+            classifier.invalidate_folder_cache()
 
         # Statusmeldung
         if removed_count > 0:
@@ -550,10 +555,10 @@ class MainWindow(QMainWindow):
                     item.widget().deleteLater()
             self.folder_widgets.clear()
 
-            # Classifier-Cache invalidieren
-            if hasattr(self, 'classifier'):
-                self.classifier._folder_cache = {}
-                self.classifier._folder_cache_roots = []
+            # Classifier-Cache invalidieren (nur wenn schon geladen)
+            classifier = get_loaded_classifier()
+            if classifier is not None:
+                classifier.invalidate_folder_cache()
 
             self.statusbar.showMessage("Zielordner-Ansicht geleert. Fügen Sie neue Zielordner hinzu.", 5000)
 
@@ -729,8 +734,8 @@ class MainWindow(QMainWindow):
         self.pdf_count_label = QLabel("PDFs: 0")
         self.statusbar.addPermanentWidget(self.pdf_count_label)
 
-        # Trainingsstand anzeigen
-        training_count = self.classifier.get_training_count()
+        # Trainingsstand anzeigen (direkt aus der DB, Klassifikator lädt evtl. noch)
+        training_count = self.db.get_entry_count()
         self.training_label = QLabel(f"Gelernt: {training_count}")
         self.training_label.setToolTip("Anzahl gelernter Sortierentscheidungen")
         self.statusbar.addPermanentWidget(self.training_label)
@@ -773,6 +778,12 @@ class MainWindow(QMainWindow):
         self.pdf_cache.stop_worker()
         self.pdf_cache.stop_llm_worker()
 
+        # Ausstehende Modelländerungen speichern (nur ein schon geladener
+        # Klassifikator kann welche haben; sonst sichert atexit)
+        classifier = get_loaded_classifier()
+        if classifier is not None:
+            classifier.flush()
+
         event.accept()
 
     # === PDF-Aktionen ===
@@ -7,11 +7,12 @@ Features:
 - Lernen aus Benutzerentscheidungen
 """
 
+import re
 from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass
 
-from PyQt6.QtCore import Qt, pyqtSignal, QThread
+from PyQt6.QtCore import Qt, pyqtSignal, QThread, QSignalBlocker
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import (
     QDialog,
@@ -27,6 +28,9 @@ from PyQt6.QtWidgets import (
     QMessageBox,
 )
 
+# In Dateinamen unzulässige Zeichen (Windows)
+_INVALID_RE = re.compile(r'[<>:"/\\|?*]')
+
 
 @dataclass
 class RenameSuggestion:
@@ -97,6 +101,7 @@ class RenameDialog(QDialog):
         self.setMinimumHeight(500)
 
         self.setup_ui()
+        self._update_keywords()
         self.populate_suggestions()
 
     def setup_ui(self):
@@ -236,17 +241,16 @@ class RenameDialog(QDialog):
 
         layout.addWidget(metadata_group)
 
-        # Erkannte Informationen
-        if self.keywords:
-            info_group = QGroupBox("Erkannte Informationen")
-            info_layout = QVBoxLayout(info_group)
+        # Erkannte Informationen (Sichtbarkeit über _update_keywords)
+        self.info_group = QGroupBox("Erkannte Informationen")
+        info_layout = QVBoxLayout(self.info_group)
 
-            keywords_text = ", ".join(self.keywords) if self.keywords else "Keine erkannt"
-            keywords_label = QLabel(f"Schlüsselwörter: {keywords_text}")
-            keywords_label.setStyleSheet("color: #666;")
-            info_layout.addWidget(keywords_label)
+        self.keywords_label = QLabel()
+        self.keywords_label.setStyleSheet("color: #666;")
+        info_layout.addWidget(self.keywords_label)
 
-            layout.addWidget(info_group)
+        self.info_group.hide()
+        layout.addWidget(self.info_group)
 
         # Buttons
         button_layout = QHBoxLayout()
@@ -271,7 +275,19 @@ class RenameDialog(QDialog):
 
         # Initial: Ersten Vorschlag in Input setzen
         if self.suggestions:
-            self.name_input.setText(self.suggestions[0].name.replace('.pdf', ''))
+            name = self.suggestions[0].name.replace('.pdf', '')
+            with QSignalBlocker(self.name_input):
+                self.name_input.setText(name)
+            self.update_preview(name)
+
+    def _update_keywords(self):
+        """Zeigt die erkannten Schlüsselwörter an, falls vorhanden."""
+        if self.keywords:
+            self.keywords_label.setText(f"Schlüsselwörter: {', '.join(self.keywords)}")
+            self.info_group.show()
+        else:
+            self.keywords_label.clear()
+            self.info_group.hide()
 
     def populate_suggestions(self):
         """Füllt die Vorschlagsliste."""
@@ -309,7 +325,9 @@ class RenameDialog(QDialog):
         if name:
             # .pdf Endung entfernen für die Eingabe
             name = name.replace('.pdf', '')
-            self.name_input.setText(name)
+            with QSignalBlocker(self.name_input):
+                self.name_input.setText(name)
+            self.update_preview(name)
 
             # Metadaten des Vorschlags übernehmen (falls vorhanden)
             idx = self.suggestions_list.row(item)
@@ -345,8 +363,7 @@ class RenameDialog(QDialog):
             preview_name += '.pdf'
 
         # Ungültige Zeichen prüfen
-        invalid_chars = '<>:"/\\|?*'
-        found_invalid = [c for c in preview_name if c in invalid_chars]
+        found_invalid = _INVALID_RE.findall(preview_name)
 
         if found_invalid:
             self.warning_label.setText(
@@ -385,9 +402,7 @@ class RenameDialog(QDialog):
             text += '.pdf'
 
         # Ungültige Zeichen entfernen
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            text = text.replace(char, '')
+        text = _INVALID_RE.sub('', text)
 
         self.new_name = text
         self.accept()
@@ -6,16 +6,126 @@ Ermöglicht die Konfiguration von LLM-Providern und anderen Einstellungen.
 MIT License - Copyright (c) 2026
 """
 
+import importlib
+from typing import Any, Optional
+
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
     QLabel, QLineEdit, QComboBox, QPushButton,
     QGroupBox, QCheckBox, QMessageBox, QTabWidget,
-    QWidget, QSpinBox, QDoubleSpinBox
+    QWidget, QSpinBox, QDoubleSpinBox, QStyle
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QSignalBlocker, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QIcon
 
 from src.utils.config import get_config
 
+# Tab-Positionen der erst bei Bedarf aufgebauten Tabs
+_PERSONAL_TAB = 1
+_GENERAL_TAB = 2
+
+# Provider-Schlüssel in der Reihenfolge der Einträge in provider_combo
+_PROVIDERS = ("none", "claude", "openai", "poe", "ollama")
+
+# Je Provider-Index: (API-Key nötig, Platzhalter für API-Key, Modellvorschläge)
+_PROVIDER_UI = (
+    # Keiner
+    (False, None, ()),
+    # Claude
+    (True, "sk-ant-...", (
+        "haiku-3.5 (günstig, älter)",
+        "haiku-4.5 (schnell & günstig)",
+        "sonnet-3.5 (günstig, älter)",
+        "sonnet-4 (ausgewogen)",
+        "sonnet-4.5 (beste Qualität)",
+        "opus-4 (premium)",
+    )),
+    # OpenAI
+    (True, "sk-...", (
+        "gpt-4o-mini (günstig, älter)",
+        "gpt-4.1-nano (schnellstes)",
+        "gpt-4.1-mini (schnell & günstig)",
+        "gpt-4o (ausgewogen)",
+        "gpt-4.1 (beste Qualität)",
+        "o3-mini (Reasoning, günstig)",
+        "o3 (Reasoning)",
+        "o4-mini (Reasoning, neu)",
+    )),
+    # Poe
+    (True, "Poe API-Key von poe.com/api_key", (
+        "GPT-4o-Mini (schnell & günstig)",
+        "GPT-4o (OpenAI)",
+        "GPT-4.1-Mini (OpenAI, neu)",
+        "GPT-4.1 (OpenAI, neu)",
+        "o3-Mini (Reasoning)",
+        "o4-Mini (Reasoning, neu)",
+        "Claude-3.5-Haiku (schnell)",
+        "Claude-3.5-Sonnet (Anthropic)",
+        "Claude-Sonnet-4 (Anthropic, neu)",
+        "Claude-Sonnet-4.5 (Anthropic, neuestes)",
+        "Claude-Opus-4 (Anthropic, premium)",
+        "Gemini-2-Flash (Google)",
+        "Gemini-2.5-Flash (Google, neu)",
+        "Gemini-2.5-Pro (Google, premium)",
+        "Llama-3.1-405B (Meta)",
+        "Mistral-Large (Mistral)",
+    )),
+    # Ollama (lokal): kein API-Key noetig. Vorinstallierte Vorschlaege - per
+    # "Modelle aktualisieren" werden die tatsaechlich vorhandenen Modelle
+    # vom Server gelesen.
+    (False, "Nicht noetig fuer Ollama", (
+        "llama3.1 (Meta, ausgewogen)",
+        "llama3.2 (Meta, klein & schnell)",
+        "qwen2.5 (Alibaba, gut bei strukturiertem Output)",
+        "mistral (Mistral, klein)",
+        "gemma3 (Google)",
+        "phi3 (Microsoft, sehr klein)",
+    )),
+)
+
+# Einmal importierte SDK-Module samt Provider-Klasse, je Provider
+_PROVIDER_MODULES: dict[str, tuple] = {}
+
+
+def _get_claude_modules() -> tuple:
+    """Gibt (anthropic, ClaudeProvider) zurück; importiert nur beim ersten Aufruf."""
+    modules = _PROVIDER_MODULES.get("claude")
+    if modules is None:
+        anthropic = importlib.import_module("anthropic")
+        from src.ml.claude_provider import ClaudeProvider
+        modules = _PROVIDER_MODULES["claude"] = (anthropic, ClaudeProvider)
+    return modules
+
+
+def _get_openai_modules() -> tuple:
+    """Gibt (openai, OpenAIProvider) zurück; importiert nur beim ersten Aufruf."""
+    modules = _PROVIDER_MODULES.get("openai")
+    if modules is None:
+        openai = importlib.import_module("openai")
+        from src.ml.openai_provider import OpenAIProvider
+        modules = _PROVIDER_MODULES["openai"] = (openai, OpenAIProvider)
+    return modules
+
+
+class CacheClearThread(QThread):
+    """Thread zum Leeren des PDF-Analyse-Caches im Hintergrund."""
+
+    cleared = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+
+    def run(self):
+        """Leert In-Memory- und persistenten Cache."""
+        try:
+            self.cache.clear()
+            self.cache.clear_persistent_cache()
+            self.cleared.emit()
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
 
 class SettingsDialog(QDialog):
     """Dialog für Anwendungseinstellungen."""
@@ -27,9 +137,44 @@ class SettingsDialog(QDialog):
         """Initialisiert den Einstellungsdialog."""
         super().__init__(parent)
         self.config = get_config()
+        self._model_index: dict[str, int] = {}
+        self._pdf_cache = None
+        # API-Clients für "Verbindung testen", Schlüssel: (Provider, API-Key, Base-URL)
+        self._test_clients: dict[tuple, Any] = {}
+        self._cache_clear_thread: Optional[CacheClearThread] = None
+        # Bereinigte Eingaben, werden bei jeder Änderung aktualisiert
+        self._model_token = ""
+        self._api_key = ""
         self._setup_ui()
         self._load_settings()
 
+    @property
+    def pdf_cache(self):
+        """Gibt den PDF-Analyse-Cache zurück (einmalig importiert)."""
+        if self._pdf_cache is None:
+            from src.core.pdf_cache import get_pdf_cache
+            self._pdf_cache = get_pdf_cache()
+        return self._pdf_cache
+
+    def _get_test_client(self, provider: str, api_key: str, base_url: str = None):
+        """
+        Gibt einen API-Client für Verbindungstests zurück.
+
+        Clients werden pro (Provider, API-Key, Base-URL) wiederverwendet,
+        damit wiederholte Tests die bestehende Verbindung nutzen.
+        """
+        key = (provider, api_key, base_url)
+        client = self._test_clients.get(key)
+        if client is None:
+            if provider == "claude":
+                anthropic, _ = _get_claude_modules()
+                client = anthropic.Anthropic(api_key=api_key, max_retries=0)
+            else:
+                openai, _ = _get_openai_modules()
+                client = openai.OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+            self._test_clients[key] = client
+        return client
+
     def _setup_ui(self):
         """Erstellt die Benutzeroberfläche."""
         self.setWindowTitle("Einstellungen")
@@ -41,17 +186,19 @@ class SettingsDialog(QDialog):
         # Tab-Widget für verschiedene Kategorien
         tab_widget = QTabWidget()
 
-        # LLM-Tab
+        # LLM-Tab (wird sofort angezeigt)
         llm_tab = self._create_llm_tab()
         tab_widget.addTab(llm_tab, "KI-Assistent (LLM)")
 
-        # Persönliche Daten Tab
-        personal_tab = self._create_personal_tab()
-        tab_widget.addTab(personal_tab, "Persönliche Daten")
-
-        # Allgemeine Einstellungen Tab
-        general_tab = self._create_general_tab()
-        tab_widget.addTab(general_tab, "Allgemein")
+        # Weitere Tabs erst beim ersten Anzeigen aufbauen (Platzhalter)
+        tab_widget.addTab(QWidget(), "Persönliche Daten")
+        tab_widget.addTab(QWidget(), "Allgemein")
+        self._pending_tabs = {
+            _PERSONAL_TAB: (self._create_personal_tab, self._load_personal_settings),
+            _GENERAL_TAB: (self._create_general_tab, self._load_general_settings),
+        }
+        tab_widget.currentChanged.connect(self._on_tab_changed)
+        self._tab_widget = tab_widget
 
         layout.addWidget(tab_widget)
 
@@ -74,6 +221,24 @@ class SettingsDialog(QDialog):
 
         layout.addLayout(button_layout)
 
+    def _on_tab_changed(self, index: int):
+        """Baut einen Tab beim ersten Anzeigen auf und lädt seine Werte."""
+        builders = self._pending_tabs.pop(index, None)
+        if builders is None:
+            return
+        create_tab, load_settings = builders
+
+        tab = create_tab()
+        load_settings()
+
+        title = self._tab_widget.tabText(index)
+        placeholder = self._tab_widget.widget(index)
+        with QSignalBlocker(self._tab_widget):
+            self._tab_widget.removeTab(index)
+            self._tab_widget.insertTab(index, tab, title)
+            self._tab_widget.setCurrentIndex(index)
+        placeholder.deleteLater()
+
     def _create_llm_tab(self) -> QWidget:
         """Erstellt den LLM-Einstellungs-Tab."""
         tab = QWidget()
@@ -103,16 +268,26 @@ class SettingsDialog(QDialog):
         self.api_key_input = QLineEdit()
         self.api_key_input.setEchoMode(QLineEdit.EchoMode.Password)
         self.api_key_input.setPlaceholderText("sk-... oder anthropic-...")
-        api_layout.addRow("API-Key:", self.api_key_input)
+        self.api_key_input.textChanged.connect(self._on_api_key_changed)
+        self.api_key_input.setClearButtonEnabled(True)
 
-        # Show/Hide Button für API-Key
-        key_button_layout = QHBoxLayout()
-        self.show_key_button = QPushButton("Anzeigen")
-        self.show_key_button.setCheckable(True)
-        self.show_key_button.toggled.connect(self._toggle_key_visibility)
-        key_button_layout.addWidget(self.show_key_button)
-        key_button_layout.addStretch()
-        api_layout.addRow("", key_button_layout)
+        # Anzeigen/Verbergen des API-Keys direkt im Eingabefeld
+        show_key_icon = QIcon.fromTheme(
+            "view-reveal-symbolic",
+            self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogContentsView)
+        )
+        show_key_action = self.api_key_input.addAction(
+            show_key_icon, QLineEdit.ActionPosition.TrailingPosition
+        )
+        show_key_action.setToolTip("API-Key anzeigen/verbergen")
+        show_key_action.triggered.connect(
+            lambda: self.api_key_input.setEchoMode(
+                QLineEdit.EchoMode.Normal
+                if self.api_key_input.echoMode() == QLineEdit.EchoMode.Password
+                else QLineEdit.EchoMode.Password
+            )
+        )
+        api_layout.addRow("API-Key:", self.api_key_input)
 
         # Server-URL (nur fuer Ollama relevant)
         self.base_url_input = QLineEdit()
@@ -127,6 +302,7 @@ class SettingsDialog(QDialog):
         model_row_layout = QHBoxLayout()
         self.model_combo = QComboBox()
         self.model_combo.setEditable(True)
+        self.model_combo.currentTextChanged.connect(self._on_model_text_changed)
         model_row_layout.addWidget(self.model_combo, 1)
 
         self.refresh_models_button = QPushButton("Modelle aktualisieren")
@@ -365,33 +541,23 @@ class SettingsDialog(QDialog):
                 return
 
             # Datenbank-Tabellen leeren
-            session = db.get_session()
-            try:
-                from src.utils.database import SortingHistory, TargetFolder, RenameHistory
+            db.clear_history()
 
-                session.query(SortingHistory).delete()
-                session.query(TargetFolder).delete()
-                session.query(RenameHistory).delete()
-                session.commit()
+            # Classifier-Modell auch löschen
+            from src.ml.classifier import get_classifier
+            classifier = get_classifier()
+            if classifier.model_path.exists():
+                classifier.model_path.unlink()
+            classifier._retrain()  # Leeres Modell erstellen
 
-                # Classifier-Modell auch löschen
-                from src.ml.classifier import get_classifier
-                classifier = get_classifier()
-                if classifier.model_path.exists():
-                    classifier.model_path.unlink()
-                classifier._retrain()  # Leeres Modell erstellen
-
-                self._update_learning_stats()
-
-                QMessageBox.information(
-                    self,
-                    "Daten gelöscht",
-                    "Alle gelernten Ordnervorschläge wurden gelöscht.\n"
-                    "Das Programm startet jetzt ohne Lernfortschritt."
-                )
+            self._update_learning_stats()
 
-            finally:
-                session.close()
+            QMessageBox.information(
+                self,
+                "Daten gelöscht",
+                "Alle gelernten Ordnervorschläge wurden gelöscht.\n"
+                "Das Programm startet jetzt ohne Lernfortschritt."
+            )
 
         except Exception as e:
             QMessageBox.critical(
@@ -416,8 +582,6 @@ class SettingsDialog(QDialog):
     def _clear_cache(self):
         """Löscht den PDF-Analyse-Cache."""
         try:
-            from src.core.pdf_cache import get_pdf_cache
-
             reply = QMessageBox.question(
                 self,
                 "Cache leeren",
@@ -428,22 +592,47 @@ class SettingsDialog(QDialog):
             )
 
             if reply == QMessageBox.StandardButton.Yes:
-                cache = get_pdf_cache()
-                cache.clear()
-                cache.clear_persistent_cache()
-                self._update_cache_stats()
-                QMessageBox.information(
-                    self, "Cache geleert", "Der PDF-Analyse-Cache wurde erfolgreich geleert."
-                )
+                # Löschen läuft im Hintergrund, damit die UI bei großen
+                # Cache-Datenbanken nicht blockiert
+                self.clear_cache_button.setEnabled(False)
+                self.clear_cache_button.setText("Leere...")
+                self._cache_clear_thread = CacheClearThread(self.pdf_cache, self)
+                self._cache_clear_thread.cleared.connect(self._on_cache_cleared)
+                self._cache_clear_thread.error_occurred.connect(self._on_cache_clear_error)
+                self._cache_clear_thread.start()
 
         except Exception as e:
             QMessageBox.warning(self, "Fehler", f"Cache konnte nicht geleert werden:\n{e}")
 
+    def done(self, result: int):
+        """Schließt den Dialog; ein laufendes Cache-Leeren wird abgewartet."""
+        thread = self._cache_clear_thread
+        if thread is not None and thread.isRunning():
+            # Keine Meldung mehr auf dem geschlossenen Dialog
+            thread.cleared.disconnect(self._on_cache_cleared)
+            thread.error_occurred.disconnect(self._on_cache_clear_error)
+            thread.wait()
+        super().done(result)
+
+    def _on_cache_cleared(self):
+        """Wird aufgerufen wenn der Cache im Hintergrund geleert wurde."""
+        self.clear_cache_button.setEnabled(True)
+        self.clear_cache_button.setText("Cache leeren")
+        QTimer.singleShot(0, self._update_cache_stats)
+        QMessageBox.information(
+            self, "Cache geleert", "Der PDF-Analyse-Cache wurde erfolgreich geleert."
+        )
+
+    def _on_cache_clear_error(self, error: str):
+        """Wird aufgerufen wenn das Leeren des Caches fehlgeschlagen ist."""
+        self.clear_cache_button.setEnabled(True)
+        self.clear_cache_button.setText("Cache leeren")
+        QMessageBox.warning(self, "Fehler", f"Cache konnte nicht geleert werden:\n{error}")
+
     def _update_cache_stats(self):
         """Aktualisiert die Cache-Statistik-Anzeige."""
         try:
-            from src.core.pdf_cache import get_pdf_cache
-            cache = get_pdf_cache()
+            cache = self.pdf_cache
             stats = cache.get_stats()
             llm_count = stats.get('llm_cached_count', 0)
             if llm_count > 0:
@@ -457,110 +646,54 @@ class SettingsDialog(QDialog):
 
     def _on_provider_changed(self, index: int):
         """Wird aufgerufen wenn der Provider geändert wird."""
+        needs_api_key, placeholder, models = _PROVIDER_UI[index]
+        is_active = (index != 0)
+
         # Modelle je nach Provider aktualisieren
         self.model_combo.clear()
 
         # Server-URL ist nur fuer Ollama relevant - standardmaessig deaktivieren
-        is_ollama = (index == 4)
-        self.base_url_input.setEnabled(is_ollama)
-
-        if index == 0:  # Keiner
-            self.api_key_input.setEnabled(False)
-            self.model_combo.setEnabled(False)
-            self.test_button.setEnabled(False)
-        elif index == 1:  # Claude
-            self.api_key_input.setEnabled(True)
-            self.model_combo.setEnabled(True)
-            self.test_button.setEnabled(True)
-            self.model_combo.addItems([
-                "haiku-3.5 (günstig, älter)",
-                "haiku-4.5 (schnell & günstig)",
-                "sonnet-3.5 (günstig, älter)",
-                "sonnet-4 (ausgewogen)",
-                "sonnet-4.5 (beste Qualität)",
-                "opus-4 (premium)",
-            ])
-            self.api_key_input.setPlaceholderText("sk-ant-...")
-        elif index == 2:  # OpenAI
-            self.api_key_input.setEnabled(True)
-            self.model_combo.setEnabled(True)
-            self.test_button.setEnabled(True)
-            self.model_combo.addItems([
-                "gpt-4o-mini (günstig, älter)",
-                "gpt-4.1-nano (schnellstes)",
-                "gpt-4.1-mini (schnell & günstig)",
-                "gpt-4o (ausgewogen)",
-                "gpt-4.1 (beste Qualität)",
-                "o3-mini (Reasoning, günstig)",
-                "o3 (Reasoning)",
-                "o4-mini (Reasoning, neu)",
-            ])
-            self.api_key_input.setPlaceholderText("sk-...")
-        elif index == 3:  # Poe
-            self.api_key_input.setEnabled(True)
-            self.model_combo.setEnabled(True)
-            self.test_button.setEnabled(True)
-            self.model_combo.addItems([
-                "GPT-4o-Mini (schnell & günstig)",
-                "GPT-4o (OpenAI)",
-                "GPT-4.1-Mini (OpenAI, neu)",
-                "GPT-4.1 (OpenAI, neu)",
-                "o3-Mini (Reasoning)",
-                "o4-Mini (Reasoning, neu)",
-                "Claude-3.5-Haiku (schnell)",
-                "Claude-3.5-Sonnet (Anthropic)",
-                "Claude-Sonnet-4 (Anthropic, neu)",
-                "Claude-Sonnet-4.5 (Anthropic, neuestes)",
-                "Claude-Opus-4 (Anthropic, premium)",
-                "Gemini-2-Flash (Google)",
-                "Gemini-2.5-Flash (Google, neu)",
-                "Gemini-2.5-Pro (Google, premium)",
-                "Llama-3.1-405B (Meta)",
-                "Mistral-Large (Mistral)",
-            ])
-            self.api_key_input.setPlaceholderText("Poe API-Key von poe.com/api_key")
-        elif index == 4:  # Ollama (lokal)
-            # Kein API-Key noetig, aber URL und Modell
-            self.api_key_input.setEnabled(False)
-            self.api_key_input.setPlaceholderText("Nicht noetig fuer Ollama")
-            self.model_combo.setEnabled(True)
-            self.test_button.setEnabled(True)
-            # Vorinstallierte Vorschlaege - per "Modelle aktualisieren" werden
-            # die tatsaechlich vorhandenen Modelle vom Server gelesen.
-            self.model_combo.addItems([
-                "llama3.1 (Meta, ausgewogen)",
-                "llama3.2 (Meta, klein & schnell)",
-                "qwen2.5 (Alibaba, gut bei strukturiertem Output)",
-                "mistral (Mistral, klein)",
-                "gemma3 (Google)",
-                "phi3 (Microsoft, sehr klein)",
-            ])
-
-    def _toggle_key_visibility(self, checked: bool):
-        """Zeigt/versteckt den API-Key."""
-        if checked:
-            self.api_key_input.setEchoMode(QLineEdit.EchoMode.Normal)
-            self.show_key_button.setText("Verbergen")
-        else:
-            self.api_key_input.setEchoMode(QLineEdit.EchoMode.Password)
-            self.show_key_button.setText("Anzeigen")
+        self.base_url_input.setEnabled(_PROVIDERS[index] == "ollama")
+
+        self.api_key_input.setEnabled(needs_api_key)
+        self.model_combo.setEnabled(is_active)
+        self.test_button.setEnabled(is_active)
+        if placeholder:
+            self.api_key_input.setPlaceholderText(placeholder)
+
+        self._set_models(models)
+
+    def _set_models(self, models):
+        """
+        Füllt die Modell-Combo.
+
+        Jeder Eintrag erhält sein Modell-Token (vor dem Leerzeichen) als
+        Item-Data, damit Modelle exakt statt per Teilstring gefunden werden.
+        """
+        self.model_combo.addItems(models)
+        self._model_index = {}
+        for i, text in enumerate(models):
+            token = text.split(" ", 1)[0]
+            self.model_combo.setItemData(i, token)
+            self._model_index[token.lower()] = i
+
+    def _on_model_text_changed(self, text: str):
+        """Merkt sich den Modellnamen (vor dem Klammerteil)."""
+        self._model_token = text.split(" ", 1)[0]
+
+    def _on_api_key_changed(self, text: str):
+        """Merkt sich den API-Key ohne umgebende Leerzeichen."""
+        self._api_key = text.strip()
 
     def _load_settings(self):
-        """Lädt die aktuellen Einstellungen."""
+        """Lädt die LLM-Einstellungen (weitere Tabs laden beim ersten Anzeigen)."""
         # LLM-Einstellungen
         llm_config = self.config.get_llm_config()
         provider = llm_config.get("provider", "none")
 
-        if provider == "claude":
-            self.provider_combo.setCurrentIndex(1)
-        elif provider == "openai":
-            self.provider_combo.setCurrentIndex(2)
-        elif provider == "poe":
-            self.provider_combo.setCurrentIndex(3)
-        elif provider == "ollama":
-            self.provider_combo.setCurrentIndex(4)
-        else:
-            self.provider_combo.setCurrentIndex(0)
+        self.provider_combo.setCurrentIndex(
+            _PROVIDERS.index(provider) if provider in _PROVIDERS else 0
+        )
 
         self.api_key_input.setText(llm_config.get("api_key", ""))
         self.base_url_input.setText(llm_config.get("base_url", ""))
@@ -568,10 +701,9 @@ class SettingsDialog(QDialog):
         model = llm_config.get("model", "")
         if model:
             # Versuche Modell in Combo zu finden
-            for i in range(self.model_combo.count()):
-                if model in self.model_combo.itemText(i).lower():
-                    self.model_combo.setCurrentIndex(i)
-                    break
+            idx = self._model_index.get(model.lower())
+            if idx is not None:
+                self.model_combo.setCurrentIndex(idx)
             else:
                 self.model_combo.setCurrentText(model)
 
@@ -580,43 +712,38 @@ class SettingsDialog(QDialog):
         self.auto_use_check.setChecked(llm_config.get("auto_use", False))
         self.text_limit_spin.setValue(llm_config.get("text_limit", 1500))
 
-        # Allgemeine Einstellungen
-        self.thumbnail_size_spin.setValue(self.config.get("thumbnail_size", 150))
-        self.max_suggestions_spin.setValue(self.config.get("max_suggestions", 5))
-
-        # Persönliche Daten
+    def _load_personal_settings(self):
+        """Lädt die persönlichen Daten in den Tab."""
         self.owner_name_input.setText(self.config.get("owner_name", ""))
         self.owner_variants_input.setText(self.config.get("owner_name_variants", ""))
         self.owner_company_input.setText(self.config.get("owner_company", ""))
         self.owner_address_input.setText(self.config.get("owner_address", ""))
 
+    def _load_general_settings(self):
+        """Lädt die allgemeinen Einstellungen in den Tab."""
+        self.thumbnail_size_spin.setValue(self.config.get("thumbnail_size", 150))
+        self.max_suggestions_spin.setValue(self.config.get("max_suggestions", 5))
+
         # Cache-Einstellungen
         self.persist_cache_checkbox.setChecked(self.config.get("persist_pdf_cache", True))
         self.llm_precache_checkbox.setChecked(self.config.get("llm_precache_enabled", True))
-        self._update_cache_stats()
+        # Cache-Statistik erst nach dem ersten Zeichnen des Dialogs laden
+        QTimer.singleShot(0, self._update_cache_stats)
 
     def _save_settings(self):
         """Speichert die Einstellungen."""
         # LLM-Einstellungen
-        provider_index = self.provider_combo.currentIndex()
-        if provider_index == 0:
-            provider = "none"
-        elif provider_index == 1:
-            provider = "claude"
-        elif provider_index == 2:
-            provider = "openai"
-        elif provider_index == 3:
-            provider = "poe"
-        else:
-            provider = "ollama"
-
-        # Modellname extrahieren (vor dem Klammerteil)
-        model_text = self.model_combo.currentText()
-        model = model_text.split(" ")[0] if model_text else ""
+        provider = _PROVIDERS[self.provider_combo.currentIndex()]
+
+        model = self._model_token
+        api_key = self._api_key
+        if api_key != self.config.get_llm_config().get("api_key", ""):
+            # Test-Clients mit altem Key nicht weiter vorhalten
+            self._test_clients.clear()
 
         llm_config = {
             "provider": provider,
-            "api_key": self.api_key_input.text().strip(),
+            "api_key": api_key,
             "model": model,
             "max_tokens": self.max_tokens_spin.value(),
             "temperature": self.temperature_spin.value(),
@@ -624,9 +751,21 @@ class SettingsDialog(QDialog):
             "text_limit": self.text_limit_spin.value(),
             "base_url": self.base_url_input.text().strip(),
         }
-        self.config.set("llm", llm_config)
+        # Alle Änderungen in einem Schreibvorgang speichern
+        with self.config.batch():
+            self.config.set("llm", llm_config)
+
+            # Nicht geöffnete Tabs wurden nie aufgebaut - dort bleibt alles unverändert
+            if _GENERAL_TAB not in self._pending_tabs:
+                self._save_general_settings()
+            if _PERSONAL_TAB not in self._pending_tabs:
+                self._save_personal_settings()
 
-        # Allgemeine Einstellungen
+        self.settings_changed.emit()
+        self.accept()
+
+    def _save_general_settings(self):
+        """Speichert die Werte des Allgemein-Tabs."""
         self.config.set("thumbnail_size", self.thumbnail_size_spin.value())
         self.config.set("max_suggestions", self.max_suggestions_spin.value())
 
@@ -639,26 +778,23 @@ class SettingsDialog(QDialog):
 
         # Cache-Modul über Änderung informieren
         try:
-            from src.core.pdf_cache import get_pdf_cache
-            cache = get_pdf_cache()
+            cache = self.pdf_cache
             cache.set_persist_cache(persist_cache)
             cache.set_llm_precache_enabled(llm_precache)
         except Exception:
             pass
 
-        # Persönliche Daten speichern
+    def _save_personal_settings(self):
+        """Speichert die persönlichen Daten."""
         self.config.set("owner_name", self.owner_name_input.text().strip())
         self.config.set("owner_name_variants", self.owner_variants_input.text().strip())
         self.config.set("owner_company", self.owner_company_input.text().strip())
         self.config.set("owner_address", self.owner_address_input.text().strip())
 
-        self.settings_changed.emit()
-        self.accept()
-
     def _test_connection(self):
         """Testet die Verbindung zum LLM-Provider."""
         provider_index = self.provider_combo.currentIndex()
-        api_key = self.api_key_input.text().strip()
+        api_key = self._api_key
 
         # Ollama braucht keinen API-Key, aber eine URL.
         if provider_index == 4:
@@ -670,9 +806,7 @@ class SettingsDialog(QDialog):
             )
             return
 
-        # Modellname extrahieren
-        model_text = self.model_combo.currentText()
-        model = model_text.split(" ")[0] if model_text else ""
+        model = self._model_token
 
         self.test_button.setEnabled(False)
         self.test_button.setText("Teste...")
@@ -693,11 +827,10 @@ class SettingsDialog(QDialog):
     def _test_claude(self, api_key: str, model: str):
         """Testet die Claude API."""
         try:
-            import anthropic
-            client = anthropic.Anthropic(api_key=api_key)
+            anthropic, ClaudeProvider = _get_claude_modules()
+            client = self._get_test_client("claude", api_key)
 
             # Kurzer Test-Request
-            from src.ml.claude_provider import ClaudeProvider
             model_id = ClaudeProvider.MODELS.get(model, model)
 
             message = client.messages.create(
@@ -734,11 +867,10 @@ class SettingsDialog(QDialog):
     def _test_openai(self, api_key: str, model: str):
         """Testet die OpenAI API."""
         try:
-            import openai
-            client = openai.OpenAI(api_key=api_key)
+            openai, OpenAIProvider = _get_openai_modules()
+            client = self._get_test_client("openai", api_key)
 
             # Modell-ID ermitteln
-            from src.ml.openai_provider import OpenAIProvider
             model_id = OpenAIProvider.MODELS.get(model, model)
 
             response = client.chat.completions.create(
@@ -775,11 +907,8 @@ class SettingsDialog(QDialog):
     def _test_poe(self, api_key: str, model: str):
         """Testet die Poe API."""
         try:
-            import openai
-            client = openai.OpenAI(
-                api_key=api_key,
-                base_url="https://api.poe.com/v1",
-            )
+            openai, _ = _get_openai_modules()
+            client = self._get_test_client("poe", api_key, "https://api.poe.com/v1")
 
             response = client.chat.completions.create(
                 model=model,
@@ -865,7 +994,7 @@ class SettingsDialog(QDialog):
     def _refresh_models(self):
         """Ruft die verfügbaren Modelle vom API-Provider ab."""
         provider_index = self.provider_combo.currentIndex()
-        api_key = self.api_key_input.text().strip()
+        api_key = self._api_key
 
         if provider_index == 0:
             QMessageBox.information(
@@ -883,7 +1012,7 @@ class SettingsDialog(QDialog):
             return
 
         # Aktuell gewähltes Modell merken
-        current_model = self.model_combo.currentText().split(" ")[0]
+        current_model = self._model_token
 
         self.refresh_models_button.setEnabled(False)
         self.refresh_models_button.setText("Lade...")
@@ -903,13 +1032,12 @@ class SettingsDialog(QDialog):
 
             if models:
                 self.model_combo.clear()
-                self.model_combo.addItems(models)
+                self._set_models(models)
 
                 # Vorheriges Modell wieder auswählen wenn möglich
-                for i in range(self.model_combo.count()):
-                    if self.model_combo.itemText(i).startswith(current_model):
-                        self.model_combo.setCurrentIndex(i)
-                        break
+                idx = self.model_combo.findData(current_model)
+                if idx >= 0:
+                    self.model_combo.setCurrentIndex(idx)
 
                 QMessageBox.information(
                     self, "Erfolg",
@@ -4,6 +4,7 @@ PDF Sortier Meister - Haupteinstiegspunkt
 Ein intelligentes Programm zum Sortieren und Umbenennen von gescannten PDFs.
 """
 
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -17,19 +18,23 @@ try:
 except ImportError:
     _HAS_PYI_SPLASH = False
 
-# Füge src zum Pfad hinzu für relative Imports
+# Projekt-Root (Splashbild etc.)
 src_path = Path(__file__).parent.parent
-if str(src_path) not in sys.path:
+
+# Nur beim Direktstart als Skript (python src/main.py) fehlt das Projekt-Root
+# im Suchpfad; bei "python -m src" bzw. run.py ist das Paket bereits auffindbar.
+if __name__ == "__main__" and __package__ is None and str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
 from PyQt6.QtWidgets import QApplication, QSplashScreen
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, QCoreApplication
 from PyQt6.QtGui import QPixmap, QPalette, QColor
 
 from src.gui.main_window import MainWindow
 from src.gui.setup_wizard import SetupWizard
+from src.ml.classifier import preload_classifier
 from src.utils.config import get_config
-from src.utils.logging_config import setup_logging, get_logger
+from src.utils.logging_config import flush_logs, setup_logging, get_logger
 
 # Versionsnummer zentral definiert
 __version__ = "0.9.0"
@@ -42,6 +47,9 @@ def main():
     logger = get_logger("main")
     logger.info(f"Version {__version__}")
 
+    # Klassifikator-Modell parallel zum Aufbau der Oberfläche laden
+    preload_classifier()
+
     # High-DPI Skalierung aktivieren
     QApplication.setHighDpiScaleFactorRoundingPolicy(
         Qt.HighDpiScaleFactorRoundingPolicy.PassThrough
@@ -49,6 +57,8 @@ def main():
 
     # Anwendung erstellen
     app = QApplication(sys.argv)
+    # Wartende Log-Einträge schreiben, sobald die Anwendung endet
+    app.aboutToQuit.connect(flush_logs)
     app.setApplicationName("PDF Sortier Meister")
     app.setApplicationVersion(__version__)
     app.setOrganizationName("PDF Sortier Meister")
@@ -79,13 +89,24 @@ def main():
     # Fallback fuer die Dev-Umgebung (python main.py).
     splash = None
     if not _HAS_PYI_SPLASH:
-        # Splashbild neben der .exe oder im Projekt-Root suchen
-        candidates = [
-            Path(getattr(sys, "_MEIPASS", src_path)) / "SplashScreen3.png",
-            src_path / "SplashScreen3.png",
-        ]
-        splash_path = next((p for p in candidates if p.exists()), None)
-        if splash_path is not None:
+        # Splashbild neben der .exe oder im Projekt-Root suchen.
+        # Bevorzugt das vorskalierte Bild (tools/prescale_splash.py),
+        # nur als Fallback wird das Original zur Laufzeit skaliert.
+        base_dirs = [Path(getattr(sys, "_MEIPASS", src_path)), src_path]
+        prescaled_path = next(
+            (d / "SplashScreen3@half.png" for d in base_dirs
+             if (d / "SplashScreen3@half.png").exists()),
+            None
+        )
+        splash_path = next(
+            (d / "SplashScreen3.png" for d in base_dirs
+             if (d / "SplashScreen3.png").exists()),
+            None
+        )
+        scaled_pixmap = None
+        if prescaled_path is not None:
+            scaled_pixmap = QPixmap(str(prescaled_path))
+        elif splash_path is not None:
             pixmap = QPixmap(str(splash_path))
             scaled_pixmap = pixmap.scaled(
                 pixmap.width() // 2,
@@ -93,12 +114,15 @@ def main():
                 Qt.AspectRatioMode.KeepAspectRatio,
                 Qt.TransformationMode.SmoothTransformation
             )
+        if scaled_pixmap is not None:
             splash = QSplashScreen(scaled_pixmap)
             splash.setWindowFlags(
                 splash.windowFlags() | Qt.WindowType.WindowStaysOnTopHint
             )
             splash.show()
-            app.processEvents()
+            # Nur den Splash zeichnen, ohne die komplette Event-Schleife
+            # (und evtl. Benutzereingaben) abzuarbeiten
+            splash.repaint()
 
     # Konfiguration laden
     config = get_config()
@@ -108,7 +132,8 @@ def main():
 
     # Hauptfenster anzeigen (unter dem SplashScreen)
     window.show()
-    app.processEvents()
+    # Nur bereits gepostete Events (Layout/Paint) zustellen
+    QCoreApplication.sendPostedEvents()
 
     # SplashScreen schliessen wenn Thumbnails geladen sind.
     # Safety-Fallback: spaetestens nach 15s schliessen, falls z.B. kein
@@ -145,4 +170,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Im PyInstaller-Build starten Worker-Prozesse (joblib) die .exe erneut
+    multiprocessing.freeze_support()
     main()
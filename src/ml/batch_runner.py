@@ -0,0 +1,101 @@
+"""
+Parallele LLM-Anfragen mit Drosselung für PDF Sortier Meister
+
+Führt viele (asynchrone) Anfragen gleichzeitig aus, hält dabei aber die
+Limits des Anbieters ein: höchstens max_concurrency Anfragen laufen
+gleichzeitig, und Token-Buckets verhindern, dass mehr Anfragen bzw.
+Tokens pro Minute verschickt werden als erlaubt. Gewartet wird vor dem
+Senden, statt erst auf Rate-Limit-Fehler zu reagieren.
+
+MIT License - Copyright (c) 2026
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _TokenBucket:
+    """Kontingent pro Minute, das gleichmäßig wieder aufgefüllt wird."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    async def acquire(self, amount: float):
+        """Wartet, bis amount verfügbar ist, und zieht es ab."""
+        # Größere Anfragen als das ganze Kontingent müssen trotzdem durch
+        amount = min(amount, self.capacity)
+        while True:
+            now = time.monotonic()
+            self.available = min(
+                self.capacity, self.available + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            # Kein await zwischen Prüfen und Abziehen: in der Event-Loop atomar
+            if self.available >= amount:
+                self.available -= amount
+                return
+            await asyncio.sleep((amount - self.available) / self._rate)
+
+
+class BatchRunner:
+    """Führt asynchrone Anfragen parallel und innerhalb der Anbieter-Limits aus."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        """
+        Initialisiert den Runner.
+
+        Args:
+            max_concurrency: Maximale Anzahl gleichzeitiger Anfragen
+            requests_per_minute: Anfrage-Limit des Anbieters (None/0 = keins)
+            tokens_per_minute: Token-Limit des Anbieters (None/0 = keins)
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self._requests = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def run(
+        self,
+        items: list[T],
+        worker: Callable[[T], Awaitable[R]],
+        estimate_tokens: Optional[Callable[[T], int]] = None,
+    ) -> list[R]:
+        """
+        Bearbeitet alle Einträge parallel.
+
+        Args:
+            items: Zu bearbeitende Einträge
+            worker: Asynchrone Funktion, die einen Eintrag bearbeitet
+            estimate_tokens: Geschätzter Token-Verbrauch je Eintrag
+                (nur nötig mit tokens_per_minute)
+
+        Returns:
+            Ergebnisse in der Reihenfolge der Einträge
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_one(item: T) -> R:
+            async with semaphore:
+                tokens = estimate_tokens(item) if estimate_tokens and self._tokens else 0
+                await self.throttle(tokens)
+                return await worker(item)
+
+        return list(await asyncio.gather(*(run_one(item) for item in items)))
+
+    async def throttle(self, tokens: int = 0):
+        """Wartet, bis eine weitere Anfrage (mit tokens Tokens) erlaubt ist."""
+        if self._requests:
+            await self._requests.acquire(1)
+        if self._tokens and tokens:
+            await self._tokens.acquire(tokens)
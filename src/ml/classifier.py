@@ -7,23 +7,136 @@ ihrem Textinhalt einem Zielordner zuzuordnen.
 Unterstützt hierarchische Ordnerstrukturen und Jahres-Muster-Erkennung.
 """
 
+import atexit
+import json
 import logging
-import pickle
+import os
 import re
+import threading
+import time
+from collections import Counter, deque
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass
 
+from joblib import Parallel, cpu_count, delayed
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 
 from src.utils.config import get_config
 from src.utils.database import get_database, SortingHistory
 
 logger = logging.getLogger("pdf_sortier_meister.classifier")
 
+# Spaltenzahl des Hashing-Vectorizers (Kollisionen sind bei 2^18 selten)
+_HASH_FEATURES = 2**18
+
+# IDF-Gewichte werden nach max(_MIN_ADDS_BEFORE_REFIT, Anteil * Einträge)
+# angehängten Dokumenten neu gelernt; dazwischen wird nur transformiert.
+_MIN_ADDS_BEFORE_REFIT = 50
+_REFIT_FRACTION = 0.1
+
+# Erst ab so vielen Trainingstexten werden seltene/häufige Terme verworfen
+_MIN_DOCS_FOR_PRUNING = 10
+
+# Anfragen mit höchstens so vielen Termen nutzen den invertierten Index
+_INVERTED_INDEX_MAX_TERMS = 64
+
+# Sekunden ohne weitere Änderung, bevor das Modell gespeichert wird
+_SAVE_DELAY = 5.0
+
+# Ab so vielen Texten wird beim Neutrainieren parallel vorverarbeitet
+_PARALLEL_PREPROCESS_MIN = 500
+
+# Ab so vielen Texten werden die Termhäufigkeiten parallel gezählt
+_PARALLEL_COUNT_MIN = 2000
+
+# Einträge pro Datenbank-Block beim Neutrainieren (groß genug, dass sich
+# das parallele Zählen lohnt)
+_RETRAIN_BATCH_SIZE = 4096
+
+# Sekunden, die ein geprüfter Ordnerpfad als existierend/fehlend gilt
+_PATH_CHECK_TTL = 30.0
+
+# Obergrenze für den Ordner-Cache (schützt vor riesigen Verzeichnisbäumen)
+_MAX_CACHED_FOLDERS = 50_000
+
+# Version des gespeicherten Modellformats (bei Änderung wird neu trainiert)
+_MODEL_VERSION = 6
+
+# Arrays der CSR-Matrix, die einzeln (und damit mmap-fähig) gespeichert werden
+_MATRIX_PARTS = ("data", "indices", "indptr")
+
+# Felder der Trainingseinträge, die mit dem Modell gespeichert werden
+_ENTRY_FIELDS = (
+    "id", "original_filename", "target_folder",
+    "target_folder_name", "target_relative_path",
+)
+
+# Deutsche Stopwords (einfache Liste)
+_STOPWORDS = frozenset({
+    "der", "die", "das", "und", "in", "zu", "den", "von", "ist", "mit",
+    "sich", "des", "auf", "für", "nicht", "ein", "eine", "als", "auch",
+    "es", "an", "werden", "aus", "er", "hat", "dass", "sie", "nach",
+    "wird", "bei", "einer", "um", "am", "sind", "noch", "wie", "einem",
+    "über", "so", "zum", "kann", "nur", "ihr", "seine", "ich", "oder",
+    "aber", "vor", "zur", "bis", "mehr", "durch", "man", "sehr", "diese",
+    "wenn", "war", "haben", "wurde", "alle", "können", "diesem", "dieser",
+})
+
+# Wörter mit mindestens 3 Zeichen (kürzere werden gar nicht erst extrahiert)
+_SPLIT_RE = re.compile(r"\b\w{3,}\b")
+
+
+def _preprocess_text_uncached(text: str) -> str:
+    """Entfernt Stopwords und kurze Wörter."""
+    return " ".join(
+        word for word in _SPLIT_RE.findall(text.lower()) if word not in _STOPWORDS
+    )
+
+
+def _preprocess_texts(texts: list[str]) -> list[str]:
+    """Vorverarbeitung eines Blocks (für die Verteilung auf Prozesse)."""
+    return [_preprocess_text_uncached(text) for text in texts]
+
+
+# Gecacht für wiederholte Anfragen mit demselben Text
+_preprocess_text_cached = lru_cache(maxsize=512)(_preprocess_text_uncached)
+
+
+def german_analyzer(text: str) -> list[str]:
+    """
+    Zerlegt Text in Terme für den TF-IDF-Vectorizer.
+
+    Entfernt Stopwords und Wörter mit weniger als 3 Zeichen und liefert
+    Uni- und Bigrams. Liefert für Rohtext und bereits vorverarbeiteten
+    Text dieselben Terme.
+    """
+    tokens = [
+        token for token in _SPLIT_RE.findall(text.lower()) if token not in _STOPWORDS
+    ]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _iter_by_score(scores: np.ndarray, k: int):
+    """
+    Liefert Indizes absteigend nach Score.
+
+    Nur die besten k werden sofort sortiert (argpartition); der Rest erst,
+    falls der Aufrufer weitere Kandidaten braucht.
+    """
+    if k <= 0 or k >= len(scores):
+        yield from np.argsort(-scores, kind="stable")
+        return
+
+    partitioned = np.argpartition(-scores, k - 1)
+    head, tail = partitioned[:k], partitioned[k:]
+    yield from head[np.argsort(-scores[head], kind="stable")]
+    yield from tail[np.argsort(-scores[tail], kind="stable")]
+
 
 @dataclass
 class Suggestion:
@@ -47,17 +160,45 @@ class PDFClassifier:
         self.config = get_config()
         self.db = get_database()
 
-        # TF-IDF Vectorizer für Textähnlichkeit
-        self.vectorizer: Optional[TfidfVectorizer] = None
+        # Hashing-Vectorizer (ohne Vokabular) plus IDF-Gewichtung
+        self.vectorizer: Optional[HashingVectorizer] = None
+        self.tfidf_transformer: Optional[TfidfTransformer] = None
         self.tfidf_matrix = None
         self.training_entries: list[SortingHistory] = []
 
-        # Modell-Pfad
-        self.model_path = self.config.model_dir / "classifier.pkl"
+        # Ordner-ID je Trainingseintrag (für vektorisierte Gruppierung)
+        self._folder_id_by_name: dict[str, int] = {}
+        self._folder_names: list[str] = []
+        self._folder_learned_paths: list[str] = []
+        self._entry_folder_ids = np.empty(0, dtype=np.int32)
+
+        # Invertierter Index (Spaltenformat) für kurze Anfragen
+        self._csc = None
+        self._csc_source = None
+
+        # Nummer der zuletzt gespeicherten Modelldateien (siehe _write_model_files)
+        self._generation = 0
+
+        # Seit dem letzten Training nur angehängte Dokumente
+        self._adds_since_refit = 0
+
+        # Modell-Pfad (Manifest mit Trainingseinträgen; Vectorizer und
+        # IDF-Gewichte und Matrix liegen daneben als .npy-Dateien)
+        self.model_path = self.config.model_dir / "classifier.json"
+        self._legacy_model_path = self.config.model_dir / "classifier.pkl"
 
         # Cache für Ordner-Suche in den Zielordnern
         self._folder_cache: dict[str, Path] = {}
-        self._folder_cache_roots: list[Path] = []
+        self._folder_cache_roots: set[Path] = set()
+        self._folder_cache_by_root: dict[Path, dict[str, Path]] = {}
+        # Gelernter Pfad -> (Path, Zeitpunkt der Prüfung, existiert)
+        self._path_cache: dict[str, tuple[Path, float, bool]] = {}
+
+        # Verzögertes Speichern (siehe _schedule_save); beim Beenden sichern
+        self._model_lock = threading.RLock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
 
         # Modell laden oder neu erstellen
         self._load_or_create_model()
@@ -81,31 +222,75 @@ class PDFClassifier:
         if not target_folders:
             return None
 
-        # Cache invalidieren wenn Zielordner sich geändert haben
-        if self._folder_cache_roots != target_folders:
-            self._folder_cache = {}
-            self._folder_cache_roots = target_folders.copy()
-            self._build_folder_cache(target_folders)
+        # Cache nur für hinzugekommene/entfernte Zielordner aktualisieren
+        if set(target_folders) != self._folder_cache_roots:
+            self._update_folder_cache(target_folders)
 
         return self._folder_cache.get(folder_name.lower())
 
+    def invalidate_folder_cache(self):
+        """Verwirft den Ordner-Cache (z.B. wenn sich die Ordnerstruktur geändert hat)."""
+        self._folder_cache = {}
+        self._folder_cache_roots = set()
+        self._folder_cache_by_root = {}
+        self._path_cache = {}
+
     def _build_folder_cache(self, root_folders: list[Path]):
-        """Baut den Ordner-Cache für schnelle Suche auf."""
+        """Baut den Ordner-Cache für schnelle Suche komplett neu auf."""
+        self.invalidate_folder_cache()
+        self._update_folder_cache(root_folders)
+
+    def _update_folder_cache(self, root_folders: list[Path]):
+        """
+        Gleicht den Ordner-Cache mit den aktuellen Zielordnern ab.
+
+        Nur neu hinzugekommene Zielordner werden durchsucht, entfernte
+        werden verworfen; unveränderte Ordnerbäume bleiben im Cache.
+        """
+        new_roots = set(root_folders)
+        for root_folder in self._folder_cache_roots - new_roots:
+            self._folder_cache_by_root.pop(root_folder, None)
+        for root_folder in new_roots - self._folder_cache_roots:
+            self._folder_cache_by_root[root_folder] = self._scan_folder_tree(root_folder)
+        self._folder_cache_roots = new_roots
+
+        # Zusammenführen in Reihenfolge der Zielordner (frühere gewinnen)
         self._folder_cache = {}
-        for root_folder in root_folders:
-            if not root_folder.exists():
-                continue
+        for root_folder in dict.fromkeys(root_folders):
+            for name, path in self._folder_cache_by_root[root_folder].items():
+                self._folder_cache.setdefault(name, path)
+
+    def _scan_folder_tree(self, root_folder: Path) -> dict[str, Path]:
+        """
+        Sammelt alle Ordner unterhalb eines Zielordners.
+
+        Durchsucht den Ordner in Breitensuche; bei gleichen Namen gewinnt
+        der am wenigsten tief verschachtelte Ordner.
+
+        Returns:
+            Dict mit Ordnername (lowercase) -> Pfad
+        """
+        if not root_folder.exists():
+            return {}
+
+        # Root-Ordner selbst auch hinzufügen (Lowercase für case-insensitive Matching)
+        folders = {root_folder.name.lower(): root_folder}
+
+        pending = deque([str(root_folder)])
+        while pending and len(folders) < _MAX_CACHED_FOLDERS:
             try:
-                # Root-Ordner selbst auch hinzufügen
-                self._folder_cache[root_folder.name.lower()] = root_folder
-                # Alle Unterordner
-                for folder in root_folder.rglob("*"):
-                    if folder.is_dir() and not folder.name.startswith('.'):
-                        # Lowercase für case-insensitive Matching
-                        self._folder_cache[folder.name.lower()] = folder
-            except PermissionError:
+                with os.scandir(pending.popleft()) as it:
+                    for entry in it:
+                        if entry.name.startswith('.'):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            folders.setdefault(entry.name.lower(), Path(entry.path))
+                            pending.append(entry.path)
+            except OSError:
                 pass
 
+        return folders
+
     def _resolve_folder_path(self, learned_folder: str, learned_name: str) -> Optional[Path]:
         """
         Löst einen gelernten Ordnerpfad auf - entweder direkt oder per Namen.
@@ -118,8 +303,8 @@ class PDFClassifier:
             Pfad zum existierenden Ordner oder None
         """
         # 1. Versuche den originalen Pfad
-        original_path = Path(learned_folder)
-        if original_path.exists():
+        original_path = self._live_path(learned_folder)
+        if original_path:
             return original_path
 
         # 2. Suche nach Ordnernamen im aktuellen Zielordner
@@ -129,9 +314,24 @@ class PDFClassifier:
 
         return None
 
+    def _live_path(self, folder: str) -> Optional[Path]:
+        """
+        Gibt den Pfad zurück, falls der Ordner existiert.
+
+        Das Ergebnis wird _PATH_CHECK_TTL Sekunden zwischengespeichert,
+        damit nicht jede Anfrage pro Kandidat ein stat() auslöst.
+        """
+        now = time.monotonic()
+        cached = self._path_cache.get(folder)
+        if cached is None or now - cached[1] > _PATH_CHECK_TTL:
+            path = cached[0] if cached else Path(folder)
+            cached = (path, now, path.exists())
+            self._path_cache[folder] = cached
+        return cached[0] if cached[2] else None
+
     def _load_or_create_model(self):
         """Lädt ein bestehendes Modell oder erstellt ein neues."""
-        if self.model_path.exists():
+        if self.model_path.exists() or self._legacy_model_path.exists():
             try:
                 self._load_model()
                 logger.info(f"Klassifikator geladen mit {len(self.training_entries)} Einträgen")
@@ -143,52 +343,317 @@ class PDFClassifier:
 
     def _create_new_model(self):
         """Erstellt ein neues Modell basierend auf der Datenbank."""
-        self.vectorizer = TfidfVectorizer(
-            max_features=5000,
-            ngram_range=(1, 2),  # Uni- und Bigrams
-            min_df=1,
-            stop_words=None,  # Deutsche Stopwords werden manuell behandelt
-        )
+        self.vectorizer = self._new_vectorizer()
+        self.tfidf_transformer = self._new_transformer()
 
         # Trainiere mit bestehenden Daten
         self._retrain()
 
+    @staticmethod
+    def _new_vectorizer() -> HashingVectorizer:
+        """
+        Erstellt den Vectorizer für die Termhäufigkeiten.
+
+        Der Hashing-Vectorizer braucht kein Vokabular und muss daher nie
+        trainiert werden; neue Texte lassen sich jederzeit transformieren.
+        """
+        return HashingVectorizer(
+            n_features=_HASH_FEATURES,
+            analyzer=german_analyzer,  # Uni- und Bigrams ohne Stopwords
+            alternate_sign=False,  # Reine Zählwerte für die IDF-Gewichtung
+            norm=None,  # Normiert wird erst nach der IDF-Gewichtung
+            dtype=np.float32,  # Reicht für das Ranking, halbiert den Speicher
+        )
+
+    @staticmethod
+    def _new_transformer() -> TfidfTransformer:
+        """Erstellt einen (untrainierten) Transformer für die IDF-Gewichtung."""
+        return TfidfTransformer(
+            sublinear_tf=True,
+            norm="l2",  # Voraussetzung für Ähnlichkeit per Skalarprodukt
+        )
+
+    def _transform(self, texts: list[str]):
+        """Wandelt vorverarbeitete Texte in L2-normierte TF-IDF-Zeilen um."""
+        return self._weight(self.vectorizer.transform(texts))
+
+    def _count_terms(self, texts: list[str]):
+        """
+        Zählt die Terme aller Trainingstexte.
+
+        Der Hashing-Vectorizer ist zustandslos, große Korpora werden daher
+        in Blöcken auf mehrere Prozesse verteilt (der Analyzer ist reiner
+        Python-Code und hält die GIL).
+        """
+        if len(texts) < _PARALLEL_COUNT_MIN:
+            return self.vectorizer.transform(texts)
+
+        chunk_size = -(-len(texts) // cpu_count())
+        parts = Parallel(n_jobs=-1)(
+            delayed(self.vectorizer.transform)(texts[i:i + chunk_size])
+            for i in range(0, len(texts), chunk_size)
+        )
+        return sp.vstack(parts, format="csr")
+
+    def _weight(self, counts):
+        """Gewichtet Termhäufigkeiten mit der IDF und normiert die Zeilen."""
+        matrix = self.tfidf_transformer.transform(counts)
+        # Verworfene Terme (IDF 0) nicht als explizite Nullen mitschleppen
+        matrix.eliminate_zeros()
+        return matrix
+
+    def _is_fitted(self) -> bool:
+        """Prüft, ob IDF-Gewichte vorliegen."""
+        return self.tfidf_transformer is not None and hasattr(
+            self.tfidf_transformer, "idf_"
+        )
+
     def _load_model(self):
         """Lädt das Modell von der Festplatte."""
-        with open(self.model_path, "rb") as f:
-            data = pickle.load(f)
-            self.vectorizer = data["vectorizer"]
-            self.tfidf_matrix = data["tfidf_matrix"]
-            self.training_entries = data["training_entries"]
+        if not self.model_path.exists():
+            self._load_legacy_model()
+            return
+
+        with open(self.model_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != _MODEL_VERSION:
+            raise ValueError(f"Veraltete Modellversion: {data.get('version')}")
+
+        # Transformer ohne fit() aus den IDF-Gewichten herstellen
+        self.vectorizer = self._new_vectorizer()
+        self.tfidf_transformer = self._new_transformer()
+        parts = data.get("parts", {})
+        idf = np.load(self._model_part_path("idf", parts.get("idf")))
+        if idf.shape != (_HASH_FEATURES,):
+            raise ValueError("IDF-Gewichte passen nicht zum Vectorizer")
+        self.tfidf_transformer.idf_ = idf
+        # Matrix-Arrays nur einblenden (mmap), nicht komplett einlesen;
+        # die Ähnlichkeitsberechnung greift ausschließlich lesend zu
+        self.tfidf_matrix = sp.csr_matrix(
+            tuple(
+                np.load(self._model_part_path(part, parts.get(part)), mmap_mode="r")
+                for part in _MATRIX_PARTS
+            ),
+            shape=tuple(data["matrix_shape"]),
+        )
+        self.training_entries = [
+            SortingHistory(**fields) for fields in data["training_entries"]
+        ]
+        if self.tfidf_matrix.shape[0] != len(self.training_entries):
+            raise ValueError("Modelldateien passen nicht zusammen")
+        self._adds_since_refit = data.get("adds_since_refit", 0)
+        self._generation = data.get("generation", 0)
+
+        if "entry_folder_ids" in data:
+            self._folder_names = data["folder_names"]
+            self._folder_learned_paths = data["folder_learned_paths"]
+            self._folder_id_by_name = {
+                name: i for i, name in enumerate(self._folder_names)
+            }
+            self._entry_folder_ids = np.asarray(data["entry_folder_ids"], dtype=np.int32)
+        else:
+            self._build_folder_ids()
+
+    def _load_legacy_model(self):
+        """
+        Ersetzt ein Modell im alten Pickle-Format durch ein neu trainiertes.
+
+        Alte Modelle nutzen float64 und den Standard-Analyzer; die Daten
+        stehen vollständig in der Datenbank, daher wird neu trainiert.
+        """
+        self._legacy_model_path.unlink()
+        logger.info("Altes Klassifikator-Modell (Pickle) wird neu trainiert")
+        self._create_new_model()
 
     def _save_model(self):
         """Speichert das Modell auf der Festplatte."""
+        with self._model_lock:
+            self._write_model_files()
+            self._dirty = False
+
+    def _write_model_files(self):
+        """
+        Schreibt IDF-Gewichte, Matrix und Manifest.
+
+        Die Arrays gehen bei jedem Speichern in neue, durchnummerierte
+        Dateien: die geladene Matrix blendet die bisherigen per mmap ein,
+        und Windows verweigert das Überschreiben eingeblendeter Dateien.
+        Alte Dateien werden nach dem Manifest gelöscht, soweit möglich.
+        """
+        generation = self._generation + 1
+        parts = {
+            part: f"{self.model_path.stem}.{part}.{generation}.npy"
+            for part in ("idf", *_MATRIX_PARTS)
+        }
+        np.save(self._model_part_path("idf", parts["idf"]), self.tfidf_transformer.idf_)
+
+        matrix = self.tfidf_matrix.tocsr()
+        for part in _MATRIX_PARTS:
+            np.save(self._model_part_path(part, parts[part]), getattr(matrix, part))
+
+        # Dateien älterer Modellversionen aufräumen
+        for suffix in (".npz", ".joblib"):
+            self.model_path.with_suffix(suffix).unlink(missing_ok=True)
+
+        # Manifest zuletzt (und atomar) schreiben, damit nur vollständige
+        # Modelle geladen werden
         data = {
-            "vectorizer": self.vectorizer,
-            "tfidf_matrix": self.tfidf_matrix,
-            "training_entries": self.training_entries,
+            "version": _MODEL_VERSION,
+            "generation": generation,
+            "parts": parts,
+            "matrix_shape": list(matrix.shape),
+            "adds_since_refit": self._adds_since_refit,
+            "training_entries": [
+                {field: getattr(e, field) for field in _ENTRY_FIELDS}
+                for e in self.training_entries
+            ],
+            "folder_names": self._folder_names,
+            "folder_learned_paths": self._folder_learned_paths,
+            "entry_folder_ids": self._entry_folder_ids.tolist(),
         }
-        with open(self.model_path, "wb") as f:
-            pickle.dump(data, f)
+        temp_path = self.model_path.with_suffix(".json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.model_path)
+        self._generation = generation
+
+        # Vorherige Dateien löschen; noch eingeblendete (Windows) beim
+        # nächsten Speichern erneut versuchen
+        current = set(parts.values())
+        for path in self.model_path.parent.glob(f"{self.model_path.stem}.*.npy"):
+            if path.name not in current:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _model_part_path(self, part: str, filename: Optional[str] = None) -> Path:
+        """
+        Pfad der .npy-Datei für ein Array des Modells (IDF, CSR-Matrix).
+
+        Args:
+            part: Name des Arrays
+            filename: Dateiname laut Manifest (None = Name ohne Nummer aus
+                Modellen vor den durchnummerierten Dateien)
+        """
+        return self.model_path.with_name(filename or f"{self.model_path.stem}.{part}.npy")
 
     def _retrain(self):
         """Trainiert das Modell mit allen Daten aus der Datenbank."""
-        entries = self.db.get_entries_with_text()
+        with self._model_lock:
+            self._retrain_locked()
+
+    def _retrain_locked(self):
+        """Trainiert neu; Aufrufer hält _model_lock."""
+        self._adds_since_refit = 0
+
+        # Blockweise lesen und sofort zählen: die (großen) Rohtexte eines
+        # Blocks werden danach nicht mehr gebraucht. Gleiche Texte (gleicher
+        # Inhalts-Hash) werden nur einmal vorverarbeitet und gezählt; jeder
+        # Eintrag behält trotzdem seine eigene Zeile.
+        entries: list[SortingHistory] = []
+        count_blocks = []
+        row_by_hash: dict[str, int] = {}
+        entry_rows: list[int] = []
+        unique_count = 0
+        for batch in self.db.iter_entries_with_text(_RETRAIN_BATCH_SIZE):
+            new_entries = []
+            for entry in batch:
+                row = row_by_hash.get(entry.text_hash) if entry.text_hash else None
+                if row is None:
+                    row = unique_count
+                    unique_count += 1
+                    new_entries.append(entry)
+                    if entry.text_hash:
+                        row_by_hash[entry.text_hash] = row
+                entry_rows.append(row)
+            if new_entries:
+                count_blocks.append(self._count_terms(self._batch_texts(new_entries)))
+            entries.extend(self._slim_entry(e) for e in batch)
+
+        self.training_entries = entries
+        self._build_folder_ids()
+        self._csc = self._csc_source = None
 
         if not entries:
-            self.training_entries = []
             self.tfidf_matrix = None
             return
 
-        self.training_entries = entries
-        texts = [self._preprocess_text(e.extracted_text) for e in entries]
-
-        if texts and any(texts):
-            self.tfidf_matrix = self.vectorizer.fit_transform(texts)
+        counts = sp.vstack(count_blocks, format="csr")
+        if unique_count < len(entries):
+            counts = counts[np.asarray(entry_rows)]
+        if counts.nnz:
+            self.tfidf_matrix = self._fit_tfidf(counts)
             self._save_model()
         else:
             self.tfidf_matrix = None
 
+    def _batch_texts(self, batch: list[SortingHistory]) -> list[str]:
+        """Vorverarbeitete Texte eines Blocks; fehlende werden nachgetragen."""
+        texts = [e.preprocessed_text for e in batch]
+        missing = [i for i, text in enumerate(texts) if text is None]
+        if missing:
+            raw_texts = [batch[i].extracted_text for i in missing]
+            if len(missing) > _PARALLEL_PREPROCESS_MIN:
+                # Wie beim Zählen in Blöcken auf Prozesse verteilen (re und
+                # die Stopword-Filterung halten die GIL)
+                chunk_size = -(-len(raw_texts) // cpu_count())
+                processed = [
+                    text
+                    for part in Parallel(n_jobs=-1)(
+                        delayed(_preprocess_texts)(raw_texts[i:i + chunk_size])
+                        for i in range(0, len(raw_texts), chunk_size)
+                    )
+                    for text in part
+                ]
+            else:
+                processed = _preprocess_texts(raw_texts)
+            for i, text in zip(missing, processed):
+                texts[i] = text
+            self.db.update_preprocessed_texts({
+                batch[i].id: text for i, text in zip(missing, processed)
+            })
+        return texts
+
+    @staticmethod
+    def _slim_entry(entry: SortingHistory) -> SortingHistory:
+        """Kopie eines Eintrags ohne Texte (nur die gespeicherten Felder)."""
+        return SortingHistory(**{field: getattr(entry, field) for field in _ENTRY_FIELDS})
+
+    def _fit_tfidf(self, counts):
+        """
+        Lernt die IDF-Gewichte aus den Termhäufigkeiten (siehe _count_terms)
+        neu und gibt die TF-IDF-Matrix zurück.
+
+        Terme, die in keinem Trainingstext vorkommen, erhalten das Gewicht 0
+        (wie Terme außerhalb eines Vokabulars). Ebenso seltene (nur einmal
+        vorkommende) und fast überall vorkommende Terme - außer bei sehr
+        wenigen Trainingsdaten.
+        """
+        # Die Ähnlichkeit per Skalarprodukt setzt L2-normierte Zeilen voraus
+        if self.tfidf_transformer.norm != "l2":
+            logger.warning(
+                f"TF-IDF-Norm {self.tfidf_transformer.norm!r} ersetzt durch 'l2'"
+            )
+            self.tfidf_transformer.set_params(norm="l2")
+
+        self.tfidf_transformer.fit(counts)
+
+        n_docs = counts.shape[0]
+        doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+        unseen = doc_freq == 0
+        pruned = unseen
+        if n_docs >= _MIN_DOCS_FOR_PRUNING:
+            pruned = unseen | (doc_freq < 2) | (doc_freq > 0.95 * n_docs)
+            # Nur beschneiden, wenn danach noch Terme übrig bleiben
+            if pruned.all():
+                pruned = unseen
+        idf = self.tfidf_transformer.idf_.copy()
+        idf[pruned] = 0
+        self.tfidf_transformer.idf_ = idf
+
+        return self._weight(counts)
+
     def _preprocess_text(self, text: str) -> str:
         """
         Bereitet Text für die Vektorisierung vor.
@@ -201,25 +666,7 @@ class PDFClassifier:
         """
         if not text:
             return ""
-
-        # Kleinschreibung
-        text = text.lower()
-
-        # Deutsche Stopwords entfernen (einfache Liste)
-        stopwords = {
-            "der", "die", "das", "und", "in", "zu", "den", "von", "ist", "mit",
-            "sich", "des", "auf", "für", "nicht", "ein", "eine", "als", "auch",
-            "es", "an", "werden", "aus", "er", "hat", "dass", "sie", "nach",
-            "wird", "bei", "einer", "um", "am", "sind", "noch", "wie", "einem",
-            "über", "so", "zum", "kann", "nur", "ihr", "seine", "ich", "oder",
-            "aber", "vor", "zur", "bis", "mehr", "durch", "man", "sehr", "diese",
-            "wenn", "war", "haben", "wurde", "alle", "können", "diesem", "dieser",
-        }
-
-        words = text.split()
-        words = [w for w in words if w not in stopwords and len(w) > 2]
-
-        return " ".join(words)
+        return _preprocess_text_cached(text)
 
     def learn(
         self,
@@ -243,8 +690,12 @@ class PDFClassifier:
             new_filename: Neuer Dateiname
             relative_path: Relativer Pfad (z.B. "Steuer 2026/Banken")
         """
-        # In Datenbank speichern
-        self.db.add_sorting_entry(
+        processed_text = self._preprocess_text(extracted_text)
+        # Der Zielordner kann gerade erst angelegt worden sein
+        self._path_cache.pop(str(target_folder), None)
+
+        # In Datenbank speichern (der Eintrag bleibt nach dem Commit lesbar)
+        entry = self.db.add_sorting_entry(
             original_filename=pdf_path.name,
             original_path=str(pdf_path),
             target_folder=str(target_folder),
@@ -255,16 +706,100 @@ class PDFClassifier:
             new_filename=new_filename,
             confidence=1.0,
             target_relative_path=relative_path,
+            preprocessed_text=processed_text,
         )
 
-        # Modell neu trainieren
-        self._retrain()
+        if not extracted_text:
+            return
+
+        # Neues Dokument anhängen, nur periodisch komplett neu trainieren
+        with self._model_lock:
+            if not self._incremental_add(entry) or self._needs_refit():
+                self._retrain()
+            else:
+                self._schedule_save()
+
+    def _schedule_save(self):
+        """Speichert das Modell verzögert (mehrere Änderungen, ein Schreibvorgang)."""
+        with self._model_lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(_SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Speichert ausstehende Modelländerungen sofort."""
+        with self._model_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty and self.tfidf_matrix is not None:
+                try:
+                    self._save_model()
+                except Exception as e:
+                    logger.error(f"Fehler beim Speichern des Modells: {e}")
+
+    def _needs_refit(self) -> bool:
+        """Prüft, ob seit dem letzten Training genug Dokumente dazukamen."""
+        threshold = max(
+            _MIN_ADDS_BEFORE_REFIT, int(_REFIT_FRACTION * len(self.training_entries))
+        )
+        return self._adds_since_refit >= threshold
+
+    def _incremental_add(self, entry: SortingHistory) -> bool:
+        """
+        Hängt einen Eintrag an das bestehende Modell an, ohne neu zu trainieren.
+
+        Die IDF-Gewichte bleiben unverändert, es wird nur der
+        neue Text transformiert.
+
+        Returns:
+            False, wenn noch kein trainiertes Modell existiert
+        """
+        if self.tfidf_matrix is None or not self._is_fitted():
+            return False
+
+        text = entry.preprocessed_text
+        if text is None:
+            text = self._preprocess_text(entry.extracted_text)
+        vector = self._transform([text])
+        self.tfidf_matrix = sp.vstack([self.tfidf_matrix, vector], format="csr")
+        # Alten Index freigeben (hält sonst die eingeblendete Matrix fest)
+        self._csc = self._csc_source = None
+        self.training_entries.append(self._slim_entry(entry))
+        self._adds_since_refit += 1
+        self._entry_folder_ids = np.append(
+            self._entry_folder_ids, np.int32(self._get_folder_id(entry))
+        )
+        return True
+
+    def _build_folder_ids(self):
+        """Ordnet jedem Trainingseintrag eine stabile Ordner-ID zu."""
+        self._folder_id_by_name = {}
+        self._folder_names = []
+        self._folder_learned_paths = []
+        self._entry_folder_ids = np.empty(len(self.training_entries), dtype=np.int32)
+        for i, entry in enumerate(self.training_entries):
+            self._entry_folder_ids[i] = self._get_folder_id(entry)
+
+    def _get_folder_id(self, entry: SortingHistory) -> int:
+        """Gibt die Ordner-ID eines Eintrags zurück (legt sie bei Bedarf an)."""
+        folder_id = self._folder_id_by_name.get(entry.target_folder_name)
+        if folder_id is None:
+            folder_id = len(self._folder_names)
+            self._folder_id_by_name[entry.target_folder_name] = folder_id
+            self._folder_names.append(entry.target_folder_name)
+            self._folder_learned_paths.append(entry.target_folder)
+        return folder_id
 
     def suggest(
         self,
         text: str,
         keywords: list[str] = None,
         max_suggestions: int = 5,
+        query_vector=None,
     ) -> list[Suggestion]:
         """
         Schlägt Zielordner für eine PDF vor.
@@ -273,6 +808,7 @@ class PDFClassifier:
             text: Extrahierter Text aus der PDF
             keywords: Erkannte Schlüsselwörter
             max_suggestions: Maximale Anzahl Vorschläge
+            query_vector: Bereits vektorisierter Text (siehe _vectorize_query)
 
         Returns:
             Liste von Sortiervorschlägen, sortiert nach Konfidenz
@@ -280,10 +816,63 @@ class PDFClassifier:
         suggestions = []
 
         # 1. Textbasierte Ähnlichkeit (wenn Trainingsdaten vorhanden)
-        if self.tfidf_matrix is not None and text:
-            text_suggestions = self._suggest_by_text_similarity(text, max_suggestions)
+        if query_vector is None and text:
+            query_vector = self._vectorize_query(text)
+        if query_vector is not None:
+            text_suggestions = self._suggest_by_text_similarity(query_vector, max_suggestions)
             suggestions.extend(text_suggestions)
 
+        return self._complete_suggestions(suggestions, keywords, max_suggestions)
+
+    def suggest_batch(
+        self,
+        texts: list[str],
+        max_suggestions: int = 5,
+        keywords: list[Optional[list[str]]] = None,
+    ) -> list[list[Suggestion]]:
+        """
+        Schlägt Zielordner für mehrere PDFs auf einmal vor.
+
+        Alle Texte werden gemeinsam vektorisiert und mit einer einzigen
+        Matrixmultiplikation mit den Trainingsdaten verglichen.
+
+        Args:
+            texts: Extrahierte Texte der PDFs
+            max_suggestions: Maximale Anzahl Vorschläge pro PDF
+            keywords: Schlüsselwörter je Text (optional)
+
+        Returns:
+            Pro Text eine Liste von Sortiervorschlägen (wie bei suggest)
+        """
+        if keywords is None:
+            keywords = [None] * len(texts)
+
+        if self.tfidf_matrix is None or not self.training_entries:
+            return [
+                self.suggest(text, text_keywords, max_suggestions)
+                for text, text_keywords in zip(texts, keywords)
+            ]
+
+        query_matrix = self._transform([text or "" for text in texts])
+        # Sparse multiplizieren: dicht wären es 2^18 Spalten pro Anfrage
+        similarities = (self.tfidf_matrix @ query_matrix.T).toarray().T
+
+        return [
+            self._complete_suggestions(
+                self._suggestions_from_similarities(row, max_suggestions),
+                text_keywords,
+                max_suggestions,
+            )
+            for row, text_keywords in zip(similarities, keywords)
+        ]
+
+    def _complete_suggestions(
+        self,
+        suggestions: list[Suggestion],
+        keywords: Optional[list[str]],
+        max_suggestions: int,
+    ) -> list[Suggestion]:
+        """Ergänzt Textvorschläge um Schlüsselwort- und Häufigkeitsvorschläge."""
         # 2. Schlüsselwort-basierte Vorschläge
         if keywords:
             keyword_suggestions = self._suggest_by_keywords(keywords, max_suggestions)
@@ -306,44 +895,93 @@ class PDFClassifier:
 
         return suggestions[:max_suggestions]
 
-    def _suggest_by_text_similarity(
-        self, text: str, max_suggestions: int
-    ) -> list[Suggestion]:
-        """Schlägt Ordner basierend auf Textähnlichkeit vor."""
+    def _vectorize_query(self, text: str):
+        """
+        Vektorisiert einen Anfragetext mit dem trainierten Vectorizer.
+
+        Returns:
+            Sparse-Zeilenvektor oder None (kein Modell / kein verwertbarer Text)
+        """
         if self.tfidf_matrix is None or not self.training_entries:
-            return []
+            return None
 
-        # Text vektorisieren
-        processed_text = self._preprocess_text(text)
-        if not processed_text:
-            return []
+        if not text or text.isspace():
+            return None
 
+        # Der Analyzer des Vectorizers filtert Stopwords selbst
         try:
-            query_vector = self.vectorizer.transform([processed_text])
+            return self._transform([text])
         except Exception:
+            return None
+
+    def _suggest_by_text_similarity(
+        self, query_vector, max_suggestions: int
+    ) -> list[Suggestion]:
+        """Schlägt Ordner basierend auf Textähnlichkeit vor."""
+        if self.tfidf_matrix is None or not self.training_entries:
             return []
 
-        # Ähnlichkeiten berechnen
-        similarities = cosine_similarity(query_vector, self.tfidf_matrix)[0]
+        # Ähnlichkeiten berechnen - die TF-IDF-Vektoren sind bereits
+        # L2-normiert, das Skalarprodukt ist also die Kosinus-Ähnlichkeit
+        similarities = self._compute_similarities(query_vector)
+        return self._suggestions_from_similarities(similarities, max_suggestions)
+
+    def _compute_similarities(self, query_vector) -> np.ndarray:
+        """
+        Berechnet die Kosinus-Ähnlichkeit der Anfrage zu allen Trainingseinträgen.
 
+        Kurze Anfragen laufen über einen invertierten Index (Term -> Einträge)
+        und berühren nur Einträge mit gemeinsamen Termen.
+        """
+        if query_vector.nnz > _INVERTED_INDEX_MAX_TERMS:
+            # Anfrage einmal verdichten: CSR-Matrix mal dichter Vektor läuft als
+            # einfache Schleife (csr_matvec) statt als Sparse-Sparse-Produkt
+            return self.tfidf_matrix @ query_vector.toarray().ravel()
+
+        # Invertierten Index (CSC) nur neu bauen, wenn sich die Matrix geändert hat
+        if self._csc_source is not self.tfidf_matrix:
+            self._csc = self.tfidf_matrix.tocsc()
+            self._csc_source = self.tfidf_matrix
+
+        csc = self._csc
+        similarities = np.zeros(csc.shape[0], dtype=csc.dtype)
+        for term, weight in zip(query_vector.indices, query_vector.data):
+            start, end = csc.indptr[term], csc.indptr[term + 1]
+            # Zeilenindizes sind je Spalte eindeutig, einfaches += genügt
+            similarities[csc.indices[start:end]] += csc.data[start:end] * weight
+        return similarities
+
+    def _suggestions_from_similarities(
+        self, similarities: np.ndarray, max_suggestions: int
+    ) -> list[Suggestion]:
+        """Fasst die Ähnlichkeiten je Trainingseintrag zu Ordnervorschlägen zusammen."""
         # Beste Übereinstimmungen finden - gruppiert nach Ordnernamen
         # (nicht nach absolutem Pfad, damit Wechsel des Zielordners funktioniert)
-        folder_scores: dict[str, tuple[str, list[float]]] = {}  # name -> (learned_path, scores)
-        for idx, similarity in enumerate(similarities):
-            if similarity > 0.1:  # Mindest-Ähnlichkeit
-                entry = self.training_entries[idx]
-                folder_name = entry.target_folder_name
-                if folder_name not in folder_scores:
-                    folder_scores[folder_name] = (entry.target_folder, [])
-                folder_scores[folder_name][1].append(similarity)
-
-        # Durchschnittliche Ähnlichkeit pro Ordner
+        mask = similarities > 0.1  # Mindest-Ähnlichkeit
+        if not mask.any():
+            return []
+        ids = self._entry_folder_ids[mask]
+        scores = similarities[mask]
+
+        # Summe/Anzahl/Max je Ordner-ID ohne Sortieren
+        n_folders = len(self._folder_names)
+        sums = np.bincount(ids, weights=scores, minlength=n_folders)
+        counts = np.bincount(ids, minlength=n_folders)
+        max_scores = np.zeros(n_folders)
+        np.maximum.at(max_scores, ids, scores)
+
+        group_ids = np.flatnonzero(counts)
+        # Gewichteter Score: 70% max, 30% avg
+        combined_scores = (
+            0.7 * max_scores[group_ids] + 0.3 * sums[group_ids] / counts[group_ids]
+        )
+
         suggestions = []
-        for folder_name, (learned_path, scores) in folder_scores.items():
-            avg_score = np.mean(scores)
-            max_score = max(scores)
-            # Gewichteter Score: 70% max, 30% avg
-            combined_score = 0.7 * max_score + 0.3 * avg_score
+        for i in _iter_by_score(combined_scores, max_suggestions):
+            folder_id = group_ids[i]
+            combined_score = float(combined_scores[i])
+            folder_name = self._folder_names[folder_id]
+            learned_path = self._folder_learned_paths[folder_id]
 
             # Ordner im aktuellen Zielordner finden (oder Original wenn noch da)
             folder_path = self._resolve_folder_path(learned_path, folder_name)
@@ -354,9 +992,10 @@ class PDFClassifier:
                     confidence=min(combined_score, 0.95),  # Max 95%
                     reason=f"Ähnlicher Inhalt ({int(combined_score * 100)}%)",
                 ))
+                if len(suggestions) >= max_suggestions:
+                    break
 
-        suggestions.sort(key=lambda s: s.confidence, reverse=True)
-        return suggestions[:max_suggestions]
+        return suggestions
 
     def _suggest_by_keywords(
         self, keywords: list[str], max_suggestions: int
@@ -368,22 +1007,18 @@ class PDFClassifier:
             return []
 
         # Ordner nach Häufigkeit mit passenden Keywords - gruppiert nach Namen
-        folder_counts: dict[str, tuple[str, int]] = {}  # name -> (learned_path, count)
+        folder_counts = Counter(entry.target_folder_name for entry in entries)
+        learned_paths: dict[str, str] = {}  # name -> zuerst gesehener Pfad
         for entry in entries:
-            folder_name = entry.target_folder_name
-            if folder_name not in folder_counts:
-                folder_counts[folder_name] = (entry.target_folder, 0)
-            folder_counts[folder_name] = (
-                folder_counts[folder_name][0],
-                folder_counts[folder_name][1] + 1
-            )
+            learned_paths.setdefault(entry.target_folder_name, entry.target_folder)
 
         suggestions = []
-        total = sum(count for _, count in folder_counts.values())
+        total = len(entries)
 
-        for folder_name, (learned_path, count) in folder_counts.items():
+        # most_common liefert bereits absteigend sortiert
+        for folder_name, count in folder_counts.most_common():
             # Ordner im aktuellen Zielordner finden
-            folder_path = self._resolve_folder_path(learned_path, folder_name)
+            folder_path = self._resolve_folder_path(learned_paths[folder_name], folder_name)
             if folder_path:
                 confidence = min(count / total * 0.8, 0.8)  # Max 80%
                 suggestions.append(Suggestion(
@@ -392,9 +1027,10 @@ class PDFClassifier:
                     confidence=confidence,
                     reason=f"Ähnliche Schlüsselwörter",
                 ))
+                if len(suggestions) >= max_suggestions:
+                    break
 
-        suggestions.sort(key=lambda s: s.confidence, reverse=True)
-        return suggestions[:max_suggestions]
+        return suggestions
 
     def _suggest_by_frequency(self, max_suggestions: int) -> list[Suggestion]:
         """Schlägt häufig verwendete Ordner vor."""
@@ -446,7 +1082,10 @@ class PDFClassifier:
             Liste von Sortiervorschlägen mit relativen Pfaden
         """
         # Basis-Vorschläge holen
-        base_suggestions = self.suggest(text, keywords, max_suggestions * 2)
+        query_vector = self._vectorize_query(text) if text else None
+        base_suggestions = self.suggest(
+            text, keywords, max_suggestions * 2, query_vector=query_vector
+        )
 
         # Aktuelles Jahr für Muster-Erkennung
         current_year = datetime.now().year
@@ -507,10 +1146,13 @@ class PDFClassifier:
         if not date_str:
             return None
 
-        # Verschiedene Formate unterstützen
-        year_match = re.search(r'20\d{2}', date_str)
-        if year_match:
-            return int(year_match.group())
+        # Erstes "20" gefolgt von zwei Ziffern (unabhängig vom Datumsformat)
+        i = date_str.find("20")
+        while 0 <= i <= len(date_str) - 4:
+            digits = date_str[i + 2:i + 4]
+            if digits.isascii() and digits.isdigit():
+                return int(date_str[i:i + 4])
+            i = date_str.find("20", i + 1)
         return None
 
     def _update_year_pattern(
@@ -604,11 +1246,51 @@ class PDFClassifier:
 
 # Globale Klassifikator-Instanz
 _classifier_instance: Optional[PDFClassifier] = None
+_classifier_lock = threading.Lock()
 
 
 def get_classifier() -> PDFClassifier:
-    """Gibt die globale Klassifikator-Instanz zurück."""
+    """
+    Gibt die globale Klassifikator-Instanz zurück.
+
+    Läuft gerade das Vorladen (preload_classifier), wird darauf gewartet.
+    """
     global _classifier_instance
     if _classifier_instance is None:
-        _classifier_instance = PDFClassifier()
+        with _classifier_lock:
+            if _classifier_instance is None:
+                _classifier_instance = PDFClassifier()
     return _classifier_instance
+
+
+def get_loaded_classifier() -> Optional[PDFClassifier]:
+    """
+    Gibt die Klassifikator-Instanz zurück, falls sie schon geladen ist.
+
+    Wartet nicht auf das Vorladen und erstellt nichts (für die GUI).
+    """
+    return _classifier_instance
+
+
+def preload_classifier():
+    """
+    Lädt den Klassifikator in einem Hintergrund-Thread vor.
+
+    Modell laden bzw. neu trainieren blockiert so nicht den Programmstart;
+    get_classifier() wartet nur, falls das Modell noch nicht fertig ist.
+    """
+    # Config und Datenbank im aufrufenden Thread anlegen (keine doppelten Singletons)
+    get_config()
+    get_database()
+    threading.Thread(
+        target=_preload_classifier, name="ClassifierPreload", daemon=True
+    ).start()
+
+
+def _preload_classifier():
+    """Thread-Funktion für preload_classifier()."""
+    try:
+        get_classifier()
+    except Exception as e:
+        # get_classifier() versucht es beim ersten Zugriff erneut
+        logger.error(f"Klassifikator konnte nicht vorgeladen werden: {e}")
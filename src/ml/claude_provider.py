@@ -6,6 +6,7 @@ Implementiert die LLM-Schnittstelle für Anthropic's Claude API.
 MIT License - Copyright (c) 2026
 """
 
+import asyncio
 from typing import Optional
 
 from src.ml.llm_provider import LLMProvider, LLMConfig, LLMResponse
@@ -30,6 +31,8 @@ class ClaudeProvider(LLMProvider):
 
     DEFAULT_MODEL = "haiku-4.5"  # Günstigstes aktuelles Modell
 
+    SUPPORTS_BATCH_PROMPT = True
+
     def __init__(self, config: LLMConfig):
         """
         Initialisiert den Claude Provider.
@@ -39,6 +42,8 @@ class ClaudeProvider(LLMProvider):
         """
         super().__init__(config)
         self._anthropic = None
+        # Modell-ID einmal auflösen statt bei jeder Anfrage
+        self._model_id = self._get_model_id()
         self._initialize_client()
 
     def _initialize_client(self):
@@ -49,7 +54,9 @@ class ClaudeProvider(LLMProvider):
         try:
             import anthropic
             self._anthropic = anthropic
-            self._client = anthropic.Anthropic(api_key=self.config.api_key)
+            self._client = anthropic.Anthropic(
+                api_key=self.config.api_key, max_retries=self.config.max_retries
+            )
         except ImportError:
             print("Warnung: anthropic Paket nicht installiert. "
                   "Installieren mit: pip install anthropic")
@@ -91,74 +98,197 @@ class ClaudeProvider(LLMProvider):
         Returns:
             LLMResponse mit Ordnervorschlag
         """
-        if not self.is_available():
-            return LLMResponse(
-                success=False,
-                error_message="Claude API nicht verfügbar. API-Key prüfen."
-            )
-
-        if not available_folders:
-            return LLMResponse(
-                success=False,
-                error_message="Keine Zielordner verfügbar."
-            )
+        error = self._check_classification_input(available_folders)
+        if error:
+            return error
 
         prompt = self._build_classification_prompt(
             text, available_folders, keywords, detected_date
         )
 
         try:
-            message = self._client.messages.create(
-                model=self._get_model_id(),
-                max_tokens=self.config.max_tokens,
+            # Gestreamt, damit nach den benötigten Feldern abgebrochen werden
+            # kann; das Verlassen des with-Blocks schließt die Verbindung
+            with self._client.messages.stream(
+                model=self._model_id,
+                max_tokens=self._classification_max_tokens(),
                 temperature=self.config.temperature,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+                messages=self._prompt_messages(prompt)
+            ) as stream:
+                response_text = self._read_until_classified(stream.text_stream)
+                usage = stream.current_message_snapshot.usage
+            return self._classification_response(
+                response_text, usage.input_tokens + usage.output_tokens, available_folders
             )
+        except Exception as e:
+            return self._classification_error(e)
 
-            response_text = message.content[0].text
-            parsed = self._parse_response(response_text)
+    async def classify_document_async(
+        self,
+        text: str,
+        available_folders: list[str],
+        keywords: list[str] = None,
+        detected_date: str = None,
+    ) -> LLMResponse:
+        """
+        Asynchrone Variante von classify_document (eigene Verbindung).
 
-            # Prüfen ob der vorgeschlagene Ordner existiert
-            suggested_folder = parsed.get("folder")
-            if suggested_folder and suggested_folder not in available_folders:
-                # Versuche ähnlichen Ordner zu finden
-                suggested_folder = self._find_similar_folder(
-                    suggested_folder, available_folders
-                )
+        Für mehrere Dokumente ist classify_batch effizienter, da sich
+        dort alle Anfragen eine Verbindung teilen.
+        """
+        responses = await self.classify_batch([{
+            "text": text,
+            "available_folders": available_folders,
+            "keywords": keywords,
+            "detected_date": detected_date,
+        }])
+        return responses[0]
+
+    async def classify_batch(
+        self, documents: list[dict], concurrency: int = 8
+    ) -> list[LLMResponse]:
+        """
+        Klassifiziert mehrere Dokumente mit parallelen API-Anfragen.
 
-            tokens_used = message.usage.input_tokens + message.usage.output_tokens
+        Args:
+            documents: Je Dokument ein Dict mit den Argumenten von
+                classify_document (text, available_folders, keywords, detected_date)
+            concurrency: Maximale Anzahl gleichzeitiger Anfragen
 
-            return LLMResponse(
-                success=True,
-                folder_suggestion=suggested_folder,
-                folder_reason=parsed.get("reason"),
-                confidence=parsed.get("confidence", 0.5),
-                tokens_used=tokens_used,
-            )
+        Returns:
+            Je Dokument eine LLMResponse (gleiche Reihenfolge)
+        """
+        if not self.is_available():
+            return [self._check_classification_input(d["available_folders"])
+                    for d in documents]
 
-        except self._anthropic.APIConnectionError:
-            return LLMResponse(
-                success=False,
-                error_message="Keine Verbindung zur Claude API."
+        semaphore = asyncio.Semaphore(concurrency)
+
+        # Ein Client je Batch: Verbindungen werden zwischen den Anfragen
+        # wiederverwendet und am Ende sauber geschlossen
+        async with self._anthropic.AsyncAnthropic(api_key=self.config.api_key) as client:
+            async def classify_one(document: dict) -> LLMResponse:
+                async with semaphore:
+                    return await self._classify_with_async_client(client, **document)
+
+            return list(await asyncio.gather(
+                *(classify_one(document) for document in documents)
+            ))
+
+    async def _classify_with_async_client(
+        self,
+        client,
+        text: str,
+        available_folders: list[str],
+        keywords: list[str] = None,
+        detected_date: str = None,
+    ) -> LLMResponse:
+        """Klassifiziert ein Dokument über den asynchronen Client."""
+        error = self._check_classification_input(available_folders)
+        if error:
+            return error
+
+        prompt = self._build_classification_prompt(
+            text, available_folders, keywords, detected_date
+        )
+
+        try:
+            message = await client.messages.create(
+                model=self._model_id,
+                max_tokens=self._classification_max_tokens(),
+                temperature=self.config.temperature,
+                messages=self._prompt_messages(prompt)
             )
-        except self._anthropic.RateLimitError:
-            return LLMResponse(
-                success=False,
-                error_message="Claude API Rate-Limit erreicht. Bitte später versuchen."
+            return self._classification_response(
+                message.content[0].text,
+                message.usage.input_tokens + message.usage.output_tokens,
+                available_folders,
             )
-        except self._anthropic.AuthenticationError:
+        except Exception as e:
+            return self._classification_error(e)
+
+    def _complete(self, prompt: str, max_tokens: int) -> tuple[str, int]:
+        """Sendet einen einzelnen Prompt an Claude (für Sammelanfragen)."""
+        message = self._client.messages.create(
+            model=self._model_id,
+            max_tokens=max_tokens,
+            temperature=self.config.temperature,
+            messages=self._prompt_messages(prompt)
+        )
+        tokens_used = message.usage.input_tokens + message.usage.output_tokens
+        return message.content[0].text, tokens_used
+
+    def _prompt_messages(self, prompt: str) -> list[dict]:
+        """
+        Baut die Nachrichten für einen Prompt.
+
+        Der gleichbleibende Anfang (Anweisung, Ordnerliste, Antwortformat)
+        wird als eigener Block für Claudes Prompt-Caching markiert, damit er
+        bei vielen Dokumenten nicht jedes Mal neu verarbeitet wird.
+        """
+        prefix, rest = self._split_prompt_prefix(prompt)
+        if not prefix:
+            return [{"role": "user", "content": prompt}]
+        return [{
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": rest},
+            ],
+        }]
+
+    def _check_classification_input(
+        self, available_folders: list[str]
+    ) -> Optional[LLMResponse]:
+        """Gibt eine Fehlerantwort zurück, falls nicht klassifiziert werden kann."""
+        if not self.is_available():
             return LLMResponse(
                 success=False,
-                error_message="Ungültiger Claude API-Key."
+                error_message="Claude API nicht verfügbar. API-Key prüfen."
             )
-        except Exception as e:
+
+        if not available_folders:
             return LLMResponse(
                 success=False,
-                error_message=f"Claude API Fehler: {str(e)}"
+                error_message="Keine Zielordner verfügbar."
             )
 
+        return None
+
+    def _classification_response(
+        self, response_text: str, tokens_used: int, available_folders: list[str]
+    ) -> LLMResponse:
+        """Wertet die Claude-Antwort einer Klassifikation aus."""
+        parsed = self._parse_response(response_text)
+
+        # Prüfen ob der vorgeschlagene Ordner existiert
+        suggested_folder = parsed.get("folder")
+        if suggested_folder and suggested_folder not in available_folders:
+            # Versuche ähnlichen Ordner zu finden
+            suggested_folder = self._find_similar_folder(
+                suggested_folder, available_folders
+            )
+
+        return LLMResponse(
+            success=True,
+            folder_suggestion=suggested_folder,
+            folder_reason=parsed.get("reason"),
+            confidence=parsed.get("confidence", 0.5),
+            tokens_used=tokens_used,
+        )
+
+    def _classification_error(self, error: Exception) -> LLMResponse:
+        """Übersetzt einen API-Fehler in eine verständliche Fehlerantwort."""
+        if isinstance(error, self._anthropic.APIConnectionError):
+            message = "Keine Verbindung zur Claude API."
+        elif isinstance(error, self._anthropic.RateLimitError):
+            message = "Claude API Rate-Limit erreicht. Bitte später versuchen."
+        elif isinstance(error, self._anthropic.AuthenticationError):
+            message = "Ungültiger Claude API-Key."
+        else:
+            message = f"Claude API Fehler: {str(error)}"
+        return LLMResponse(success=False, error_message=message)
+
     def suggest_filename(
         self,
         text: str,
@@ -194,12 +324,10 @@ class ClaudeProvider(LLMProvider):
 
         try:
             message = self._client.messages.create(
-                model=self._get_model_id(),
-                max_tokens=self.config.max_tokens,
+                model=self._model_id,
+                max_tokens=self._filename_max_tokens(),
                 temperature=self.config.temperature,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+                messages=self._prompt_messages(prompt)
             )
 
             response_text = message.content[0].text
@@ -226,67 +354,3 @@ class ClaudeProvider(LLMProvider):
                 success=False,
                 error_message=f"Claude API Fehler: {str(e)}"
             )
-
-    def _find_similar_folder(
-        self, suggested: str, available: list[str]
-    ) -> Optional[str]:
-        """
-        Findet einen ähnlichen Ordner aus der Liste.
-
-        Args:
-            suggested: Vorgeschlagener Ordnername
-            available: Verfügbare Ordner
-
-        Returns:
-            Ähnlicher Ordnername oder None
-        """
-        suggested_lower = suggested.lower()
-
-        # Exakte Übereinstimmung (case-insensitive)
-        for folder in available:
-            if folder.lower() == suggested_lower:
-                return folder
-
-        # Teilübereinstimmung
-        for folder in available:
-            if suggested_lower in folder.lower() or folder.lower() in suggested_lower:
-                return folder
-
-        return None
-
-    def _sanitize_filename(self, filename: str) -> str:
-        """
-        Bereinigt einen Dateinamen.
-
-        Args:
-            filename: Roher Dateiname
-
-        Returns:
-            Bereinigter Dateiname
-        """
-        # Entferne ungültige Zeichen
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, "_")
-
-        # Umlaute ersetzen
-        replacements = {
-            "ä": "ae", "ö": "oe", "ü": "ue",
-            "Ä": "Ae", "Ö": "Oe", "Ü": "Ue",
-            "ß": "ss"
-        }
-        for old, new in replacements.items():
-            filename = filename.replace(old, new)
-
-        # Leerzeichen durch Unterstriche
-        filename = filename.replace(" ", "_")
-
-        # Sicherstellen, dass .pdf Endung vorhanden
-        if not filename.lower().endswith(".pdf"):
-            filename += ".pdf"
-
-        # Maximale Länge
-        if len(filename) > 84:  # 80 + .pdf
-            filename = filename[:80] + ".pdf"
-
-        return filename
@@ -7,11 +7,18 @@ für bessere Sortier- und Benennungsvorschläge.
 MIT License - Copyright (c) 2026
 """
 
+import asyncio
+import hashlib
+import logging
+import threading
 from pathlib import Path
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
+from src.ml.batch_runner import BatchRunner
 from src.ml.classifier import PDFClassifier, Suggestion, get_classifier
+from src.ml.llm_cache import LLMCache, get_llm_cache
+from src.ml.semantic_cache import SemanticCache, get_semantic_cache
 from src.ml.llm_provider import LLMProvider, LLMConfig, LLMResponse, LLMProviderType
 from src.ml.claude_provider import ClaudeProvider
 from src.ml.openai_provider import OpenAIProvider
@@ -19,8 +26,10 @@ from src.ml.poe_provider import PoeProvider
 from src.ml.ollama_provider import OllamaProvider
 from src.utils.config import get_config
 
+logger = logging.getLogger("pdf_sortier_meister.hybrid_classifier")
 
-@dataclass
+
+@dataclass(slots=True)
 class HybridSuggestion:
     """Ein Sortiervorschlag aus dem Hybrid-System."""
     folder_path: Path
@@ -30,7 +39,7 @@ class HybridSuggestion:
     source: str  # "local", "llm", "hybrid"
 
 
-@dataclass
+@dataclass(slots=True)
 class HybridFilename:
     """Ein Dateinamenvorschlag aus dem Hybrid-System."""
     filename: str
@@ -40,6 +49,23 @@ class HybridFilename:
     metadata: Optional[dict] = None  # Extrahierte Metadaten (nur bei LLM)
 
 
+# Provider-Klassen je Anbieter
+_PROVIDER_CLASSES = {
+    LLMProviderType.CLAUDE: ClaudeProvider,
+    LLMProviderType.OPENAI: OpenAIProvider,
+    LLMProviderType.POE: PoeProvider,
+    LLMProviderType.OLLAMA: OllamaProvider,
+}
+
+# Standard-Modell je Anbieter (wenn zur Laufzeit keins angegeben wird)
+_DEFAULT_MODELS = {
+    LLMProviderType.CLAUDE: "haiku",
+    LLMProviderType.OPENAI: "gpt-4o-mini",
+    LLMProviderType.POE: "GPT-4o-Mini",
+    LLMProviderType.OLLAMA: OllamaProvider.DEFAULT_MODEL,
+}
+
+
 class HybridClassifier:
     """
     Hybrid-Klassifikator der lokale ML-Modelle mit LLM kombiniert.
@@ -57,33 +83,92 @@ class HybridClassifier:
     LOCAL_CONFIDENCE_THRESHOLD = 0.6  # Ab hier kein LLM nötig
     LLM_WEIGHT = 0.4  # Gewichtung des LLM bei Kombination
     LOCAL_WEIGHT = 0.6  # Gewichtung des lokalen Klassifikators
+    MAX_COMBINED_CONFIDENCE = 0.98  # Obergrenze für bestätigte Vorschläge
+
+    FILENAME_LOCAL_THRESHOLD = 0.75  # Ab hier kein LLM für Dateinamen nötig
+    MIN_TEXT_LENGTH_FOR_LLM = 200  # Kürzere Texte verbessert das LLM selten
+
+    # Gleichzeitige LLM-Anfragen bei asuggest_folders_many
+    MAX_CONCURRENT_LLM_REQUESTS = 10
 
     def __init__(self):
         """Initialisiert den Hybrid-Klassifikator."""
         self.config = get_config()
-        self.local_classifier = get_classifier()
-        self.llm_provider: Optional[LLMProvider] = None
+        self._llm_provider: Optional[LLMProvider] = None
+        # Konfigurierter, aber noch nicht erstellter Provider (Klasse, Konfiguration)
+        self._pending_llm: Optional[tuple[type, LLMConfig]] = None
+        self._llm_init_lock = threading.Lock()
         self.llm_enabled = False
         self.total_tokens_used = 0
+        self.llm_calls_skipped = 0  # Durch lokale Vorschläge eingesparte Aufrufe
+        self._tokens_lock = threading.Lock()
 
-        # LLM-Provider initialisieren falls konfiguriert
+        # LLM-Konfiguration lesen (Provider wird erst bei Bedarf erstellt)
         self._init_llm_provider()
 
+    @property
+    def local_classifier(self) -> PDFClassifier:
+        """Lokaler Klassifikator (erst beim ersten Zugriff geladen)."""
+        return get_classifier()
+
+    @property
+    def llm_provider(self) -> Optional[LLMProvider]:
+        """LLM-Provider (SDK wird erst beim ersten Zugriff geladen)."""
+        if self._pending_llm is not None:
+            self._ensure_llm_provider()
+        return self._llm_provider
+
+    @llm_provider.setter
+    def llm_provider(self, provider: Optional[LLMProvider]):
+        self._pending_llm = None
+        self._llm_provider = provider
+
+    def _ensure_llm_provider(self):
+        """Erstellt den konfigurierten Provider (einmalig, threadsicher)."""
+        with self._llm_init_lock:
+            if self._pending_llm is None:
+                return
+            provider_class, config = self._pending_llm
+            try:
+                self._llm_provider = provider_class(config)
+                self.llm_enabled = self._llm_provider.is_available()
+            except Exception as e:
+                logger.exception(f"Fehler bei LLM-Initialisierung: {e}")
+                self._llm_provider = None
+                self.llm_enabled = False
+            self._pending_llm = None
+
+    def _configure_llm_provider(self, provider_type: LLMProviderType, config: LLMConfig):
+        """Merkt einen Provider für die spätere Erstellung vor."""
+        self._llm_provider = None
+        self._pending_llm = None
+        provider_class = _PROVIDER_CLASSES.get(provider_type)
+        if provider_class is None:
+            self.llm_enabled = False
+            return
+        self._pending_llm = (provider_class, config)
+        self.llm_enabled = True
+
     def _init_llm_provider(self):
-        """Initialisiert den LLM-Provider basierend auf Konfiguration."""
+        """Liest die LLM-Konfiguration und merkt den Provider vor."""
         llm_config = self.config.get("llm", {})
-        provider_type = llm_config.get("provider", "none")
         api_key = llm_config.get("api_key", "")
         model = llm_config.get("model", "")
         base_url = llm_config.get("base_url", "")
+        try:
+            provider_type = LLMProviderType(llm_config.get("provider", "none"))
+        except ValueError:
+            provider_type = LLMProviderType.NONE
 
-        if provider_type == "none":
+        if provider_type == LLMProviderType.NONE:
+            self.llm_provider = None
             self.llm_enabled = False
             return
 
         # Ollama laeuft lokal und braucht keinen API-Key.
         # Alle anderen Provider brauchen einen.
-        if provider_type != "ollama" and not api_key:
+        if provider_type != LLMProviderType.OLLAMA and not api_key:
+            self.llm_provider = None
             self.llm_enabled = False
             return
 
@@ -94,25 +179,11 @@ class HybridClassifier:
             temperature=llm_config.get("temperature", 0.3),
             text_limit=llm_config.get("text_limit", 1500),
             base_url=base_url,
+            batch_size=llm_config.get("batch_size", 10),
+            stream=llm_config.get("stream", False),
+            max_retries=llm_config.get("max_retries", 3),
         )
-
-        try:
-            if provider_type == "claude":
-                self.llm_provider = ClaudeProvider(config)
-            elif provider_type == "openai":
-                self.llm_provider = OpenAIProvider(config)
-            elif provider_type == "poe":
-                self.llm_provider = PoeProvider(config)
-            elif provider_type == "ollama":
-                self.llm_provider = OllamaProvider(config)
-
-            self.llm_enabled = (
-                self.llm_provider is not None
-                and self.llm_provider.is_available()
-            )
-        except Exception as e:
-            print(f"Fehler bei LLM-Initialisierung: {e}")
-            self.llm_enabled = False
+        self._configure_llm_provider(provider_type, config)
 
     def set_llm_provider(
         self,
@@ -141,36 +212,12 @@ class HybridClassifier:
             self.llm_enabled = False
             return
 
-        # Standard-Modell je nach Provider
-        default_models = {
-            LLMProviderType.CLAUDE: "haiku",
-            LLMProviderType.OPENAI: "gpt-4o-mini",
-            LLMProviderType.POE: "GPT-4o-Mini",
-            LLMProviderType.OLLAMA: OllamaProvider.DEFAULT_MODEL,
-        }
         config = LLMConfig(
             api_key=api_key,
-            model=model or default_models.get(provider_type, ""),
+            model=model or _DEFAULT_MODELS.get(provider_type, ""),
             base_url=base_url,
         )
-
-        try:
-            if provider_type == LLMProviderType.CLAUDE:
-                self.llm_provider = ClaudeProvider(config)
-            elif provider_type == LLMProviderType.OPENAI:
-                self.llm_provider = OpenAIProvider(config)
-            elif provider_type == LLMProviderType.POE:
-                self.llm_provider = PoeProvider(config)
-            elif provider_type == LLMProviderType.OLLAMA:
-                self.llm_provider = OllamaProvider(config)
-
-            self.llm_enabled = (
-                self.llm_provider is not None
-                and self.llm_provider.is_available()
-            )
-        except Exception as e:
-            print(f"Fehler bei LLM-Konfiguration: {e}")
-            self.llm_enabled = False
+        self._configure_llm_provider(provider_type, config)
 
     def suggest_folders(
         self,
@@ -193,39 +240,12 @@ class HybridClassifier:
         Returns:
             Liste von Sortiervorschlägen
         """
-        suggestions = []
-
         # 1. Lokale Klassifikation
-        local_suggestions = self.local_classifier.suggest(
-            text, keywords, max_suggestions
-        )
+        suggestions = self._get_local_folder_suggestions(text, keywords, max_suggestions)
 
-        # Lokale Vorschläge in HybridSuggestion konvertieren
-        for s in local_suggestions:
-            suggestions.append(HybridSuggestion(
-                folder_path=s.folder_path,
-                folder_name=s.folder_name,
-                confidence=s.confidence,
-                reason=s.reason,
-                source="local",
-            ))
-
-        # 2. LLM verwenden wenn:
-        #    - Explizit angefordert, ODER
-        #    - Automatisch & (keine Vorschläge ODER niedrige Konfidenz)
-        should_use_llm = False
-        if use_llm is True:
-            should_use_llm = True
-        elif use_llm is None and self.llm_enabled:
-            # Automatische Entscheidung
-            if not suggestions:
-                should_use_llm = True
-            elif suggestions[0].confidence < self.LOCAL_CONFIDENCE_THRESHOLD:
-                should_use_llm = True
-
-        if should_use_llm and self.llm_enabled and available_folders:
+        if self._should_use_llm(suggestions, use_llm) and available_folders:
             llm_suggestion = self._get_llm_folder_suggestion(
-                text, keywords, available_folders
+                text, keywords, self._folders_by_name(available_folders)
             )
             if llm_suggestion:
                 suggestions = self._merge_suggestions(
@@ -236,35 +256,319 @@ class HybridClassifier:
         suggestions.sort(key=lambda s: s.confidence, reverse=True)
         return suggestions[:max_suggestions]
 
+    def suggest_folders_batch(
+        self,
+        documents: list[dict],
+        available_folders: list[Path] = None,
+        use_llm: bool = None,
+        max_suggestions: int = 5,
+    ) -> list[list[HybridSuggestion]]:
+        """
+        Schlägt Zielordner für mehrere Dokumente vor (z.B. beim Massensortieren).
+
+        Wie suggest_folders, aber alle Dokumente, die das LLM brauchen,
+        werden gesammelt und mit möglichst wenigen Anfragen klassifiziert.
+        Doppelte Dokumente (gleicher gekürzter Text) werden nur einmal
+        angefragt.
+
+        Args:
+            documents: Je Dokument ein Dict mit "text" und optional "keywords"
+            available_folders: Liste der verfügbaren Zielordner
+            use_llm: LLM verwenden? None = automatisch entscheiden
+            max_suggestions: Maximale Anzahl Vorschläge pro Dokument
+
+        Returns:
+            Je Dokument eine Liste von Sortiervorschlägen
+        """
+        # 1. Lokale Klassifikation für alle Dokumente (eine Matrixmultiplikation)
+        results = self._get_local_folder_suggestions_batch(documents, max_suggestions)
+
+        # 2. Unsichere Dokumente gesammelt an das LLM geben
+        pending = [
+            i for i, suggestions in enumerate(results)
+            if self._should_use_llm(suggestions, use_llm)
+        ]
+        if pending and available_folders and self.llm_provider:
+            folder_by_name = self._folders_by_name(available_folders)
+            groups: dict[bytes, list[int]] = {}
+            for i in pending:
+                groups.setdefault(self._llm_document_key(documents[i]), []).append(i)
+
+            responses = self._classify_llm_batch(
+                [
+                    {"text": documents[indices[0]].get("text"),
+                     "keywords": documents[indices[0]].get("keywords")}
+                    for indices in groups.values()
+                ],
+                list(folder_by_name),
+            )
+            for indices, response in zip(groups.values(), responses):
+                llm_suggestion = self._folder_suggestion_from_response(
+                    response, folder_by_name
+                )
+                if llm_suggestion:
+                    for i in indices:
+                        # Eigene Kopie je Dokument, da _merge_suggestions sie übernimmt
+                        results[i] = self._merge_suggestions(
+                            results[i], replace(llm_suggestion), available_folders
+                        )
+
+        for suggestions in results:
+            suggestions.sort(key=lambda s: s.confidence, reverse=True)
+        return [suggestions[:max_suggestions] for suggestions in results]
+
+    def _classify_llm_batch(
+        self, documents: list[dict], folder_names: list[str]
+    ) -> list[LLMResponse]:
+        """
+        Klassifiziert mehrere Dokumente mit dem LLM.
+
+        Dokumente, die einem bereits klassifizierten nahezu gleichen, werden
+        aus dem Ähnlichkeits-Cache beantwortet (falls aktiviert).
+        """
+        semantic_cache = self._semantic_cache()
+        if not semantic_cache:
+            return self._request_llm_batch(documents, folder_names)
+
+        responses = [
+            semantic_cache.get(document.get("text"), folder_names) for document in documents
+        ]
+        missing = [i for i, response in enumerate(responses) if response is None]
+        if missing:
+            fresh = self._request_llm_batch([documents[i] for i in missing], folder_names)
+            for i, response in zip(missing, fresh):
+                responses[i] = response
+            # Einmal anhängen und speichern statt je Dokument
+            semantic_cache.set_many(
+                [(documents[i].get("text"), responses[i]) for i in missing], folder_names
+            )
+        return responses
+
+    def _request_llm_batch(
+        self, documents: list[dict], folder_names: list[str]
+    ) -> list[LLMResponse]:
+        """
+        Schickt mehrere Dokumente zur Klassifikation an das LLM.
+
+        Mit llm.use_batch_api und OpenAI läuft das über die Batch-API
+        (höchstens llm.batch_api_timeout Sekunden), sonst über gebündelte
+        Prompts (classify_documents_batch).
+        """
+        provider = self.llm_provider
+        llm_config = self.config.get("llm", {})
+        if isinstance(provider, OpenAIProvider) and llm_config.get("use_batch_api", False):
+            from src.ml.openai_batch import OpenAIBatchJob
+            results = OpenAIBatchJob(provider).run(
+                {str(i): document for i, document in enumerate(documents)},
+                folder_names,
+                timeout=llm_config.get("batch_api_timeout") or None,
+            )
+            return [results[str(i)] for i in range(len(documents))]
+        return provider.classify_documents_batch(documents, folder_names)
+
+    def _llm_document_key(self, document: dict) -> bytes:
+        """
+        Fingerabdruck des Dokumentteils, den das LLM tatsächlich sieht.
+
+        Returns:
+            16-Byte-BLAKE2b-Digest aus gekürztem Text und Schlüsselwörtern
+        """
+        keywords = document.get("keywords") or []
+        truncated = self.llm_provider._truncate_text(document.get("text"), keywords=keywords)
+        digest = hashlib.blake2b(truncated.encode("utf-8"), digest_size=16)
+        digest.update("\x1f".join(keywords).encode("utf-8"))
+        return digest.digest()
+
+    async def asuggest_folders_many(
+        self,
+        documents: list[dict],
+        available_folders: list[Path] = None,
+        use_llm: bool = None,
+        max_suggestions: int = 5,
+        max_concurrency: int = None,
+        requests_per_minute: float = None,
+        tokens_per_minute: float = None,
+    ) -> list[list[HybridSuggestion]]:
+        """
+        Schlägt Zielordner für mehrere Dokumente mit parallelen LLM-Anfragen vor.
+
+        Ergebnis wie bei suggest_folders je Dokument. Die (blockierenden)
+        Provider-Aufrufe laufen in Worker-Threads, sodass sich die
+        Netzwerk-Wartezeiten überlappen. Ohne Angabe gelten
+        max_concurrency, requests_per_minute und tokens_per_minute aus der
+        LLM-Konfiguration.
+
+        Args:
+            documents: Je Dokument ein Dict mit "text" und optional "keywords"
+            available_folders: Liste der verfügbaren Zielordner
+            use_llm: LLM verwenden? None = automatisch entscheiden
+            max_suggestions: Maximale Anzahl Vorschläge pro Dokument
+            max_concurrency: Maximale Anzahl gleichzeitiger LLM-Anfragen
+            requests_per_minute: Anfrage-Limit des Anbieters
+            tokens_per_minute: Token-Limit des Anbieters
+
+        Returns:
+            Je Dokument eine Liste von Sortiervorschlägen (gleiche Reihenfolge)
+        """
+        llm_config = self.config.get("llm", {})
+        runner = BatchRunner(
+            max_concurrency
+            or llm_config.get("max_concurrency")
+            or self.MAX_CONCURRENT_LLM_REQUESTS,
+            requests_per_minute or llm_config.get("requests_per_minute"),
+            tokens_per_minute or llm_config.get("tokens_per_minute"),
+        )
+        folder_by_name = self._folders_by_name(available_folders or [])
+
+        results = [
+            self._get_local_folder_suggestions(
+                document.get("text"), document.get("keywords"), max_suggestions
+            )
+            for document in documents
+        ]
+        pending = [
+            i for i, suggestions in enumerate(results)
+            if available_folders and self._should_use_llm(suggestions, use_llm)
+        ]
+        # Provider einmal auflösen: llm_enabled ist schon vor seiner Erstellung
+        # gesetzt, die Erstellung kann noch scheitern
+        provider = self.llm_provider if pending else None
+        if provider is None:
+            pending = []
+
+        async def ask_llm(i: int) -> Optional[HybridSuggestion]:
+            # Blockierende Provider-Aufrufe im Worker-Thread
+            return await asyncio.to_thread(
+                self._get_llm_folder_suggestion,
+                documents[i].get("text"), documents[i].get("keywords"), folder_by_name,
+            )
+
+        llm_suggestions = await runner.run(
+            pending,
+            ask_llm,
+            lambda i: provider._estimate_classification_tokens(
+                documents[i].get("text"), list(folder_by_name)
+            ),
+        )
+        for i, llm_suggestion in zip(pending, llm_suggestions):
+            if llm_suggestion:
+                results[i] = self._merge_suggestions(
+                    results[i], llm_suggestion, available_folders
+                )
+
+        for suggestions in results:
+            suggestions.sort(key=lambda s: s.confidence, reverse=True)
+        return [suggestions[:max_suggestions] for suggestions in results]
+
+    def _get_local_folder_suggestions(
+        self, text: str, keywords: list[str], max_suggestions: int
+    ) -> list[HybridSuggestion]:
+        """Holt die Vorschläge des lokalen Klassifikators."""
+        return [
+            HybridSuggestion(
+                folder_path=s.folder_path,
+                folder_name=s.folder_name,
+                confidence=s.confidence,
+                reason=s.reason,
+                source="local",
+            )
+            for s in self.local_classifier.suggest(text, keywords, max_suggestions)
+        ]
+
+    def _get_local_folder_suggestions_batch(
+        self, documents: list[dict], max_suggestions: int
+    ) -> list[list[HybridSuggestion]]:
+        """Holt die Vorschläge des lokalen Klassifikators für mehrere Dokumente."""
+        batch = self.local_classifier.suggest_batch(
+            [document.get("text") for document in documents],
+            max_suggestions,
+            [document.get("keywords") for document in documents],
+        )
+        return [
+            [
+                HybridSuggestion(
+                    folder_path=s.folder_path,
+                    folder_name=s.folder_name,
+                    confidence=s.confidence,
+                    reason=s.reason,
+                    source="local",
+                )
+                for s in suggestions
+            ]
+            for suggestions in batch
+        ]
+
+    def _should_use_llm(
+        self, suggestions: list[HybridSuggestion], use_llm: Optional[bool]
+    ) -> bool:
+        """
+        Entscheidet, ob das LLM für einen Ordnervorschlag gefragt wird.
+
+        LLM verwenden wenn:
+        - Explizit angefordert, ODER
+        - Automatisch & (keine Vorschläge ODER niedrige Konfidenz)
+        """
+        if not self.llm_enabled or use_llm is False:
+            return False
+        if use_llm is True:
+            return True
+        return (
+            not suggestions
+            or suggestions[0].confidence < self.LOCAL_CONFIDENCE_THRESHOLD
+        )
+
     def _get_llm_folder_suggestion(
         self,
         text: str,
         keywords: list[str],
-        available_folders: list[Path],
+        folder_by_name: dict[str, Path],
     ) -> Optional[HybridSuggestion]:
         """Holt einen Ordnervorschlag vom LLM."""
         if not self.llm_provider:
             return None
 
-        folder_names = [f.name for f in available_folders]
-        response = self.llm_provider.classify_document(
-            text=text,
-            available_folders=folder_names,
-            keywords=keywords,
-        )
+        folder_names = list(folder_by_name)
+        semantic_cache = self._semantic_cache()
+        response = semantic_cache.get(text, folder_names) if semantic_cache else None
+        if response is None:
+            response = self._cached_llm_call(
+                "classify_document",
+                lambda: self.llm_provider._build_classification_prompt(
+                    text, folder_names, keywords
+                ),
+                lambda: self.llm_provider.classify_document(
+                    text=text,
+                    available_folders=folder_names,
+                    keywords=keywords,
+                ),
+            )
+            if semantic_cache:
+                semantic_cache.set(text, folder_names, response)
 
-        self.total_tokens_used += response.tokens_used
+        return self._folder_suggestion_from_response(response, folder_by_name)
+
+    @staticmethod
+    def _folders_by_name(available_folders: list[Path]) -> dict[str, Path]:
+        """
+        Ordnet Ordnernamen ihren Pfaden zu (einmal je Aufruf/Batch).
+
+        Bei gleichnamigen Ordnern gilt - wie bisher - der erste in der Liste.
+        """
+        folder_by_name: dict[str, Path] = {}
+        for folder in available_folders:
+            folder_by_name.setdefault(folder.name, folder)
+        return folder_by_name
+
+    def _folder_suggestion_from_response(
+        self, response: LLMResponse, folder_by_name: dict[str, Path]
+    ) -> Optional[HybridSuggestion]:
+        """Wandelt eine LLM-Antwort in einen Ordnervorschlag um."""
+        self._add_tokens(response.tokens_used)
 
         if not response.success or not response.folder_suggestion:
             return None
 
-        # Ordner-Pfad finden
-        folder_path = None
-        for f in available_folders:
-            if f.name == response.folder_suggestion:
-                folder_path = f
-                break
-
+        folder_path = folder_by_name.get(response.folder_suggestion)
         if not folder_path:
             return None
 
@@ -293,12 +597,11 @@ class HybridClassifier:
         Returns:
             Kombinierte Liste
         """
-        # Prüfen ob LLM-Vorschlag schon in lokalen ist
-        matching_local = None
-        for s in local:
-            if s.folder_path == llm.folder_path:
-                matching_local = s
-                break
+        # Prüfen ob LLM-Vorschlag schon in lokalen ist (höchstens
+        # max_suggestions Einträge, ein Index lohnt sich nicht)
+        matching_local = next(
+            (s for s in local if s.folder_path == llm.folder_path), None
+        )
 
         if matching_local:
             # Kombinierte Konfidenz berechnen
@@ -306,7 +609,9 @@ class HybridClassifier:
                 self.LOCAL_WEIGHT * matching_local.confidence
                 + self.LLM_WEIGHT * llm.confidence
             )
-            matching_local.confidence = min(combined_confidence, 0.98)
+            matching_local.confidence = min(
+                combined_confidence, self.MAX_COMBINED_CONFIDENCE
+            )
             matching_local.reason = f"{matching_local.reason} + LLM bestätigt"
             matching_local.source = "hybrid"
         else:
@@ -354,8 +659,12 @@ class HybridClassifier:
                 source="local",
             ))
 
-        # 2. LLM-Vorschlag wenn gewünscht
-        if (use_llm or use_llm is None) and self.llm_enabled:
+        # 2. LLM-Vorschlag wenn gewünscht (automatisch nur, wenn es sich lohnt)
+        if use_llm is None and self.llm_enabled and not self._filename_needs_llm(
+            text, suggestions
+        ):
+            self.llm_calls_skipped += 1
+        elif (use_llm or use_llm is None) and self.llm_enabled:
             llm_suggestion = self._get_llm_filename_suggestion(
                 text, current_filename, keywords, detected_date, target_folder, file_date
             )
@@ -368,6 +677,21 @@ class HybridClassifier:
 
         return suggestions
 
+    def _filename_needs_llm(
+        self, text: str, suggestions: list[HybridFilename]
+    ) -> bool:
+        """
+        Entscheidet bei automatischem Modus, ob das LLM gefragt wird.
+
+        Nicht bei sicheren lokalen Vorschlägen und nicht bei sehr kurzen
+        Texten (z.B. fehlgeschlagene Texterkennung).
+        """
+        if not text or len(text) < self.MIN_TEXT_LENGTH_FOR_LLM:
+            return False
+        return not suggestions or max(
+            s.confidence for s in suggestions
+        ) < self.FILENAME_LOCAL_THRESHOLD
+
     def _generate_local_filename_suggestions(
         self,
         current_filename: str,
@@ -381,7 +705,11 @@ class HybridClassifier:
             Liste von (filename, reason, confidence) Tupeln
         """
         suggestions = []
-        base_name = current_filename.replace(".pdf", "").replace(".PDF", "")
+        # Nur die Endung entfernen (Groß-/Kleinschreibung egal), nicht ".pdf" im Namen
+        if current_filename.lower().endswith(".pdf"):
+            base_name = current_filename[:-4]
+        else:
+            base_name = current_filename
 
         # Datum-basierter Name
         if detected_date:
@@ -426,16 +754,22 @@ class HybridClassifier:
         if not self.llm_provider:
             return None
 
-        response = self.llm_provider.suggest_filename(
-            text=text,
-            current_filename=current_filename,
-            keywords=keywords,
-            detected_date=detected_date,
-            target_folder=target_folder,
-            file_date=file_date,
+        response = self._cached_llm_call(
+            "suggest_filename",
+            lambda: self.llm_provider._build_filename_prompt(
+                text, current_filename, keywords, detected_date, target_folder, file_date
+            ),
+            lambda: self.llm_provider.suggest_filename(
+                text=text,
+                current_filename=current_filename,
+                keywords=keywords,
+                detected_date=detected_date,
+                target_folder=target_folder,
+                file_date=file_date,
+            ),
         )
 
-        self.total_tokens_used += response.tokens_used
+        self._add_tokens(response.tokens_used)
 
         if not response.success or not response.filename_suggestion:
             return None
@@ -448,6 +782,56 @@ class HybridClassifier:
             metadata=response.metadata,
         )
 
+    def _llm_cache_key(self, method: str, prompt: str) -> str:
+        """Cache-Schlüssel aus Provider, Methode, Modell-Parametern und fertigem Prompt."""
+        llm_config = self.llm_provider.config
+        return LLMCache.make_key(
+            type(self.llm_provider).__name__,
+            method,
+            llm_config.model,
+            str(llm_config.temperature),
+            str(llm_config.max_tokens),
+            prompt,
+        )
+
+    def _semantic_cache(self) -> Optional[SemanticCache]:
+        """Ähnlichkeits-Cache für Ordnervorschläge, falls aktiviert."""
+        if not self.config.get("llm", {}).get("semantic_cache_enabled", False):
+            return None
+        if "classify_document" not in self.llm_provider.CACHEABLE_METHODS:
+            return None
+        return get_semantic_cache()
+
+    def _cached_llm_call(self, method: str, build_prompt, call) -> LLMResponse:
+        """
+        Beantwortet eine LLM-Anfrage aus dem Cache oder ruft das LLM auf.
+
+        method ist der Name der aufgerufenen Provider-Methode; gecacht wird
+        nur, wenn sie in CACHEABLE_METHODS des Providers steht. build_prompt
+        liefert den Prompt für den Cache-Schlüssel und wird nur bei
+        aktiviertem Cache aufgerufen.
+
+        Bei niedriger Temperatur sind die Antworten nahezu deterministisch,
+        daher lohnt sich das Wiederverwenden für identische Prompts.
+        """
+        cache = None
+        if (
+            self.config.get("llm", {}).get("cache_enabled", True)
+            and method in self.llm_provider.CACHEABLE_METHODS
+        ):
+            cache = get_llm_cache()
+
+        if cache:
+            cache_key = self._llm_cache_key(method, build_prompt())
+            cached = cache.get(cache_key)
+            if cached:
+                return cached
+
+        response = call()
+        if cache:
+            cache.set(cache_key, response)
+        return response
+
     def learn(
         self,
         pdf_path: Path,
@@ -475,36 +859,52 @@ class HybridClassifier:
         """Gibt die Anzahl der Trainingseinträge zurück."""
         return self.local_classifier.get_training_count()
 
+    def _add_tokens(self, tokens: int):
+        """Zählt verbrauchte Tokens (auch aus parallelen Anfragen)."""
+        with self._tokens_lock:
+            self.total_tokens_used += tokens
+
     def get_tokens_used(self) -> int:
         """Gibt die Gesamtzahl der verwendeten Tokens zurück."""
         return self.total_tokens_used
 
+    def get_llm_calls_skipped(self) -> int:
+        """Gibt die Anzahl der eingesparten LLM-Aufrufe für Dateinamen zurück."""
+        return self.llm_calls_skipped
+
     def is_llm_available(self) -> bool:
         """Prüft ob ein LLM-Provider verfügbar ist."""
         return self.llm_enabled
 
     def get_llm_provider_name(self) -> str:
         """Gibt den Namen des aktuellen LLM-Providers zurück."""
-        if not self.llm_enabled or not self.llm_provider:
+        if not self.llm_enabled:
+            return "Keiner"
+        # Name auch ohne Erstellen des vorgemerkten Providers bestimmen
+        provider = self._pending_llm[0] if self._pending_llm else type(self._llm_provider)
+        if provider is type(None):
             return "Keiner"
-        if isinstance(self.llm_provider, ClaudeProvider):
+        if issubclass(provider, ClaudeProvider):
             return "Claude"
-        if isinstance(self.llm_provider, OpenAIProvider):
+        if issubclass(provider, OpenAIProvider):
             return "OpenAI"
-        if isinstance(self.llm_provider, PoeProvider):
+        if issubclass(provider, PoeProvider):
             return "Poe"
-        if isinstance(self.llm_provider, OllamaProvider):
+        if issubclass(provider, OllamaProvider):
             return "Ollama"
         return "Unbekannt"
 
 
 # Globale Instanz
 _hybrid_classifier: Optional[HybridClassifier] = None
+_hybrid_classifier_lock = threading.Lock()
 
 
 def get_hybrid_classifier() -> HybridClassifier:
-    """Gibt die globale Hybrid-Klassifikator-Instanz zurück."""
+    """Gibt die globale Hybrid-Klassifikator-Instanz zurück (thread-sicher)."""
     global _hybrid_classifier
     if _hybrid_classifier is None:
-        _hybrid_classifier = HybridClassifier()
+        with _hybrid_classifier_lock:
+            if _hybrid_classifier is None:
+                _hybrid_classifier = HybridClassifier()
     return _hybrid_classifier
@@ -0,0 +1,181 @@
+"""
+Antwort-Cache für LLM-Anfragen
+
+Speichert erfolgreiche LLM-Antworten in einer SQLite-Datenbank, damit
+dasselbe Dokument (gleicher Prompt, gleiches Modell) nicht erneut an
+den Anbieter geschickt wird. Einträge verfallen nach einer festen Zeit;
+bei zu vielen Einträgen werden die am längsten unbenutzten verworfen.
+
+MIT License - Copyright (c) 2026
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import asdict, replace
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from src.ml.llm_provider import LLMResponse
+
+logger = logging.getLogger("pdf_sortier_meister.llm_cache")
+
+# Standard-Lebensdauer eines Eintrags (30 Tage)
+_DEFAULT_TTL = 30 * 24 * 3600
+
+# Standard-Obergrenze für die Anzahl gespeicherter Antworten
+_DEFAULT_MAX_ENTRIES = 2000
+
+
+class LLMCache:
+    """Persistenter Cache für LLM-Antworten mit Ablaufzeit und LRU-Verdrängung."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        ttl_seconds: float = _DEFAULT_TTL,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Initialisiert den Cache.
+
+        Args:
+            db_path: Pfad zur SQLite-Datei
+            ttl_seconds: Lebensdauer eines Eintrags in Sekunden
+            max_entries: Maximale Anzahl gespeicherter Antworten
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = Lock()
+
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        Bildet einen Cache-Schlüssel aus allen Bestandteilen einer Anfrage.
+
+        Args:
+            parts: z.B. Provider, Modell, Parameter und der fertige Prompt
+
+        Returns:
+            SHA-256-Hexdigest
+        """
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        """
+        Gibt die gespeicherte Antwort zurück (ohne Token-Verbrauch).
+
+        Returns:
+            LLMResponse oder None (nicht vorhanden / abgelaufen)
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                conn = sqlite3.connect(str(self.db_path))
+                try:
+                    row = conn.execute(
+                        "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    if now - row[1] > self.ttl_seconds:
+                        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        conn.commit()
+                        return None
+                    conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"LLM-Cache-Lesen fehlgeschlagen: {e}")
+            return None
+
+        try:
+            response = LLMResponse(**json.loads(row[0]))
+        except (TypeError, ValueError):
+            return None
+        # Aus dem Cache beantwortet: es wurden keine Tokens verbraucht
+        return replace(response, tokens_used=0)
+
+    def set(self, key: str, response: LLMResponse):
+        """Speichert eine erfolgreiche Antwort; Fehlerantworten werden ignoriert."""
+        if not response.success:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                conn = sqlite3.connect(str(self.db_path))
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_used) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(asdict(response), ensure_ascii=False), now, now),
+                    )
+                    # Abgelaufene und überzählige (am längsten unbenutzte) Einträge entfernen
+                    conn.execute(
+                        "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+                    )
+                    conn.execute(
+                        "DELETE FROM llm_cache WHERE key IN ("
+                        "SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"LLM-Cache-Speichern fehlgeschlagen: {e}")
+
+    def clear(self):
+        """Löscht alle gespeicherten Antworten."""
+        with self._lock:
+            conn = sqlite3.connect(str(self.db_path))
+            try:
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+            finally:
+                conn.close()
+
+
+# Globale Instanz
+_llm_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Gibt die globale Cache-Instanz zurück.
+
+    Returns:
+        LLMCache oder None, falls die Cache-Datei nicht angelegt werden kann
+    """
+    global _llm_cache
+    if _llm_cache is None:
+        from src.utils.config import get_config
+        try:
+            _llm_cache = LLMCache(get_config().data_dir / "llm_cache.db")
+        except sqlite3.Error as e:
+            logger.error(f"LLM-Cache nicht verfügbar: {e}")
+            return None
+    return _llm_cache
@@ -7,12 +7,172 @@ Bietet eine einheitliche Schnittstelle für verschiedene LLM-Anbieter
 MIT License - Copyright (c) 2026
 """
 
+import json
+import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from typing import Iterable, Optional
 from enum import Enum
 
 
+# Aufteilung des Text-Limits beim Kürzen: Anfang, Ende, Rest für
+# Fundstellen der Schlüsselwörter (siehe _truncate_text)
+_HEAD_SHARE = 0.4
+_TAIL_SHARE = 0.27
+_MAX_KEYWORD_WINDOWS = 3
+_MAX_KEYWORD_WINDOW = 300
+
+# Abschnittsüberschrift je Dokument in Sammel-Prompts und -Antworten
+_BATCH_HEADER_RE = re.compile(r"^\W*DOKUMENT\s+(\d+)\W*$", re.MULTILINE)
+
+# Prompt-Vorlagen (statischer Text wird nur einmal angelegt; Platzhalter
+# werden per format_map gefüllt, doppelte Klammern sind wörtliche)
+_CLASSIFICATION_PROMPT = """Du bist ein Assistent zum Sortieren von Dokumenten.
+
+Analysiere das Dokument am Ende und wähle den passendsten Zielordner aus der Liste.
+
+VERFÜGBARE ORDNER:
+{folder_list}
+
+AUFGABE:
+1. Analysiere den Dokumentinhalt
+2. Wähle den passendsten Ordner aus der Liste
+3. Begründe deine Wahl kurz
+
+Antworte NUR mit JSON:
+{{"folder": "Exakter Ordnername aus der Liste", "reason": "Kurze Begründung, max 1-2 Sätze", "confidence": 0-100}}
+
+DOKUMENTINHALT:
+{text}
+{keyword_info}{date_info}"""
+
+_FILENAME_PROMPT = """Du bist ein Assistent zum Benennen und Analysieren von Dokumenten.
+
+Analysiere das Dokument am Ende und schlage einen aussagekräftigen Dateinamen vor.
+Extrahiere außerdem wichtige Metadaten aus dem Dokument.
+{owner_info}
+REGELN FÜR DEN DATEINAMEN:
+1. Format: YYYY-MM-DD_Kategorie_Beschreibung.pdf (wenn Datum vorhanden)
+2. Nur Buchstaben, Zahlen, Unterstriche und Bindestriche verwenden
+3. Keine Sonderzeichen, keine Leerzeichen, keine Umlaute
+4. Maximal 80 Zeichen (ohne .pdf)
+5. Aussagekräftig und prägnant
+6. WICHTIG bei Rechnungen: Füge unterscheidende Details hinzu wie:
+   - Rechnungsnummer (z.B. RE-12345)
+   - Leistung/Betreff (z.B. Heizungswartung, Rohrbruch)
+   - Nicht nur den Firmennamen, da mehrere Rechnungen vom selben Absender existieren können
+   Beispiel: 2024-03-15_Rechnung_Meyer-Sanitaer_RE12345_Heizungswartung.pdf
+7. WICHTIG zum Datum:
+   - Verwende das Datum AUS DEM DOKUMENT (Rechnungsdatum, Briefdatum, etc.)
+   - Wenn KEIN Datum im Dokument steht, verwende das Änderungsdatum der Datei (Scandatum)
+   - NIEMALS ein Datum erfinden! Kein 2023 oder andere Phantasiedaten!
+
+Antworte im folgenden Format (jedes Feld in einer eigenen Zeile):
+DATEINAME: [Vorgeschlagener Dateiname mit .pdf]
+BEGRÜNDUNG: [Kurze Begründung, max 1-2 Sätze]
+KONFIDENZ: [Zahl von 0-100]
+KATEGORIE: [Rechnung/Vertrag/Steuer/Versicherung/Bank/Gehalt/Arzt/Energie/Sonstiges]
+KORRESPONDENT: [Firmenname oder Absender — NICHT der Dokumentbesitzer/Empfänger, sondern die ANDERE Partei, z.B. "Stadtwerke München GmbH"]
+BETRAG: [Rechnungsbetrag in Format 123.45 oder UNBEKANNT]
+WAEHRUNG: [EUR/USD oder UNBEKANNT]
+MWST: [Mehrwertsteuersatz als Zahl: 7/19 oder UNBEKANNT]
+STEUERJAHR: [Steuerjahr als vierstellige Zahl, z.B. 2024, oder UNBEKANNT]
+ZUSAMMENFASSUNG: [Kurze Zusammenfassung des Dokuments in einem Satz]
+
+DOKUMENTINHALT:
+{text}
+{keyword_info}{date_info}{file_date_info}{folder_info}
+Aktueller Dateiname: {current_filename}"""
+
+# Faustregel für Token-Schätzungen (deutscher Text, gängige Tokenizer)
+_CHARS_PER_TOKEN = 4
+
+# Beginn des dokumentabhängigen Teils eines Prompts. Alles davor (Anweisung,
+# Ordnerliste, Antwortformat) ist für alle Dokumente einer Sitzung gleich und
+# steht deshalb vorne, damit die Anbieter den Anfang aus dem Prompt-Cache
+# bedienen können
+_DOCUMENT_SECTION_START = "\n\nDOKUMENT"
+
+# Mapping von LLM-Ausgabefeldern zu Metadaten-Keys
+_METADATA_FIELDS = {
+    "KATEGORIE": "subject",
+    "KORRESPONDENT": "korrespondent",
+    "BETRAG": "betrag",
+    "WAEHRUNG": "waehrung",
+    "MWST": "mwst_satz",
+    "STEUERJAHR": "steuerjahr",
+    "ZUSAMMENFASSUNG": "description",
+}
+
+# Eine Antwortzeile "FELD: Wert" (ein Durchlauf über die ganze Antwort)
+_RESPONSE_LINE_RE = re.compile(
+    r"^[ \t]*(ORDNER|DATEINAME|BEGRÜNDUNG|KONFIDENZ|"
+    + "|".join(_METADATA_FIELDS)
+    + r"):[ \t]*(.*?)\s*$",
+    re.MULTILINE,
+)
+_CONFIDENCE_CLEAN_RE = re.compile(r"[^\d.]")
+
+# Felder, nach denen eine Klassifikationsantwort vollständig ist
+_CLASSIFICATION_LABELS = frozenset(("ORDNER", "BEGRÜNDUNG", "KONFIDENZ"))
+
+# Platzhalter, mit denen das LLM fehlende Metadaten kennzeichnet
+_EMPTY_METADATA_VALUES = frozenset(("UNBEKANNT", "KEINE", "N/A", "-", ""))
+
+# Ersetzungen für Dateinamen: ungültige Zeichen und Leerzeichen -> "_",
+# Umlaute -> Umschreibung (translate erlaubt mehrere Zielzeichen)
+_FILENAME_TABLE = str.maketrans({
+    **{char: "_" for char in '<>:"/\\|?* '},
+    "ä": "ae", "ö": "oe", "ü": "ue",
+    "Ä": "Ae", "Ö": "Oe", "Ü": "Ue",
+    "ß": "ss",
+})
+
+
+@lru_cache(maxsize=32)
+def _format_folder_list(folders: tuple[str, ...]) -> str:
+    """Ordnerliste als Prompt-Abschnitt (wird je Ordnerliste nur einmal gebaut)."""
+    return "\n".join(f"- {folder}" for folder in folders)
+
+
+@lru_cache(maxsize=32)
+def _lowercase_folder_index(folders: tuple[str, ...]) -> dict[str, str]:
+    """Kleingeschriebener Ordnername -> Ordnername (erster gewinnt)."""
+    index: dict[str, str] = {}
+    for folder in folders:
+        index.setdefault(folder.lower(), folder)
+    return index
+
+
+def _parse_confidence(value) -> float:
+    """Wandelt 85, "85" bzw. "85%" in 0.85 um (0.5 wenn nicht lesbar)."""
+    try:
+        if isinstance(value, (int, float)):
+            return float(value) / 100.0
+        return float(_CONFIDENCE_CLEAN_RE.sub("", str(value))) / 100.0
+    except ValueError:
+        return 0.5
+
+
+def _parse_json_object(text: str) -> Optional[dict]:
+    """
+    Liest das JSON-Objekt aus einer Antwort (auch mit Code-Fences/Einleitung).
+
+    Returns:
+        Dict oder None, falls die Antwort kein JSON-Objekt enthält
+    """
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
 class LLMProviderType(Enum):
     """Unterstützte LLM-Anbieter."""
     CLAUDE = "claude"
@@ -22,7 +182,7 @@ class LLMProviderType(Enum):
     NONE = "none"  # Kein LLM verwenden
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMResponse:
     """Antwort eines LLM-Providers."""
     success: bool
@@ -37,12 +197,25 @@ class LLMResponse:
     metadata: Optional[dict] = None  # Extrahierte Metadaten
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMConfig:
     """Konfiguration für einen LLM-Provider."""
     api_key: str
     model: str
     max_tokens: int = 700
+    # Antwortlänge je Aufgabe (gedeckelt durch max_tokens): eine Ordnerwahl
+    # als JSON braucht nur wenige Dutzend Tokens, der Dateiname samt
+    # Metadaten-Feldern deutlich mehr
+    max_output_tokens_classify: int = 150
+    max_output_tokens_filename: int = 400
+    # Dokumente pro Sammelanfrage (siehe classify_documents_batch)
+    batch_size: int = 10
+    # Klassifikationen streamen und abbrechen, sobald die Antwort vollständig
+    # ist (OpenAI-kompatible Provider; Claude streamt immer)
+    stream: bool = False
+    # Wiederholungen bei Rate-Limit-/Serverfehlern; die SDKs warten dabei
+    # exponentiell mit Zufallsanteil bzw. so lange wie Retry-After verlangt
+    max_retries: int = 3
     temperature: float = 0.3  # Niedrig für konsistente Antworten
     text_limit: int = 1500  # Max. Zeichen die an LLM gesendet werden
     # Optional: Basis-URL fuer lokale/selbst-gehostete Provider (z.B. Ollama).
@@ -57,6 +230,15 @@ class LLMProvider(ABC):
     Definiert die Schnittstelle, die alle LLM-Provider implementieren müssen.
     """
 
+    # Provider, die _complete() implementieren, bündeln mehrere Dokumente
+    # in einer Anfrage (siehe classify_documents_batch)
+    SUPPORTS_BATCH_PROMPT = False
+
+    # Rein informative Anfragen ohne Seiteneffekte: nur deren Antworten
+    # dürfen aus einem Cache kommen. Methoden, die etwas auslösen, gehören
+    # nicht hierher.
+    CACHEABLE_METHODS = frozenset({"classify_document", "suggest_filename"})
+
     def __init__(self, config: LLMConfig):
         """
         Initialisiert den Provider.
@@ -130,13 +312,184 @@ class LLMProvider(ABC):
         """
         pass
 
-    def _truncate_text(self, text: str, max_chars: int = None) -> str:
+    def classify_documents_batch(
+        self,
+        documents: list[dict],
+        available_folders: list[str],
+    ) -> list[LLMResponse]:
+        """
+        Klassifiziert mehrere Dokumente mit möglichst wenigen Anfragen.
+
+        Bei Providern mit SUPPORTS_BATCH_PROMPT werden bis zu
+        config.batch_size Dokumente in einem Prompt gebündelt,
+        sonst wird jedes Dokument einzeln klassifiziert.
+
+        Args:
+            documents: Je Dokument ein Dict mit "text" und optional
+                "keywords" und "detected_date"
+            available_folders: Liste der verfügbaren Zielordner (für alle gleich)
+
+        Returns:
+            Je Dokument eine LLMResponse (gleiche Reihenfolge)
+        """
+        if not self.SUPPORTS_BATCH_PROMPT or not self.is_available() or not available_folders:
+            return [
+                self.classify_document(available_folders=available_folders, **document)
+                for document in documents
+            ]
+
+        batch_size = max(1, self.config.batch_size)
+        responses = []
+        for start in range(0, len(documents), batch_size):
+            chunk = documents[start:start + batch_size]
+            responses.extend(self._classify_chunk(chunk, available_folders))
+        return responses
+
+    def _classify_chunk(
+        self, documents: list[dict], available_folders: list[str]
+    ) -> list[LLMResponse]:
+        """Klassifiziert einige Dokumente mit einer einzigen Anfrage."""
+        if len(documents) == 1:
+            return [self.classify_document(available_folders=available_folders, **documents[0])]
+
+        prompt = self._build_batch_classification_prompt(documents, available_folders)
+        try:
+            response_text, tokens_used = self._complete(
+                prompt, self._classification_max_tokens() * len(documents)
+            )
+        except Exception as e:
+            return [self._classification_error(e) for _ in documents]
+
+        responses = []
+        for i, section in enumerate(self._split_batch_response(response_text, len(documents))):
+            if section is None:
+                responses.append(LLMResponse(
+                    success=False,
+                    error_message=f"Keine Antwort für Dokument {i + 1}."
+                ))
+                continue
+
+            parsed = self._parse_response(section)
+            suggested_folder = parsed.get("folder")
+            if suggested_folder and suggested_folder not in available_folders:
+                suggested_folder = self._find_similar_folder(
+                    suggested_folder, available_folders
+                )
+            responses.append(LLMResponse(
+                success=True,
+                folder_suggestion=suggested_folder,
+                folder_reason=parsed.get("reason"),
+                confidence=parsed.get("confidence", 0.5),
+            ))
+
+        # Tokens der gemeinsamen Anfrage nur einmal zählen
+        responses[0].tokens_used = tokens_used
+        return responses
+
+    def _classification_max_tokens(self) -> int:
+        """Token-Limit für die Antwort auf eine Ordnerklassifikation."""
+        return min(self.config.max_tokens, self.config.max_output_tokens_classify)
+
+    def _filename_max_tokens(self) -> int:
+        """Token-Limit für die Antwort auf einen Dateinamenvorschlag."""
+        return min(self.config.max_tokens, self.config.max_output_tokens_filename)
+
+    def _estimate_classification_tokens(
+        self, text: str, available_folders: list[str]
+    ) -> int:
+        """Grobe Token-Schätzung einer Klassifikationsanfrage (für Token-Limits)."""
+        chars = (
+            len(_CLASSIFICATION_PROMPT)
+            + min(len(text or ""), self.config.text_limit)
+            + sum(len(folder) + 3 for folder in available_folders)
+        )
+        return chars // _CHARS_PER_TOKEN + self._classification_max_tokens()
+
+    def _complete(self, prompt: str, max_tokens: int) -> tuple[str, int]:
+        """
+        Sendet einen einzelnen Prompt an das LLM.
+
+        Nur für Provider mit SUPPORTS_BATCH_PROMPT nötig.
+
+        Returns:
+            Tuple (Antworttext, verbrauchte Tokens)
+        """
+        raise NotImplementedError
+
+    def _find_similar_folder(
+        self, suggested: str, available: list[str]
+    ) -> Optional[str]:
+        """
+        Findet einen ähnlichen Ordner aus der Liste.
+
+        Args:
+            suggested: Vorgeschlagener Ordnername
+            available: Verfügbare Ordner
+
+        Returns:
+            Ähnlicher Ordnername oder None
+        """
+        suggested_lower = suggested.lower()
+        index = _lowercase_folder_index(tuple(available))
+
+        # Exakte Übereinstimmung (case-insensitive)
+        folder = index.get(suggested_lower)
+        if folder is not None:
+            return folder
+
+        # Teilübereinstimmung
+        for folder_lower, folder in index.items():
+            if suggested_lower in folder_lower or folder_lower in suggested_lower:
+                return folder
+
+        return None
+
+    @staticmethod
+    def _estimate_used_tokens(prompt: str, response_text: str) -> int:
+        """Geschätzter Verbrauch, wenn der Anbieter keine Nutzungsdaten geliefert hat."""
+        return (len(prompt) + len(response_text)) // _CHARS_PER_TOKEN
+
+    def _classification_error(self, error: Exception) -> LLMResponse:
+        """Übersetzt einen API-Fehler in eine Fehlerantwort."""
+        return LLMResponse(success=False, error_message=f"LLM-Fehler: {str(error)}")
+
+    def _sanitize_filename(self, filename: str) -> str:
+        """
+        Bereinigt einen Dateinamen.
+
+        Args:
+            filename: Roher Dateiname
+
+        Returns:
+            Bereinigter Dateiname
+        """
+        # Ungültige Zeichen, Umlaute und Leerzeichen in einem Durchlauf ersetzen
+        filename = filename.translate(_FILENAME_TABLE)
+
+        # Sicherstellen, dass .pdf Endung vorhanden
+        if not filename.lower().endswith(".pdf"):
+            filename += ".pdf"
+
+        # Maximale Länge
+        if len(filename) > 84:  # 80 + .pdf
+            filename = filename[:80] + ".pdf"
+
+        return filename
+
+    def _truncate_text(
+        self, text: str, max_chars: int = None, keywords: list[str] = None
+    ) -> str:
         """
         Kürzt Text auf eine maximale Länge für API-Calls.
 
+        Mit Schlüsselwörtern bleiben Anfang und Ende des Dokuments (Absender,
+        Beträge, Grußformel) sowie die Umgebung der ersten Fundstellen
+        erhalten; ohne Fundstelle wird einfach das Ende abgeschnitten.
+
         Args:
             text: Der zu kürzende Text
             max_chars: Maximale Zeichenanzahl (None = aus Config)
+            keywords: Erkannte Schlüsselwörter (optional)
 
         Returns:
             Gekürzter Text
@@ -150,8 +503,55 @@ class LLMProvider(ABC):
 
         if len(text) <= max_chars:
             return text
-        # Text kürzen und Hinweis anhängen
-        return text[:max_chars] + "\n[... Text gekürzt ...]"
+
+        head_end = int(max_chars * _HEAD_SHARE)
+        tail_start = len(text) - int(max_chars * _TAIL_SHARE)
+        windows = self._keyword_windows(
+            text, keywords, head_end, tail_start, max_chars - head_end - (len(text) - tail_start)
+        ) if keywords else []
+        if not windows:
+            # Text kürzen und Hinweis anhängen
+            return text[:max_chars] + "\n[... Text gekürzt ...]"
+
+        parts = [text[:head_end]]
+        parts.extend(text[start:end] for start, end in windows)
+        parts.append(text[tail_start:])
+        return "\n[...]\n".join(parts)
+
+    @staticmethod
+    def _keyword_windows(
+        text: str, keywords: list[str], start: int, end: int, budget: int
+    ) -> list[tuple[int, int]]:
+        """
+        Textausschnitte um die ersten Fundstellen der Schlüsselwörter.
+
+        Gesucht wird nur zwischen start und end (Anfang/Ende sind ohnehin
+        enthalten); überlappende Ausschnitte werden zusammengefasst.
+
+        Returns:
+            Sortierte, disjunkte (Start, Ende)-Paare
+        """
+        middle = text[start:end].lower()
+        positions = []
+        for keyword in keywords:
+            pos = middle.find(keyword.lower()) if keyword else -1
+            if pos >= 0:
+                positions.append(start + pos)
+                if len(positions) == _MAX_KEYWORD_WINDOWS:
+                    break
+        if not positions or budget <= 0:
+            return []
+
+        width = min(_MAX_KEYWORD_WINDOW, budget // len(positions))
+        windows: list[tuple[int, int]] = []
+        for pos in sorted(positions):
+            window_start = max(start, pos - width // 2)
+            window_end = min(end, window_start + width)
+            if windows and window_start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], window_end))
+            else:
+                windows.append((window_start, window_end))
+        return windows
 
     def _build_classification_prompt(
         self,
@@ -172,7 +572,7 @@ class LLMProvider(ABC):
         Returns:
             Formatierter Prompt
         """
-        folder_list = "\n".join(f"- {folder}" for folder in available_folders)
+        folder_list = _format_folder_list(tuple(available_folders))
 
         keyword_info = ""
         if keywords:
@@ -182,26 +582,120 @@ class LLMProvider(ABC):
         if detected_date:
             date_info = f"\nErkanntes Datum im Dokument: {detected_date}"
 
+        return _CLASSIFICATION_PROMPT.format_map({
+            "folder_list": folder_list,
+            "text": self._truncate_text(text, keywords=keywords),
+            "keyword_info": keyword_info,
+            "date_info": date_info,
+        })
+
+    def _build_batch_classification_prompt(
+        self,
+        documents: list[dict],
+        available_folders: list[str],
+    ) -> str:
+        """
+        Erstellt einen Klassifikations-Prompt für mehrere Dokumente.
+
+        Args:
+            documents: Dicts mit "text" und optional "keywords"/"detected_date"
+            available_folders: Verfügbare Ordner
+
+        Returns:
+            Formatierter Prompt mit nummerierten Dokumentabschnitten
+        """
+        folder_list = _format_folder_list(tuple(available_folders))
+
+        sections = []
+        for i, document in enumerate(documents, 1):
+            text = self._truncate_text(document.get("text"), keywords=document.get("keywords"))
+            section = f"=== DOKUMENT {i} ===\n{text}"
+            if document.get("keywords"):
+                section += f"\nErkannte Schlüsselwörter: {', '.join(document['keywords'])}"
+            if document.get("detected_date"):
+                section += f"\nErkanntes Datum im Dokument: {document['detected_date']}"
+            sections.append(section)
+        document_list = "\n\n".join(sections)
+
         return f"""Du bist ein Assistent zum Sortieren von Dokumenten.
 
-Analysiere das folgende Dokument und wähle den passendsten Zielordner aus der Liste.
+Analysiere die Dokumente am Ende und wähle für JEDES Dokument den passendsten Zielordner aus der Liste.
 
 VERFÜGBARE ORDNER:
 {folder_list}
 
-DOKUMENTINHALT:
-{self._truncate_text(text)}
-{keyword_info}{date_info}
+Antworte NUR mit einem JSON-Objekt, Schlüssel ist die Dokumentnummer wie unten:
+{{"1": {{"folder": "Exakter Ordnername aus der Liste", "reason": "Kurze Begründung, max 1 Satz", "confidence": 0-100}}, "2": {{...}}}}
 
-AUFGABE:
-1. Analysiere den Dokumentinhalt
-2. Wähle den passendsten Ordner aus der Liste
-3. Begründe deine Wahl kurz
+DOKUMENTE ({len(documents)}):
+{document_list}"""
 
-Antworte im folgenden Format:
-ORDNER: [Exakter Ordnername aus der Liste]
-BEGRÜNDUNG: [Kurze Begründung, max 1-2 Sätze]
-KONFIDENZ: [Zahl von 0-100]"""
+    @staticmethod
+    def _read_until_classified(chunks: Iterable[str]) -> str:
+        """
+        Liest eine gestreamte Klassifikationsantwort nur so weit wie nötig.
+
+        Sobald das JSON-Objekt geschlossen ist bzw. die Zeilen ORDNER,
+        BEGRÜNDUNG und KONFIDENZ vollständig da sind, wird abgebrochen -
+        weiterer Text (Erklärungen o.ä.) würde nur Zeit kosten.
+
+        Returns:
+            Bisher empfangener Antworttext
+        """
+        parts: list[str] = []
+        for chunk in chunks:
+            parts.append(chunk)
+            if "}" in chunk or "\n" in chunk:
+                text = "".join(parts)
+                if "}" in chunk and _parse_json_object(text) is not None:
+                    break
+                complete_lines = text[:text.rfind("\n") + 1]
+                labels = {m.group(1) for m in _RESPONSE_LINE_RE.finditer(complete_lines)}
+                if _CLASSIFICATION_LABELS <= labels:
+                    break
+        return "".join(parts)
+
+    @staticmethod
+    def _split_prompt_prefix(prompt: str) -> tuple[str, str]:
+        """
+        Teilt einen Prompt für das Prompt-Caching der Anbieter.
+
+        Returns:
+            (gleichbleibender Anfang, dokumentabhängiger Rest); der Anfang
+            ist leer, wenn der Prompt keinen Dokumentabschnitt enthält
+        """
+        end = prompt.find(_DOCUMENT_SECTION_START)
+        if end < 0:
+            return "", prompt
+        return prompt[:end], prompt[end:]
+
+    @staticmethod
+    def _split_batch_response(response_text: str, count: int) -> list[Optional[str]]:
+        """
+        Teilt eine Sammelantwort in die Abschnitte der einzelnen Dokumente.
+
+        Erwartet wird ein JSON-Objekt {"1": {...}, "2": {...}}; hält sich
+        das Modell nicht daran, wird nach "DOKUMENT n"-Überschriften geteilt.
+
+        Returns:
+            Je Dokument der Antwortabschnitt oder None, falls er fehlt
+        """
+        data = _parse_json_object(response_text)
+        if data is not None and any(str(i) in data for i in range(1, count + 1)):
+            return [
+                json.dumps(data[str(i)], ensure_ascii=False)
+                if isinstance(data.get(str(i)), dict) else None
+                for i in range(1, count + 1)
+            ]
+
+        sections: list[Optional[str]] = [None] * count
+        headers = list(_BATCH_HEADER_RE.finditer(response_text))
+        for header, next_header in zip(headers, headers[1:] + [None]):
+            index = int(header.group(1)) - 1
+            if 0 <= index < count and sections[index] is None:
+                end = next_header.start() if next_header else len(response_text)
+                sections[index] = response_text[header.end():end]
+        return sections
 
     def _build_filename_prompt(
         self,
@@ -245,44 +739,15 @@ KONFIDENZ: [Zahl von 0-100]"""
         # Benutzer-Identität laden (damit LLM den Besitzer nicht als Korrespondent erkennt)
         owner_info = self._build_owner_info()
 
-        return f"""Du bist ein Assistent zum Benennen und Analysieren von Dokumenten.
-
-Analysiere das folgende Dokument und schlage einen aussagekräftigen Dateinamen vor.
-Extrahiere außerdem wichtige Metadaten aus dem Dokument.
-{owner_info}
-AKTUELLER DATEINAME: {current_filename}
-
-DOKUMENTINHALT:
-{self._truncate_text(text)}
-{keyword_info}{date_info}{file_date_info}{folder_info}
-
-REGELN FÜR DEN DATEINAMEN:
-1. Format: YYYY-MM-DD_Kategorie_Beschreibung.pdf (wenn Datum vorhanden)
-2. Nur Buchstaben, Zahlen, Unterstriche und Bindestriche verwenden
-3. Keine Sonderzeichen, keine Leerzeichen, keine Umlaute
-4. Maximal 80 Zeichen (ohne .pdf)
-5. Aussagekräftig und prägnant
-6. WICHTIG bei Rechnungen: Füge unterscheidende Details hinzu wie:
-   - Rechnungsnummer (z.B. RE-12345)
-   - Leistung/Betreff (z.B. Heizungswartung, Rohrbruch)
-   - Nicht nur den Firmennamen, da mehrere Rechnungen vom selben Absender existieren können
-   Beispiel: 2024-03-15_Rechnung_Meyer-Sanitaer_RE12345_Heizungswartung.pdf
-7. WICHTIG zum Datum:
-   - Verwende das Datum AUS DEM DOKUMENT (Rechnungsdatum, Briefdatum, etc.)
-   - Wenn KEIN Datum im Dokument steht, verwende das Änderungsdatum der Datei (Scandatum)
-   - NIEMALS ein Datum erfinden! Kein 2023 oder andere Phantasiedaten!
-
-Antworte im folgenden Format (jedes Feld in einer eigenen Zeile):
-DATEINAME: [Vorgeschlagener Dateiname mit .pdf]
-BEGRÜNDUNG: [Kurze Begründung, max 1-2 Sätze]
-KONFIDENZ: [Zahl von 0-100]
-KATEGORIE: [Rechnung/Vertrag/Steuer/Versicherung/Bank/Gehalt/Arzt/Energie/Sonstiges]
-KORRESPONDENT: [Firmenname oder Absender — NICHT der Dokumentbesitzer/Empfänger, sondern die ANDERE Partei, z.B. "Stadtwerke München GmbH"]
-BETRAG: [Rechnungsbetrag in Format 123.45 oder UNBEKANNT]
-WAEHRUNG: [EUR/USD oder UNBEKANNT]
-MWST: [Mehrwertsteuersatz als Zahl: 7/19 oder UNBEKANNT]
-STEUERJAHR: [Steuerjahr als vierstellige Zahl, z.B. 2024, oder UNBEKANNT]
-ZUSAMMENFASSUNG: [Kurze Zusammenfassung des Dokuments in einem Satz]"""
+        return _FILENAME_PROMPT.format_map({
+            "owner_info": owner_info,
+            "current_filename": current_filename,
+            "text": self._truncate_text(text, keywords=keywords),
+            "keyword_info": keyword_info,
+            "date_info": date_info,
+            "file_date_info": file_date_info,
+            "folder_info": folder_info,
+        })
 
     def _build_owner_info(self) -> str:
         """Erstellt den Benutzer-Identitäts-Abschnitt für den Prompt."""
@@ -316,6 +781,9 @@ ZUSAMMENFASSUNG: [Kurze Zusammenfassung des Dokuments in einem Satz]"""
         """
         Parst die LLM-Antwort inkl. Metadaten-Felder.
 
+        JSON-Antworten werden direkt gelesen; Antworten im Zeilen-Format
+        ("ORDNER: ...") über den Regex-Parser.
+
         Args:
             response_text: Rohe Antwort vom LLM
 
@@ -330,41 +798,27 @@ ZUSAMMENFASSUNG: [Kurze Zusammenfassung des Dokuments in einem Satz]"""
             "metadata": {},
         }
 
-        # Mapping von LLM-Ausgabefeldern zu Metadaten-Keys
-        metadata_fields = {
-            "KATEGORIE:": "subject",
-            "KORRESPONDENT:": "korrespondent",
-            "BETRAG:": "betrag",
-            "WAEHRUNG:": "waehrung",
-            "MWST:": "mwst_satz",
-            "STEUERJAHR:": "steuerjahr",
-            "ZUSAMMENFASSUNG:": "description",
-        }
-
-        lines = response_text.strip().split("\n")
-        for line in lines:
-            line = line.strip()
-            if line.startswith("ORDNER:"):
-                result["folder"] = line.replace("ORDNER:", "").strip()
-            elif line.startswith("DATEINAME:"):
-                result["filename"] = line.replace("DATEINAME:", "").strip()
-            elif line.startswith("BEGRÜNDUNG:"):
-                result["reason"] = line.replace("BEGRÜNDUNG:", "").strip()
-            elif line.startswith("KONFIDENZ:"):
-                try:
-                    conf_str = line.replace("KONFIDENZ:", "").strip()
-                    conf_str = conf_str.replace("%", "")
-                    result["confidence"] = float(conf_str) / 100.0
-                except ValueError:
-                    result["confidence"] = 0.5
-            else:
-                # Metadaten-Felder parsen
-                for prefix, key in metadata_fields.items():
-                    if line.startswith(prefix):
-                        value = line.replace(prefix, "").strip()
-                        # "UNBEKANNT" oder leere Werte ignorieren
-                        if value and value.upper() not in ("UNBEKANNT", "KEINE", "N/A", "-", ""):
-                            result["metadata"][key] = value
-                        break
+        data = _parse_json_object(response_text)
+        if data is not None:
+            for key in ("folder", "filename", "reason"):
+                if data.get(key):
+                    result[key] = str(data[key]).strip()
+            if data.get("confidence") is not None:
+                result["confidence"] = _parse_confidence(data["confidence"])
+            return result
+
+        for match in _RESPONSE_LINE_RE.finditer(response_text):
+            label, value = match.group(1), match.group(2)
+            if label == "ORDNER":
+                result["folder"] = value
+            elif label == "DATEINAME":
+                result["filename"] = value
+            elif label == "BEGRÜNDUNG":
+                result["reason"] = value
+            elif label == "KONFIDENZ":
+                result["confidence"] = _parse_confidence(value)
+            elif value.upper() not in _EMPTY_METADATA_VALUES:
+                # "UNBEKANNT" oder leere Werte ignorieren
+                result["metadata"][_METADATA_FIELDS[label]] = value
 
         return result
@@ -127,10 +127,19 @@ class OllamaProvider(LLMProvider):
     # Interne HTTP-Hilfsfunktion                                         #
     # ------------------------------------------------------------------ #
 
-    def _chat(self, system_prompt: str, user_prompt: str) -> tuple[Optional[str], Optional[str]]:
+    def _chat(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        json_mode: bool = False,
+    ) -> tuple[Optional[str], Optional[str]]:
         """
         Schickt einen Chat-Request an Ollama.
 
+        max_tokens begrenzt die Antwortlänge; mit json_mode erzwingt
+        Ollama eine gültige JSON-Antwort.
+
         Returns:
             (response_text, error_message). Genau eins ist None.
         """
@@ -144,9 +153,11 @@ class OllamaProvider(LLMProvider):
             ],
             "options": {
                 "temperature": self.config.temperature,
-                "num_predict": self.config.max_tokens,
+                "num_predict": max_tokens,
             },
         }
+        if json_mode:
+            payload["format"] = "json"
 
         body = json.dumps(payload).encode("utf-8")
         req = urllib.request.Request(
@@ -184,7 +195,7 @@ class OllamaProvider(LLMProvider):
         """
         Entfernt Markdown-Code-Fences, falls das Modell die Antwort
         in ``` eingewickelt hat. Lokale Modelle tun das oft, obwohl der
-        Prompt KEIN JSON verlangt.
+        Prompt das nicht verlangt.
         """
         s = text.strip()
         if s.startswith("```"):
@@ -221,11 +232,13 @@ class OllamaProvider(LLMProvider):
         # bestehen, sonst kommen Erklaerungen, Code-Fences etc. mit.
         system_prompt = (
             "Du bist ein Assistent zum Sortieren von Dokumenten. "
-            "Antworte AUSSCHLIESSLICH im geforderten Zeilen-Format. "
+            "Antworte AUSSCHLIESSLICH mit dem geforderten JSON-Objekt. "
             "Keine Einleitung, keine Erklaerung, keine Code-Bloecke."
         )
 
-        response_text, error = self._chat(system_prompt, prompt)
+        response_text, error = self._chat(
+            system_prompt, prompt, self._classification_max_tokens(), json_mode=True
+        )
         if error:
             return LLMResponse(success=False, error_message=error)
 
@@ -269,7 +282,7 @@ class OllamaProvider(LLMProvider):
             "Keine Einleitung, keine Erklaerung, keine Code-Bloecke, kein JSON."
         )
 
-        response_text, error = self._chat(system_prompt, prompt)
+        response_text, error = self._chat(system_prompt, prompt, self._filename_max_tokens())
         if error:
             return LLMResponse(success=False, error_message=error)
 
@@ -292,35 +305,3 @@ class OllamaProvider(LLMProvider):
     # ------------------------------------------------------------------ #
     # Helfer (gleich wie in den anderen Providern)                       #
     # ------------------------------------------------------------------ #
-
-    def _find_similar_folder(
-        self, suggested: str, available: list[str]
-    ) -> Optional[str]:
-        """Findet einen aehnlichen Ordner aus der Liste."""
-        suggested_lower = suggested.lower()
-        for folder in available:
-            if folder.lower() == suggested_lower:
-                return folder
-        for folder in available:
-            if suggested_lower in folder.lower() or folder.lower() in suggested_lower:
-                return folder
-        return None
-
-    def _sanitize_filename(self, filename: str) -> str:
-        """Bereinigt einen Dateinamen."""
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, "_")
-        replacements = {
-            "ä": "ae", "ö": "oe", "ü": "ue",
-            "Ä": "Ae", "Ö": "Oe", "Ü": "Ue",
-            "ß": "ss",
-        }
-        for old, new in replacements.items():
-            filename = filename.replace(old, new)
-        filename = filename.replace(" ", "_")
-        if not filename.lower().endswith(".pdf"):
-            filename += ".pdf"
-        if len(filename) > 84:  # 80 + .pdf
-            filename = filename[:80] + ".pdf"
-        return filename
@@ -0,0 +1,230 @@
+"""
+OpenAI Batch-API für PDF Sortier Meister
+
+Klassifiziert große Mengen Dokumente (z.B. die erste Sortierung eines
+Archivs) über die Batch-API von OpenAI: alle Anfragen werden als JSONL-
+Datei hochgeladen und innerhalb von 24 Stunden abgearbeitet. Das kostet
+die Hälfte und unterliegt nicht den Anfrage-Limits pro Minute, eignet
+sich aber nur für Läufe, bei denen niemand auf das Ergebnis wartet.
+
+MIT License - Copyright (c) 2026
+"""
+
+import json
+import logging
+import time
+from typing import Callable, Optional
+
+from src.ml.llm_provider import LLMResponse
+from src.ml.openai_provider import OpenAIProvider
+
+logger = logging.getLogger("pdf_sortier_meister.openai_batch")
+
+# Endpunkt, an den die einzelnen Batch-Anfragen gehen
+_ENDPOINT = "/v1/chat/completions"
+
+# Status, in denen sich ein Batch nicht mehr ändert
+_FINAL_STATUSES = frozenset(("completed", "failed", "expired", "cancelled"))
+
+
+class OpenAIBatchJob:
+    """Ein Klassifikationslauf über die OpenAI Batch-API."""
+
+    def __init__(
+        self,
+        provider: OpenAIProvider,
+        poll_interval: float = 10.0,
+        max_poll_interval: float = 300.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialisiert den Lauf.
+
+        Args:
+            provider: Konfigurierter OpenAI-Provider (Client, Modell, Limits)
+            poll_interval: Erste Wartezeit zwischen Statusabfragen (Sekunden)
+            max_poll_interval: Obergrenze der (verdoppelten) Wartezeit
+            sleep: Wartefunktion (für Tests austauschbar)
+        """
+        self.provider = provider
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._sleep = sleep
+
+    def build_requests(
+        self, documents: dict[str, dict], available_folders: list[str]
+    ) -> list[dict]:
+        """
+        Erstellt die Zeilen der JSONL-Eingabedatei.
+
+        Args:
+            documents: Dokument-ID -> Dict mit "text" und optional
+                "keywords"/"detected_date"
+            available_folders: Verfügbare Ordner (für alle gleich)
+
+        Returns:
+            Je Dokument eine Batch-Anfrage (custom_id = Dokument-ID)
+        """
+        return [
+            {
+                "custom_id": document_id,
+                "method": "POST",
+                "url": _ENDPOINT,
+                "body": self.provider._classification_request(
+                    self.provider._build_classification_prompt(
+                        document.get("text"),
+                        available_folders,
+                        document.get("keywords"),
+                        document.get("detected_date"),
+                    ),
+                    available_folders,
+                ),
+            }
+            for document_id, document in documents.items()
+        ]
+
+    def submit(self, documents: dict[str, dict], available_folders: list[str]) -> str:
+        """
+        Lädt die Anfragen hoch und startet den Batch.
+
+        Returns:
+            ID des Batches
+        """
+        lines = self.build_requests(documents, available_folders)
+        payload = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines)
+        client = self.provider._client
+        input_file = client.files.create(
+            file=("pdf_sortier_meister_batch.jsonl", payload.encode("utf-8")),
+            purpose="batch",
+        )
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=_ENDPOINT,
+            completion_window="24h",
+        )
+        logger.info(f"OpenAI-Batch {batch.id} mit {len(lines)} Dokumenten gestartet")
+        return batch.id
+
+    def wait(self, batch_id: str, timeout: Optional[float] = None):
+        """
+        Wartet mit wachsendem Abstand, bis der Batch abgeschlossen ist.
+
+        Args:
+            batch_id: ID des Batches
+            timeout: Maximale Wartezeit in Sekunden (None = unbegrenzt)
+
+        Returns:
+            Letzter Batch-Status (ggf. noch nicht abgeschlossen bei Timeout)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = self.poll_interval
+        while True:
+            batch = self.provider._client.batches.retrieve(batch_id)
+            if batch.status in _FINAL_STATUSES:
+                return batch
+            if deadline is not None and time.monotonic() + interval > deadline:
+                return batch
+            self._sleep(interval)
+            interval = min(interval * 2, self.max_poll_interval)
+
+    def cancel(self, batch_id: str):
+        """
+        Bricht einen noch laufenden Batch ab (z.B. nach einem Timeout).
+
+        Ohne Abbruch liefe er bei OpenAI weiter und würde berechnet, obwohl
+        niemand mehr auf das Ergebnis wartet. Fehler werden nur geloggt.
+        """
+        try:
+            self.provider._client.batches.cancel(batch_id)
+            logger.warning(f"OpenAI-Batch {batch_id} nach Zeitüberschreitung abgebrochen")
+        except Exception as e:
+            logger.error(f"OpenAI-Batch {batch_id} konnte nicht abgebrochen werden: {e}")
+
+    def collect(
+        self, batch, document_ids: list[str], available_folders: list[str]
+    ) -> dict[str, LLMResponse]:
+        """
+        Liest die Ergebnisdatei eines Batches aus.
+
+        Returns:
+            Dokument-ID -> LLMResponse (Fehlerantwort für fehlende Ergebnisse)
+        """
+        results: dict[str, LLMResponse] = {}
+        output_file_id = getattr(batch, "output_file_id", None)
+        if output_file_id:
+            content = self.provider._client.files.content(output_file_id).text
+            for line in content.splitlines():
+                if line.strip():
+                    custom_id, response = self._parse_result_line(line, available_folders)
+                    results[custom_id] = response
+
+        missing = LLMResponse(
+            success=False,
+            error_message=f"Keine Antwort aus OpenAI-Batch (Status: {batch.status}).",
+        )
+        return {document_id: results.get(document_id, missing) for document_id in document_ids}
+
+    def _parse_result_line(
+        self, line: str, available_folders: list[str]
+    ) -> tuple[str, LLMResponse]:
+        """Wandelt eine Zeile der Ergebnisdatei in (custom_id, LLMResponse) um."""
+        result = json.loads(line)
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            error = result.get("error") or response.get("body", {}).get("error") or {}
+            return result["custom_id"], LLMResponse(
+                success=False,
+                error_message=f"OpenAI-Batch Fehler: {error.get('message', 'unbekannt')}",
+            )
+
+        body = response["body"]
+        usage = body.get("usage") or {}
+        return result["custom_id"], self.provider._classification_result(
+            body["choices"][0]["message"]["content"],
+            usage.get("total_tokens", 0),
+            available_folders,
+        )
+
+    def run(
+        self,
+        documents: dict[str, dict],
+        available_folders: list[str],
+        timeout: Optional[float] = None,
+    ) -> dict[str, LLMResponse]:
+        """
+        Startet einen Batch, wartet darauf und liefert die Ergebnisse.
+
+        Args:
+            documents: Dokument-ID -> Dict mit "text" und optional
+                "keywords"/"detected_date"
+            available_folders: Verfügbare Ordner
+            timeout: Maximale Wartezeit in Sekunden (None = unbegrenzt);
+                ein danach noch laufender Batch wird abgebrochen
+
+        Returns:
+            Dokument-ID -> LLMResponse
+        """
+        if not documents:
+            return {}
+        if not self.provider.is_available() or not available_folders:
+            return {
+                document_id: LLMResponse(
+                    success=False,
+                    error_message="OpenAI API nicht verfügbar oder keine Zielordner.",
+                )
+                for document_id in documents
+            }
+
+        try:
+            batch = self.wait(self.submit(documents, available_folders), timeout)
+            if batch.status not in _FINAL_STATUSES:
+                self.cancel(batch.id)
+            return self.collect(batch, list(documents), available_folders)
+        except Exception as e:
+            logger.error(f"OpenAI-Batch fehlgeschlagen: {e}")
+            return {
+                document_id: LLMResponse(
+                    success=False, error_message=f"OpenAI-Batch Fehler: {str(e)}"
+                )
+                for document_id in documents
+            }
@@ -0,0 +1,186 @@
+"""
+Gemeinsame OpenAI-Clients für PDF Sortier Meister
+
+Ein openai.OpenAI-Client hält einen Verbindungspool; pro Provider-Instanz
+einen neuen anzulegen hieße, für jede Instanz erneut TCP- und TLS-
+Verbindungen aufzubauen. Alle Provider mit demselben Endpunkt und API-Key
+(OpenAI, Poe) teilen sich daher einen Client.
+
+Asynchrone Clients (openai.AsyncOpenAI) binden ihre Verbindungen an die
+Event-Loop, in der sie geöffnet wurden; sie werden deshalb je laufender
+Loop geteilt.
+
+MIT License - Copyright (c) 2026
+"""
+
+import asyncio
+import atexit
+import threading
+import weakref
+from functools import lru_cache
+from typing import Optional
+
+from src.ml.llm_provider import LLMProvider
+
+# Verbindungsgrenzen des gemeinsamen Pools
+_MAX_KEEPALIVE_CONNECTIONS = 20
+_MAX_CONNECTIONS = 50
+
+# Zeitlimit je Anfrage in Sekunden (Sammelanfragen brauchen länger als einzelne)
+_TIMEOUT = 60.0
+
+# (base_url, api_key, max_retries) -> openai.OpenAI
+_clients: dict[tuple[str, str, int], object] = {}
+_clients_lock = threading.Lock()
+
+# Event-Loop -> {(base_url, api_key, max_retries): openai.AsyncOpenAI};
+# endet eine Loop, fallen ihre Clients mit ihr weg
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _http_limits(httpx):
+    """Verbindungsgrenzen des gemeinsamen Pools."""
+    return httpx.Limits(
+        max_keepalive_connections=_MAX_KEEPALIVE_CONNECTIONS,
+        max_connections=_MAX_CONNECTIONS,
+    )
+
+
+@lru_cache(maxsize=1)
+def load_openai():
+    """
+    Importiert das openai-Paket (nur beim ersten Aufruf).
+
+    Returns:
+        Das openai-Modul oder None, wenn es nicht installiert ist (die
+        Warnung erscheint dann nur einmal, nicht je Provider-Instanz)
+    """
+    try:
+        import openai
+    except ImportError:
+        print("Warnung: openai Paket nicht installiert. "
+              "Installieren mit: pip install openai")
+        return None
+    return openai
+
+
+def get_openai_client(api_key: str, base_url: Optional[str] = None, max_retries: int = 2):
+    """
+    Gibt den gemeinsamen Client für Endpunkt und API-Key zurück.
+
+    Args:
+        api_key: API-Key
+        base_url: Endpunkt eines OpenAI-kompatiblen Anbieters (None = OpenAI)
+        max_retries: Wiederholungen bei Rate-Limit-/Serverfehlern (das SDK
+            wartet dazwischen gemäß Retry-After bzw. mit Backoff und Jitter)
+
+    Returns:
+        openai.OpenAI
+
+    Raises:
+        ImportError: Wenn das openai-Paket nicht installiert ist
+    """
+    openai = load_openai()
+    if openai is None:
+        raise ImportError("openai")
+    key = (base_url or "", api_key, max_retries)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            import httpx
+            client = openai.OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=max_retries,
+                http_client=httpx.Client(limits=_http_limits(httpx), timeout=_TIMEOUT),
+            )
+            _clients[key] = client
+        return client
+
+
+def get_async_openai_client(api_key: str, base_url: Optional[str] = None, max_retries: int = 2):
+    """
+    Gibt den gemeinsamen asynchronen Client für Endpunkt und API-Key zurück.
+
+    Muss innerhalb einer laufenden Event-Loop aufgerufen werden; der Client
+    gilt nur für diese Loop.
+
+    Args:
+        api_key: API-Key
+        base_url: Endpunkt eines OpenAI-kompatiblen Anbieters (None = OpenAI)
+        max_retries: Wiederholungen bei Rate-Limit-/Serverfehlern
+
+    Returns:
+        openai.AsyncOpenAI
+
+    Raises:
+        ImportError: Wenn das openai-Paket nicht installiert ist
+        RuntimeError: Wenn keine Event-Loop läuft
+    """
+    openai = load_openai()
+    if openai is None:
+        raise ImportError("openai")
+    loop = asyncio.get_running_loop()
+    key = (base_url or "", api_key, max_retries)
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            import httpx
+            client = openai.AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=max_retries,
+                http_client=httpx.AsyncClient(limits=_http_limits(httpx), timeout=_TIMEOUT),
+            )
+            clients[key] = client
+        return client
+
+
+def stream_chat_completion(client, request: dict) -> tuple[str, int]:
+    """
+    Streamt eine Klassifikationsantwort und bricht ab, sobald sie vollständig ist.
+
+    Args:
+        client: openai.OpenAI (oder kompatibler Client)
+        request: Parameter für chat.completions.create
+
+    Returns:
+        Tuple (Antworttext, verbrauchte Tokens - 0, wenn die Nutzungsdaten
+        wegen des Abbruchs nicht mehr ankamen)
+    """
+    stream = client.chat.completions.create(**request, stream=True)
+    usage: list[int] = []
+
+    def deltas():
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage.append(chunk.usage.total_tokens)
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
+    try:
+        text = LLMProvider._read_until_classified(deltas())
+    finally:
+        stream.close()
+    return text, usage[-1] if usage else 0
+
+
+def close_openai_clients():
+    """Schließt alle gemeinsamen Clients (beim Beenden des Programms)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        # Asynchrone Clients lassen sich nur in ihrer Loop schließen; hier
+        # werden sie nur freigegeben
+        _async_clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+atexit.register(close_openai_clients)
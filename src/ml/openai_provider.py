@@ -6,9 +6,50 @@ Implementiert die LLM-Schnittstelle für OpenAI's GPT API.
 MIT License - Copyright (c) 2026
 """
 
+from functools import lru_cache
 from typing import Optional
 
+from src.ml.batch_runner import BatchRunner
 from src.ml.llm_provider import LLMProvider, LLMConfig, LLMResponse
+from src.ml.openai_clients import (
+    get_async_openai_client,
+    get_openai_client,
+    load_openai,
+    stream_chat_completion,
+)
+
+# Modelle ohne Structured Outputs (json_schema); sie bekommen nur den JSON-Modus
+_JSON_MODE_ONLY_MODELS = ("gpt-3.5", "gpt-4-", "chatgpt")
+
+# Grenzen von OpenAI für enum-Werte in einem Schema; größere Ordnerlisten
+# werden als freier Text angefragt und per _find_similar_folder zugeordnet
+_MAX_ENUM_VALUES = 500
+_MAX_ENUM_CHARS = 7500
+
+
+@lru_cache(maxsize=32)
+def _classification_schema(folders: tuple[str, ...]) -> dict:
+    """Antwortschema einer Klassifikation; folder ist auf die Ordnerliste beschränkt."""
+    folder_schema = {"type": "string"}
+    if len(folders) <= _MAX_ENUM_VALUES and sum(map(len, folders)) <= _MAX_ENUM_CHARS:
+        folder_schema["enum"] = list(folders)
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "folder_suggestion",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "folder": folder_schema,
+                    "reason": {"type": "string"},
+                    "confidence": {"type": "integer"},
+                },
+                "required": ["folder", "reason", "confidence"],
+                "additionalProperties": False,
+            },
+        },
+    }
 
 
 class OpenAIProvider(LLMProvider):
@@ -32,6 +73,8 @@ class OpenAIProvider(LLMProvider):
 
     DEFAULT_MODEL = "gpt-4.1-nano"  # Günstigstes aktuelles Modell
 
+    SUPPORTS_BATCH_PROMPT = True
+
     def __init__(self, config: LLMConfig):
         """
         Initialisiert den OpenAI Provider.
@@ -48,14 +91,14 @@ class OpenAIProvider(LLMProvider):
         if not self.config.api_key:
             return
 
+        self._openai = load_openai()
+        if self._openai is None:
+            return
+
         try:
-            import openai
-            self._openai = openai
-            self._client = openai.OpenAI(api_key=self.config.api_key)
-        except ImportError:
-            print("Warnung: openai Paket nicht installiert. "
-                  "Installieren mit: pip install openai")
-            self._client = None
+            self._client = get_openai_client(
+                self.config.api_key, max_retries=self.config.max_retries
+            )
         except Exception as e:
             print(f"Fehler bei OpenAI-Initialisierung: {e}")
             self._client = None
@@ -74,6 +117,25 @@ class OpenAIProvider(LLMProvider):
             return model
         return self.MODELS[self.DEFAULT_MODEL]
 
+    def _complete(self, prompt: str, max_tokens: int) -> tuple[str, int]:
+        """Sendet einen einzelnen Prompt an OpenAI (für Sammelanfragen)."""
+        response = self._client.chat.completions.create(
+            model=self._get_model_id(),
+            max_tokens=max_tokens,
+            temperature=self.config.temperature,
+            response_format={"type": "json_object"},
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Du bist ein Assistent zum Sortieren von Dokumenten. "
+                               "Antworte präzise im geforderten JSON-Format."
+                },
+                {"role": "user", "content": prompt}
+            ]
+        )
+        tokens_used = response.usage.total_tokens if response.usage else 0
+        return response.choices[0].message.content, tokens_used
+
     def classify_document(
         self,
         text: str,
@@ -93,78 +155,170 @@ class OpenAIProvider(LLMProvider):
         Returns:
             LLMResponse mit Ordnervorschlag
         """
-        if not self.is_available():
-            return LLMResponse(
-                success=False,
-                error_message="OpenAI API nicht verfügbar. API-Key prüfen."
-            )
+        error = self._check_classification_input(available_folders)
+        if error:
+            return error
 
-        if not available_folders:
-            return LLMResponse(
-                success=False,
-                error_message="Keine Zielordner verfügbar."
+        prompt = self._build_classification_prompt(
+            text, available_folders, keywords, detected_date
+        )
+
+        try:
+            if self.config.stream:
+                response_text, tokens_used = stream_chat_completion(
+                    self._client, self._classification_request(prompt, available_folders)
+                )
+                return self._classification_result(
+                    response_text,
+                    tokens_used or self._estimate_used_tokens(prompt, response_text),
+                    available_folders,
+                )
+            response = self._client.chat.completions.create(
+                **self._classification_request(prompt, available_folders)
+            )
+            return self._classification_result(
+                response.choices[0].message.content,
+                response.usage.total_tokens if response.usage else 0,
+                available_folders,
             )
+        except Exception as e:
+            return self._classification_error(e)
 
+    async def classify_document_async(
+        self,
+        text: str,
+        available_folders: list[str],
+        keywords: list[str] = None,
+        detected_date: str = None,
+    ) -> LLMResponse:
+        """Wie classify_document, aber über den asynchronen Client."""
+        error = self._check_classification_input(available_folders)
+        if error:
+            return error
         prompt = self._build_classification_prompt(
             text, available_folders, keywords, detected_date
         )
 
         try:
-            response = self._client.chat.completions.create(
-                model=self._get_model_id(),
-                max_tokens=self.config.max_tokens,
-                temperature=self.config.temperature,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Du bist ein Assistent zum Sortieren von Dokumenten. "
-                                   "Antworte präzise im geforderten Format."
-                    },
-                    {"role": "user", "content": prompt}
-                ]
+            # Für parallele Anfragen (classify_batch); erst hier angelegt und
+            # mit allen Providern desselben Endpunkts und Keys geteilt
+            client = get_async_openai_client(
+                self.config.api_key, max_retries=self.config.max_retries
+            )
+            response = await client.chat.completions.create(
+                **self._classification_request(prompt, available_folders)
             )
+            return self._classification_result(
+                response.choices[0].message.content,
+                response.usage.total_tokens if response.usage else 0,
+                available_folders,
+            )
+        except Exception as e:
+            return self._classification_error(e)
 
-            response_text = response.choices[0].message.content
-            parsed = self._parse_response(response_text)
+    async def classify_batch(
+        self, documents: list[dict], runner: Optional[BatchRunner] = None
+    ) -> list[LLMResponse]:
+        """
+        Klassifiziert mehrere Dokumente mit parallelen API-Anfragen.
 
-            # Prüfen ob der vorgeschlagene Ordner existiert
-            suggested_folder = parsed.get("folder")
-            if suggested_folder and suggested_folder not in available_folders:
-                suggested_folder = self._find_similar_folder(
-                    suggested_folder, available_folders
-                )
+        Args:
+            documents: Je Dokument ein Dict mit den Argumenten von
+                classify_document (text, available_folders, keywords, detected_date)
+            runner: Parallelität und Limits (Standard: 10 gleichzeitig, ohne Limits)
 
-            tokens_used = response.usage.total_tokens if response.usage else 0
+        Returns:
+            Je Dokument eine LLMResponse (gleiche Reihenfolge)
+        """
+        async def classify_one(document: dict) -> LLMResponse:
+            return await self.classify_document_async(**document)
 
-            return LLMResponse(
-                success=True,
-                folder_suggestion=suggested_folder,
-                folder_reason=parsed.get("reason"),
-                confidence=parsed.get("confidence", 0.5),
-                tokens_used=tokens_used,
-            )
+        return await (runner or BatchRunner()).run(
+            documents,
+            classify_one,
+            lambda d: self._estimate_classification_tokens(d.get("text"), d["available_folders"]),
+        )
 
-        except self._openai.APIConnectionError:
-            return LLMResponse(
-                success=False,
-                error_message="Keine Verbindung zur OpenAI API."
-            )
-        except self._openai.RateLimitError:
+    def _check_classification_input(
+        self, available_folders: list[str]
+    ) -> Optional[LLMResponse]:
+        """Gibt eine Fehlerantwort zurück, falls nicht klassifiziert werden kann."""
+        if not self.is_available():
             return LLMResponse(
                 success=False,
-                error_message="OpenAI API Rate-Limit erreicht. Bitte später versuchen."
+                error_message="OpenAI API nicht verfügbar. API-Key prüfen."
             )
-        except self._openai.AuthenticationError:
+
+        if not available_folders:
             return LLMResponse(
                 success=False,
-                error_message="Ungültiger OpenAI API-Key."
+                error_message="Keine Zielordner verfügbar."
             )
-        except Exception as e:
-            return LLMResponse(
-                success=False,
-                error_message=f"OpenAI API Fehler: {str(e)}"
+
+        return None
+
+    def _classification_error(self, error: Exception) -> LLMResponse:
+        """Übersetzt einen API-Fehler in eine verständliche Fehlerantwort."""
+        openai = self._openai
+        if openai and isinstance(error, openai.APIConnectionError):
+            message = "Keine Verbindung zur OpenAI API."
+        elif openai and isinstance(error, openai.RateLimitError):
+            message = "OpenAI API Rate-Limit erreicht. Bitte später versuchen."
+        elif openai and isinstance(error, openai.AuthenticationError):
+            message = "Ungültiger OpenAI API-Key."
+        else:
+            message = f"OpenAI API Fehler: {str(error)}"
+        return LLMResponse(success=False, error_message=message)
+
+    def _classification_request(self, prompt: str, available_folders: list[str]) -> dict:
+        """
+        Parameter einer Klassifikationsanfrage an chat.completions.
+
+        Mit Structured Outputs ist die Antwort garantiert gültiges JSON
+        und der Ordner einer aus der Liste. Wird auch für die Batch-API
+        verwendet (siehe openai_batch).
+        """
+        model = self._get_model_id()
+        if model == "gpt-4" or model.startswith(_JSON_MODE_ONLY_MODELS):
+            response_format = {"type": "json_object"}
+        else:
+            response_format = _classification_schema(tuple(available_folders))
+        return {
+            "model": model,
+            "max_tokens": self._classification_max_tokens(),
+            "temperature": self.config.temperature,
+            "response_format": response_format,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "Du bist ein Assistent zum Sortieren von Dokumenten. "
+                               "Antworte präzise im geforderten JSON-Format."
+                },
+                {"role": "user", "content": prompt}
+            ],
+        }
+
+    def _classification_result(
+        self, response_text: str, tokens_used: int, available_folders: list[str]
+    ) -> LLMResponse:
+        """Wertet die Antwort einer Klassifikationsanfrage aus."""
+        parsed = self._parse_response(response_text)
+
+        # Prüfen ob der vorgeschlagene Ordner existiert
+        suggested_folder = parsed.get("folder")
+        if suggested_folder and suggested_folder not in available_folders:
+            suggested_folder = self._find_similar_folder(
+                suggested_folder, available_folders
             )
 
+        return LLMResponse(
+            success=True,
+            folder_suggestion=suggested_folder,
+            folder_reason=parsed.get("reason"),
+            confidence=parsed.get("confidence", 0.5),
+            tokens_used=tokens_used,
+        )
+
     def suggest_filename(
         self,
         text: str,
@@ -201,7 +355,7 @@ class OpenAIProvider(LLMProvider):
         try:
             response = self._client.chat.completions.create(
                 model=self._get_model_id(),
-                max_tokens=self.config.max_tokens,
+                max_tokens=self._filename_max_tokens(),
                 temperature=self.config.temperature,
                 messages=[
                     {
@@ -237,67 +391,3 @@ class OpenAIProvider(LLMProvider):
                 success=False,
                 error_message=f"OpenAI API Fehler: {str(e)}"
             )
-
-    def _find_similar_folder(
-        self, suggested: str, available: list[str]
-    ) -> Optional[str]:
-        """
-        Findet einen ähnlichen Ordner aus der Liste.
-
-        Args:
-            suggested: Vorgeschlagener Ordnername
-            available: Verfügbare Ordner
-
-        Returns:
-            Ähnlicher Ordnername oder None
-        """
-        suggested_lower = suggested.lower()
-
-        # Exakte Übereinstimmung (case-insensitive)
-        for folder in available:
-            if folder.lower() == suggested_lower:
-                return folder
-
-        # Teilübereinstimmung
-        for folder in available:
-            if suggested_lower in folder.lower() or folder.lower() in suggested_lower:
-                return folder
-
-        return None
-
-    def _sanitize_filename(self, filename: str) -> str:
-        """
-        Bereinigt einen Dateinamen.
-
-        Args:
-            filename: Roher Dateiname
-
-        Returns:
-            Bereinigter Dateiname
-        """
-        # Entferne ungültige Zeichen
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, "_")
-
-        # Umlaute ersetzen
-        replacements = {
-            "ä": "ae", "ö": "oe", "ü": "ue",
-            "Ä": "Ae", "Ö": "Oe", "Ü": "Ue",
-            "ß": "ss"
-        }
-        for old, new in replacements.items():
-            filename = filename.replace(old, new)
-
-        # Leerzeichen durch Unterstriche
-        filename = filename.replace(" ", "_")
-
-        # Sicherstellen, dass .pdf Endung vorhanden
-        if not filename.lower().endswith(".pdf"):
-            filename += ".pdf"
-
-        # Maximale Länge
-        if len(filename) > 84:  # 80 + .pdf
-            filename = filename[:80] + ".pdf"
-
-        return filename
@@ -8,9 +8,8 @@ Poe bietet Zugang zu verschiedenen Modellen (GPT, Claude, Gemini, etc.)
 MIT License - Copyright (c) 2026
 """
 
-from typing import Optional
-
 from src.ml.llm_provider import LLMProvider, LLMConfig, LLMResponse
+from src.ml.openai_clients import get_openai_client, load_openai, stream_chat_completion
 
 
 class PoeProvider(LLMProvider):
@@ -52,6 +51,8 @@ class PoeProvider(LLMProvider):
     # Poe API Base URL
     BASE_URL = "https://api.poe.com/v1"
 
+    SUPPORTS_BATCH_PROMPT = True
+
     def __init__(self, config: LLMConfig):
         """
         Initialisiert den Poe Provider.
@@ -68,17 +69,14 @@ class PoeProvider(LLMProvider):
         if not self.config.api_key:
             return
 
+        self._openai = load_openai()
+        if self._openai is None:
+            return
+
         try:
-            import openai
-            self._openai = openai
-            self._client = openai.OpenAI(
-                api_key=self.config.api_key,
-                base_url=self.BASE_URL,
+            self._client = get_openai_client(
+                self.config.api_key, self.BASE_URL, self.config.max_retries
             )
-        except ImportError:
-            print("Warnung: openai Paket nicht installiert. "
-                  "Installieren mit: pip install openai")
-            self._client = None
         except Exception as e:
             print(f"Fehler bei Poe-Initialisierung: {e}")
             self._client = None
@@ -101,6 +99,25 @@ class PoeProvider(LLMProvider):
 
         return self.DEFAULT_MODEL
 
+    def _complete(self, prompt: str, max_tokens: int) -> tuple[str, int]:
+        """Sendet einen einzelnen Prompt an Poe (für Sammelanfragen)."""
+        # Kein response_format: nicht jedes Poe-Modell unterstützt den JSON-Modus
+        response = self._client.chat.completions.create(
+            model=self._get_model_id(),
+            max_tokens=max_tokens,
+            temperature=self.config.temperature,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Du bist ein Assistent zum Sortieren von Dokumenten. "
+                               "Antworte präzise im geforderten JSON-Format."
+                },
+                {"role": "user", "content": prompt}
+            ]
+        )
+        tokens_used = response.usage.total_tokens if response.usage else 0
+        return response.choices[0].message.content, tokens_used
+
     def classify_document(
         self,
         text: str,
@@ -136,22 +153,31 @@ class PoeProvider(LLMProvider):
             text, available_folders, keywords, detected_date
         )
 
+        request = {
+            "model": self._get_model_id(),
+            "max_tokens": self._classification_max_tokens(),
+            "temperature": self.config.temperature,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "Du bist ein Assistent zum Sortieren von Dokumenten. "
+                               "Antworte präzise im geforderten Format."
+                },
+                {"role": "user", "content": prompt}
+            ],
+        }
+
         try:
-            response = self._client.chat.completions.create(
-                model=self._get_model_id(),
-                max_tokens=self.config.max_tokens,
-                temperature=self.config.temperature,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Du bist ein Assistent zum Sortieren von Dokumenten. "
-                                   "Antworte präzise im geforderten Format."
-                    },
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            if self.config.stream:
+                # Manche Poe-Modelle erklären nach der Antwort noch weiter;
+                # beim Streamen wird danach abgebrochen
+                response_text, tokens_used = stream_chat_completion(self._client, request)
+                tokens_used = tokens_used or self._estimate_used_tokens(prompt, response_text)
+            else:
+                response = self._client.chat.completions.create(**request)
+                response_text = response.choices[0].message.content
+                tokens_used = response.usage.total_tokens if response.usage else 0
 
-            response_text = response.choices[0].message.content
             parsed = self._parse_response(response_text)
 
             # Prüfen ob der vorgeschlagene Ordner existiert
@@ -161,8 +187,6 @@ class PoeProvider(LLMProvider):
                     suggested_folder, available_folders
                 )
 
-            tokens_used = response.usage.total_tokens if response.usage else 0
-
             return LLMResponse(
                 success=True,
                 folder_suggestion=suggested_folder,
@@ -228,7 +252,7 @@ class PoeProvider(LLMProvider):
         try:
             response = self._client.chat.completions.create(
                 model=self._get_model_id(),
-                max_tokens=self.config.max_tokens,
+                max_tokens=self._filename_max_tokens(),
                 temperature=self.config.temperature,
                 messages=[
                     {
@@ -265,70 +289,6 @@ class PoeProvider(LLMProvider):
                 error_message=f"Poe API Fehler: {str(e)}"
             )
 
-    def _find_similar_folder(
-        self, suggested: str, available: list[str]
-    ) -> Optional[str]:
-        """
-        Findet einen ähnlichen Ordner aus der Liste.
-
-        Args:
-            suggested: Vorgeschlagener Ordnername
-            available: Verfügbare Ordner
-
-        Returns:
-            Ähnlicher Ordnername oder None
-        """
-        suggested_lower = suggested.lower()
-
-        # Exakte Übereinstimmung (case-insensitive)
-        for folder in available:
-            if folder.lower() == suggested_lower:
-                return folder
-
-        # Teilübereinstimmung
-        for folder in available:
-            if suggested_lower in folder.lower() or folder.lower() in suggested_lower:
-                return folder
-
-        return None
-
-    def _sanitize_filename(self, filename: str) -> str:
-        """
-        Bereinigt einen Dateinamen.
-
-        Args:
-            filename: Roher Dateiname
-
-        Returns:
-            Bereinigter Dateiname
-        """
-        # Entferne ungültige Zeichen
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, "_")
-
-        # Umlaute ersetzen
-        replacements = {
-            "ä": "ae", "ö": "oe", "ü": "ue",
-            "Ä": "Ae", "Ö": "Oe", "Ü": "Ue",
-            "ß": "ss"
-        }
-        for old, new in replacements.items():
-            filename = filename.replace(old, new)
-
-        # Leerzeichen durch Unterstriche
-        filename = filename.replace(" ", "_")
-
-        # Sicherstellen, dass .pdf Endung vorhanden
-        if not filename.lower().endswith(".pdf"):
-            filename += ".pdf"
-
-        # Maximale Länge
-        if len(filename) > 84:  # 80 + .pdf
-            filename = filename[:80] + ".pdf"
-
-        return filename
-
     @classmethod
     def get_available_models(cls) -> list[tuple[str, str]]:
         """
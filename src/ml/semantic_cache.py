@@ -0,0 +1,237 @@
+"""
+Ähnlichkeits-Cache für LLM-Klassifikationen
+
+Wiederkehrende Dokumente (Rechnung desselben Anbieters, Kontoauszug des
+nächsten Monats) unterscheiden sich nur in Datum und Beträgen, treffen
+den exakten Antwort-Cache also nie. Dieser Cache vergleicht stattdessen
+die Termvektoren der Dokumenttexte per Kosinus-Ähnlichkeit und liefert
+ab einem Schwellwert die gespeicherte Ordner-Klassifikation.
+
+Als Vektoren dienen die Termhäufigkeiten des Hashing-Vectorizers des
+lokalen Klassifikators: sie brauchen kein zusätzliches Embedding-Modell
+und bleiben auch nach einem Neutraining vergleichbar.
+
+Nur für Ordnervorschläge gedacht - Dateinamen enthalten Datum und
+Beträge und dürfen nicht von einem ähnlichen Dokument übernommen werden.
+
+MIT License - Copyright (c) 2026
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, replace
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from src.ml.classifier import PDFClassifier
+from src.ml.llm_provider import LLMResponse
+
+logger = logging.getLogger("pdf_sortier_meister.semantic_cache")
+
+# Standard-Schwellwert der Kosinus-Ähnlichkeit für einen Treffer
+_DEFAULT_THRESHOLD = 0.92
+
+# Standard-Obergrenze für die Anzahl gespeicherter Klassifikationen
+_DEFAULT_MAX_ENTRIES = 2000
+
+
+class SemanticCache:
+    """Persistenter Cache für Klassifikationen nahezu gleicher Dokumente."""
+
+    def __init__(
+        self,
+        path: Path,
+        threshold: float = _DEFAULT_THRESHOLD,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Initialisiert den Cache und lädt vorhandene Einträge.
+
+        Args:
+            path: Basispfad; gespeichert wird in <path>.npz (Matrix und
+                Einträge in einem Archiv; <path>.json nur bei älteren Caches)
+            threshold: Mindest-Ähnlichkeit (0-1) für einen Treffer
+            max_entries: Maximale Anzahl gespeicherter Klassifikationen
+        """
+        self.matrix_path = path.with_suffix(".npz")
+        self.entries_path = path.with_suffix(".json")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vectorizer = PDFClassifier._new_vectorizer()
+        self._lock = Lock()
+
+        # Zeile i der Matrix gehört zu Eintrag i (Ordnerlisten-Hash + Antwort)
+        self._matrix = None
+        self._entries: list[dict] = []
+        self._load()
+
+    @staticmethod
+    def folders_key(available_folders: list[str]) -> str:
+        """Hash der Ordnerliste; bei geänderten Ordnern gibt es keine Treffer."""
+        joined = "\x1f".join(sorted(available_folders))
+        return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+    def _vectorize(self, text: str):
+        """L2-normierter Termvektor eines Dokumenttexts (None ohne Terme)."""
+        if not text or text.isspace():
+            return None
+        vector = self._vectorizer.transform([text])
+        if vector.nnz == 0:
+            return None
+        return normalize(vector)
+
+    def get(self, text: str, available_folders: list[str]) -> Optional[LLMResponse]:
+        """
+        Sucht die Klassifikation des ähnlichsten gespeicherten Dokuments.
+
+        Returns:
+            LLMResponse (ohne Token-Verbrauch) oder None
+        """
+        vector = self._vectorize(text)
+        if vector is None:
+            return None
+
+        folders_key = self.folders_key(available_folders)
+        with self._lock:
+            if self._matrix is None:
+                return None
+            similarities = (self._matrix @ vector.T).toarray().ravel()
+            candidates = [
+                i for i, entry in enumerate(self._entries)
+                if entry["folders"] == folders_key
+            ]
+            if not candidates:
+                return None
+            best = max(candidates, key=similarities.__getitem__)
+            if similarities[best] < self.threshold:
+                return None
+            stored = self._entries[best]["response"]
+
+        try:
+            response = LLMResponse(**stored)
+        except TypeError:
+            return None
+        return replace(response, tokens_used=0)
+
+    def set(self, text: str, available_folders: list[str], response: LLMResponse):
+        """Speichert eine erfolgreiche Klassifikation; Fehlerantworten werden ignoriert."""
+        self.set_many([(text, response)], available_folders)
+
+    def set_many(
+        self, items: list[tuple[str, LLMResponse]], available_folders: list[str]
+    ):
+        """
+        Speichert mehrere Klassifikationen auf einmal (ein Anhängen, ein Schreiben).
+
+        Args:
+            items: Paare aus Dokumenttext und Antwort; Fehlerantworten werden ignoriert
+            available_folders: Ordnerliste, mit der klassifiziert wurde
+        """
+        folders_key = self.folders_key(available_folders)
+        vectors = []
+        entries = []
+        for text, response in items:
+            if not response.success or not response.folder_suggestion:
+                continue
+            vector = self._vectorize(text)
+            if vector is None:
+                continue
+            vectors.append(vector)
+            entries.append({"folders": folders_key, "response": asdict(response)})
+        if not vectors:
+            return
+
+        with self._lock:
+            if self._matrix is not None:
+                vectors.insert(0, self._matrix)
+            self._matrix = sp.vstack(vectors, format="csr")
+            self._entries.extend(entries)
+
+            # Älteste Einträge verwerfen
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._matrix = self._matrix[overflow:]
+                self._entries = self._entries[overflow:]
+
+            self._save()
+
+    def clear(self):
+        """Löscht alle gespeicherten Klassifikationen."""
+        with self._lock:
+            self._matrix = None
+            self._entries = []
+            self.matrix_path.unlink(missing_ok=True)
+            self.entries_path.unlink(missing_ok=True)
+
+    def _load(self):
+        """Lädt Matrix und Einträge; bei Unstimmigkeiten wird leer begonnen."""
+        if not self.matrix_path.exists():
+            return
+        try:
+            matrix = sp.load_npz(self.matrix_path).tocsr()
+            with np.load(self.matrix_path) as archive:
+                stored = archive["entries"].tobytes() if "entries" in archive.files else None
+            if stored is not None:
+                entries = json.loads(stored.decode("utf-8"))
+            else:
+                # Älteres Format: Einträge in eigener JSON-Datei
+                with open(self.entries_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Ähnlichkeits-Cache konnte nicht geladen werden: {e}")
+            return
+
+        if matrix.shape[0] != len(entries) or matrix.shape[1] != self._vectorizer.n_features:
+            logger.warning("Ähnlichkeits-Cache passt nicht zusammen und wird verworfen")
+            return
+        self._matrix = matrix.astype(np.float32)
+        self._entries = entries
+
+    def _save(self):
+        """
+        Schreibt Matrix und Einträge (Lock wird vom Aufrufer gehalten).
+
+        Beides liegt in einem Archiv, das über eine temporäre Datei ersetzt
+        wird - ein Absturz beim Schreiben lässt den alten Stand intakt.
+        """
+        matrix = self._matrix
+        entries = json.dumps(self._entries, ensure_ascii=False).encode("utf-8")
+        temp_path = self.matrix_path.with_suffix(".npz.tmp")
+        try:
+            # Gleiche Schlüssel wie sp.save_npz, dazu die Einträge
+            with open(temp_path, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    data=matrix.data,
+                    indices=matrix.indices,
+                    indptr=matrix.indptr,
+                    format=np.array("csr"),
+                    shape=np.array(matrix.shape),
+                    entries=np.frombuffer(entries, dtype=np.uint8),
+                )
+            os.replace(temp_path, self.matrix_path)
+            self.entries_path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.error(f"Ähnlichkeits-Cache konnte nicht gespeichert werden: {e}")
+
+
+# Globale Instanz
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Gibt die globale Cache-Instanz zurück."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        from src.utils.config import get_config
+        config = get_config()
+        threshold = config.get("llm", {}).get("semantic_threshold", _DEFAULT_THRESHOLD)
+        _semantic_cache = SemanticCache(config.data_dir / "semcache", threshold=threshold)
+    return _semantic_cache
@@ -2,18 +2,43 @@
 Konfigurationsverwaltung für PDF Sortier Meister
 """
 
+import atexit
+import copy
 import json
 import logging
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 logger = logging.getLogger("pdf_sortier_meister.config")
 
 
+def _deep_merge(defaults: dict, loaded: dict) -> dict:
+    """
+    Legt geladene Werte über eine Kopie der Standardwerte.
+
+    Verschachtelte Dicts (z.B. "llm") werden rekursiv zusammengeführt, damit
+    neu hinzugekommene Standardwerte auch bei älteren Konfigurationsdateien
+    vorhanden sind.
+    """
+    merged = copy.deepcopy(defaults)
+    for key, value in loaded.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
 class Config:
     """Verwaltet die Anwendungskonfiguration."""
 
+    # Automatische Speichervorgänge innerhalb dieser Zeit (Sekunden) werden
+    # zu einem Schreibvorgang zusammengefasst
+    SAVE_DELAY = 0.5
+
     # Standard-Konfigurationswerte
     DEFAULTS = {
         "scan_folder": "",  # Wird beim ersten Start gesetzt
@@ -38,8 +63,30 @@ class Config:
             "model": "",  # z.B. "haiku", "sonnet", "gpt-4o-mini", "llama3.1"
             "max_tokens": 500,
             "temperature": 0.3,
+            # Max. Zeichen Dokumenttext pro Anfrage (Anfang, Ende und Stellen
+            # mit Schlüsselwörtern bleiben erhalten, siehe _truncate_text)
+            "text_limit": 1500,
             "auto_use": False,  # LLM automatisch bei niedriger Konfidenz
             "base_url": "",  # nur fuer Ollama (lokaler Server)
+            "cache_enabled": True,  # Antworten für identische Prompts wiederverwenden
+            # Ordnervorschlag nahezu gleicher Dokumente (z.B. Monatsrechnungen)
+            # wiederverwenden, ab dieser Kosinus-Ähnlichkeit der Texte
+            "semantic_cache_enabled": False,
+            "semantic_threshold": 0.92,
+            "batch_size": 10,  # Dokumente pro Sammelanfrage beim Massensortieren
+            "stream": False,  # Antworten streamen, Abbruch sobald vollständig
+            "max_retries": 3,  # Wiederholungen bei Rate-Limit (mit Backoff)
+            # Parallele Anfragen beim Massensortieren und Limits des Anbieters
+            # pro Minute (0 = kein Limit)
+            "max_concurrency": 10,
+            "requests_per_minute": 0,
+            "tokens_per_minute": 0,
+            # Massensortierung über die OpenAI Batch-API (halbe Kosten, Ergebnis
+            # aber erst nach Minuten bis Stunden - nur für Läufe ohne Wartende)
+            "use_batch_api": False,
+            # Maximale Wartezeit auf einen Batch in Sekunden (0 = unbegrenzt);
+            # danach wird er abgebrochen
+            "batch_api_timeout": 3600,
         },
     }
 
@@ -59,9 +106,16 @@ class Config:
         else:
             self.config_path = Path(config_path)
 
-        self._config = self.DEFAULTS.copy()
+        self._config = copy.deepcopy(self.DEFAULTS)
+        self._batching = False
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._save_timer: Optional[threading.Timer] = None
         self.load()
 
+        # Verzögerte Änderungen beim Beenden nicht verlieren
+        atexit.register(self.flush)
+
     def load(self) -> None:
         """Lädt die Konfiguration aus der Datei."""
         if self.config_path.exists():
@@ -69,20 +123,45 @@ class Config:
                 with open(self.config_path, "r", encoding="utf-8") as f:
                     loaded = json.load(f)
                     # Merge mit Defaults (für neue Konfigurationsoptionen)
-                    self._config = {**self.DEFAULTS, **loaded}
+                    self._config = _deep_merge(self.DEFAULTS, loaded)
             except (json.JSONDecodeError, IOError) as e:
                 logger.error(f"Fehler beim Laden der Konfiguration: {e}")
-                self._config = self.DEFAULTS.copy()
+                self._config = copy.deepcopy(self.DEFAULTS)
 
     def save(self) -> None:
-        """Speichert die Konfiguration in die Datei."""
+        """
+        Speichert die Konfiguration in die Datei.
+
+        Geschrieben wird in eine temporäre Datei, die dann die alte ersetzt -
+        ein Absturz beim Schreiben hinterlässt so keine halbe config.json.
+        """
+        tmp_path = self.config_path.with_name(self.config_path.name + ".tmp")
         try:
-            self.config_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(self._config, f, indent=2, ensure_ascii=False)
-        except IOError as e:
+            with self._lock:
+                self.config_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._config, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.config_path)
+        except OSError as e:
             logger.error(f"Fehler beim Speichern der Konfiguration: {e}")
 
+    def flush(self) -> None:
+        """Schreibt verzögerte Änderungen sofort in die Datei."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self._dirty = False
+                self.save()
+
+    def _schedule_save(self) -> None:
+        """Plant einen Speichervorgang nach SAVE_DELAY (Lock wird gehalten)."""
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
     def get(self, key: str, default: Any = None) -> Any:
         """
         Gibt einen Konfigurationswert zurück.
@@ -103,11 +182,35 @@ class Config:
         Args:
             key: Der Konfigurationsschlüssel
             value: Der zu setzende Wert
-            auto_save: Automatisch speichern nach Änderung
+            auto_save: Automatisch speichern nach Änderung (verzögert um
+                SAVE_DELAY, damit schnell aufeinanderfolgende Änderungen
+                nur einmal geschrieben werden)
+        """
+        with self._lock:
+            self._config[key] = value
+            if auto_save:
+                self._dirty = True
+                if not self._batching:
+                    self._schedule_save()
+
+    @contextmanager
+    def batch(self):
         """
-        self._config[key] = value
-        if auto_save:
-            self.save()
+        Fasst mehrere set()-Aufrufe zu einem Speichervorgang zusammen.
+
+        Innerhalb des Blocks werden Änderungen nur im Speicher gehalten und
+        beim Verlassen einmalig in die Datei geschrieben.
+        """
+        if self._batching:
+            # Verschachtelt: der äußere Block speichert
+            yield self
+            return
+        self._batching = True
+        try:
+            yield self
+        finally:
+            self._batching = False
+            self.flush()
 
     def get_scan_folder(self) -> Path:
         """Gibt den Scan-Ordner als Path zurück."""
@@ -4,23 +4,144 @@ Datenbank-Modul für PDF Sortier Meister
 Speichert die Sortierhistorie für das lernfähige Klassifikationssystem.
 """
 
+import hashlib
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
-
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float
+from typing import Iterator, Optional
+
+from sqlalchemy import (
+    create_engine, event, func, insert, or_, select, text, update, bindparam,
+    Column, Index, Integer, String, Text, DateTime, Float,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool
 
 from src.utils.config import get_config
 
 Base = declarative_base()
 
+# Verbindungseinstellungen: WAL lässt Lesen während Schreibvorgängen zu und
+# braucht pro Commit weniger fsync-Aufrufe; synchronous=NORMAL ist mit WAL
+# absturzsicher (nur die letzten Commits können bei Stromausfall fehlen)
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MB
+    "PRAGMA cache_size=-65536",  # 64 MB
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Setzt die Verbindungseinstellungen für jede neue SQLite-Verbindung."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+# Schema-Stand (PRAGMA user_version); bei jeder Schemaänderung (neue
+# Tabelle, Spalte, Index oder Migration) erhöhen
+_SCHEMA_VERSION = 4
+
+# Zeilen je Block beim Durchlaufen großer Ergebnismengen
+_STREAM_BATCH_SIZE = 500
+
+# Tabellen, deren Schlüsselwörter über einen FTS5-Index gesucht werden
+_KEYWORD_INDEXED_TABLES = ("sorting_history", "rename_history")
+
+
+def _keyword_match_query(keywords: list[str]) -> Optional[str]:
+    """
+    Baut eine FTS5-Abfrage, die Einträge mit einem der Schlüsselwörter findet.
+
+    Jedes Schlüsselwort wird als Phrase gesucht; Einträge ohne exakt
+    gleiches Schlüsselwort filtert der Aufrufer anschließend heraus.
+
+    Returns:
+        MATCH-Ausdruck oder None (kein durchsuchbares Schlüsselwort)
+    """
+    phrases = [
+        '"' + keyword.replace('"', '""') + '"'
+        for keyword in keywords
+        if any(char.isalnum() for char in keyword)
+    ]
+    return " OR ".join(phrases) if phrases else None
+
+
+def _normalize_keywords(keywords: Optional[list[str]]) -> Optional[str]:
+    """
+    Normalisierte Schlüsselwörter zum Speichern: kleingeschrieben, sortiert
+    und mit "|" umschlossen (z.B. "|kontoauszug|sparkasse|").
+
+    So lässt sich ein exakt gleiches Schlüsselwort per instr() in SQL finden.
+    """
+    normalized = sorted({k.lower() for k in keywords or [] if k})
+    return "|" + "|".join(normalized) + "|" if normalized else None
+
+
+def _text_hash(extracted_text: Optional[str]) -> Optional[str]:
+    """Kurzer Inhalts-Hash (BLAKE2b, 64 Bit) zum Erkennen gleicher Texte."""
+    if not extracted_text:
+        return None
+    return hashlib.blake2b(extracted_text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+# Texte ab dieser Länge (Zeichen) werden komprimiert gespeichert
+_COMPRESS_MIN_CHARS = 1024
+
+
+def _decompress_text(value) -> Optional[str]:
+    """Gespeicherter Text: komprimiert (bytes) oder - ältere/kurze Einträge - str."""
+    if isinstance(value, (bytes, bytearray)):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text, der ab _COMPRESS_MIN_CHARS zlib-komprimiert als BLOB gespeichert wird.
+
+    Kürzere Texte und vorhandene Einträge bleiben unverändert lesbar.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or len(value) < _COMPRESS_MIN_CHARS:
+            return value
+        return zlib.compress(value.encode("utf-8"), 3)
+
+    def process_result_value(self, value, dialect):
+        return _decompress_text(value)
+
+
+def _keyword_condition(model, keywords: list[str]):
+    """SQL-Bedingung: Eintrag hat eines der Schlüsselwörter (exakt, ohne Groß/klein)."""
+    return or_(*(
+        func.instr(model.keywords_normalized, f"|{keyword.lower()}|") > 0
+        for keyword in keywords
+    ))
+
 
 class SortingHistory(Base):
     """Tabelle für die Sortierhistorie."""
 
     __tablename__ = "sorting_history"
+    __table_args__ = (
+        # get_entries_for_folder / get_sorting_history_by_relative_path
+        Index("ix_sorting_history_target_folder", "target_folder"),
+        Index("ix_sorting_history_relative_path_created", "target_relative_path", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -29,10 +150,16 @@ class SortingHistory(Base):
     original_path = Column(String(1000), nullable=False)
 
     # Extrahierter Text (für Ähnlichkeitssuche)
-    extracted_text = Column(Text, nullable=True)
+    extracted_text = Column(CompressedText, nullable=True)
+    # Für den Klassifikator vorverarbeiteter Text (Cache)
+    preprocessed_text = Column(Text, nullable=True)
+    # Hash des extrahierten Texts (gleiche Dokumente beim Neutrainieren
+    # nur einmal verarbeiten)
+    text_hash = Column(String(16), nullable=True)
 
     # Erkannte Merkmale
     keywords = Column(String(500), nullable=True)  # Komma-getrennt
+    keywords_normalized = Column(String(500), nullable=True)  # siehe _normalize_keywords
     detected_date = Column(String(50), nullable=True)
 
     # Zielordner (das Lernziel)
@@ -64,6 +191,11 @@ class TargetFolder(Base):
     """Tabelle für Zielordner mit Statistiken."""
 
     __tablename__ = "target_folders"
+    __table_args__ = (
+        # get_subfolders_for_parent / get_most_used_folders, get_folder_stats
+        Index("ix_target_folders_parent_usage", "parent_path", "usage_count"),
+        Index("ix_target_folders_usage", "usage_count"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     path = Column(String(1000), nullable=False, unique=True)
@@ -83,6 +215,10 @@ class RenameHistory(Base):
     """Tabelle für die Umbenennungshistorie (zum Lernen von Mustern)."""
 
     __tablename__ = "rename_history"
+    __table_args__ = (
+        # get_rename_suggestions_by_folder
+        Index("ix_rename_history_target_created", "target_folder", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -91,8 +227,9 @@ class RenameHistory(Base):
     new_filename = Column(String(500), nullable=False)
 
     # Kontext aus der PDF
-    extracted_text = Column(Text, nullable=True)
+    extracted_text = Column(CompressedText, nullable=True)
     keywords = Column(String(500), nullable=True)  # Komma-getrennt
+    keywords_normalized = Column(String(500), nullable=True)  # siehe _normalize_keywords
     detected_date = Column(String(50), nullable=True)
 
     # Zielordner (falls beim Umbenennen bekannt)
@@ -128,6 +265,23 @@ class KorrespondentMetadata(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+# Häufige Abfragen einmal aufgebaut und wiederverwendet (Werte per bindparam):
+# spart je Aufruf das Zusammensetzen der Abfrage und die Cache-Schlüssel-Berechnung
+_ENTRIES_FOR_FOLDER = select(SortingHistory).where(
+    SortingHistory.target_folder == bindparam("target_folder")
+)
+_FOLDERS_BY_USAGE = select(TargetFolder).order_by(TargetFolder.usage_count.desc())
+_SUBFOLDERS_FOR_PARENT = select(TargetFolder).where(
+    TargetFolder.parent_path == bindparam("parent_path")
+).order_by(TargetFolder.usage_count.desc())
+_HISTORY_FOR_RELATIVE_PATH = select(SortingHistory).where(
+    SortingHistory.target_relative_path == bindparam("relative_path")
+).order_by(SortingHistory.created_at.desc()).limit(bindparam("limit"))
+_RENAMES_FOR_FOLDER = select(RenameHistory).where(
+    RenameHistory.target_folder == bindparam("target_folder")
+).order_by(RenameHistory.created_at.desc()).limit(bindparam("limit"))
+
+
 class Database:
     """Datenbankverbindung und -operationen."""
 
@@ -143,36 +297,103 @@ class Database:
             db_path = config.database_path
 
         self.db_path = db_path
+        # Eigene Verbindung je gleichzeitiger Session: mit WAL lesen GUI und
+        # Hintergrund-Threads parallel, nur Schreibvorgänge warten aufeinander
+        # (bis zu "timeout" Sekunden auf die Schreibsperre)
         self.engine = create_engine(
             f"sqlite:///{db_path}",
-            connect_args={"check_same_thread": False},
-            poolclass=StaticPool,
+            connect_args={"check_same_thread": False, "timeout": 30},
+            poolclass=QueuePool,
+            pool_size=5,
+            max_overflow=10,
+            # Sammel-INSERTs mit bis zu 1000 Zeilen je Anweisung
+            insertmanyvalues_page_size=1000,
         )
+        event.listen(self.engine, "connect", _set_sqlite_pragmas)
 
-        # Tabellen erstellen
-        Base.metadata.create_all(self.engine)
+        # Tabellen erstellen und migrieren - nur wenn die Datenbank noch
+        # nicht auf dem aktuellen Schema-Stand ist (sonst entfällt beim
+        # Start die Prüfung jeder Tabelle, Spalte und jedes Index)
+        if self._get_schema_version() < _SCHEMA_VERSION:
+            Base.metadata.create_all(self.engine)
 
-        # Migration: Neue Spalten hinzufügen (falls nicht vorhanden)
-        self._migrate_database()
+            # Migration: Neue Spalten hinzufügen (falls nicht vorhanden)
+            if self._migrate_database():
+                self._set_schema_version(_SCHEMA_VERSION)
 
         # FTS5-Volltextsuche erstellen (Phase 17)
         self._create_fts_index()
 
-        # Session-Factory
-        self.Session = sessionmaker(bind=self.engine)
+        # FTS5-Index über die Schlüsselwörter der Historie
+        self._keyword_index = self._create_keyword_index()
+
+        # Session-Factory: Einträge bleiben nach dem Commit lesbar (kein
+        # erneutes SELECT beim Zugriff), Abfragen lösen keinen Flush aus
+        self.Session = sessionmaker(
+            bind=self.engine, expire_on_commit=False, autoflush=False
+        )
+
+        # Ergebnisse kleiner, oft abgefragter Zählungen/Listen; jeder
+        # Schreibvorgang erhöht die Version und macht sie damit ungültig
+        self._query_cache: dict[str, tuple[int, object]] = {}
+        self._cache_version = 0
 
     def get_session(self):
         """Erstellt eine neue Datenbank-Session."""
         return self.Session()
 
-    def _migrate_database(self):
+    @contextmanager
+    def _session(self):
+        """Session, die am Ende committet (bei Fehlern zurückrollt) und schließt."""
+        session = self.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _cached(self, key: str, load):
+        """Gibt das gecachte Ergebnis zurück oder lädt es mit load()."""
+        version = self._cache_version
+        hit = self._query_cache.get(key)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        value = load()
+        # Mit der Version vor dem Laden speichern: lief währenddessen ein
+        # Schreibvorgang, gilt der Eintrag sofort als veraltet
+        self._query_cache[key] = (version, value)
+        return value
+
+    def _invalidate_cache(self):
+        """Verwirft gecachte Ergebnisse nach einem Schreibvorgang."""
+        self._cache_version += 1
+
+    def _get_schema_version(self) -> int:
+        """Liest den Schema-Stand der Datenbank (PRAGMA user_version)."""
+        with self.engine.connect() as conn:
+            return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+    def _set_schema_version(self, version: int):
+        """Speichert den Schema-Stand der Datenbank."""
+        with self.engine.connect() as conn:
+            conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+            conn.commit()
+
+    def _migrate_database(self) -> bool:
         """
         Führt Datenbank-Migrationen durch.
 
         Fügt neue Spalten hinzu, falls sie in einer älteren Datenbank fehlen.
+
+        Returns:
+            True, wenn alle Migrationen erfolgreich waren
         """
         from sqlalchemy import text
 
+        complete = True
         with self.engine.connect() as conn:
             # Prüfe und füge fehlende Spalten hinzu
             migrations = [
@@ -189,23 +410,138 @@ class Database:
                 ("sorting_history", "steuerlich_absetzbar", "VARCHAR(20)"),
                 ("sorting_history", "kategorie", "VARCHAR(100)"),
                 ("sorting_history", "zusammenfassung", "VARCHAR(1000)"),
+                # Cache für vorverarbeiteten Text (Klassifikator)
+                ("sorting_history", "preprocessed_text", "TEXT"),
+                # Normalisierte Schlüsselwörter für die exakte Suche
+                ("sorting_history", "keywords_normalized", "VARCHAR(500)"),
+                ("rename_history", "keywords_normalized", "VARCHAR(500)"),
+                # Inhalts-Hash des extrahierten Texts
+                ("sorting_history", "text_hash", "VARCHAR(16)"),
             ]
 
+            # Vorhandene Spalten einmal je Tabelle lesen
+            existing = {
+                table: {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+                for table in {table for table, _, _ in migrations}
+            }
+
+            # Fehlende Spalten in einer Transaktion hinzufügen
             for table, column, sql_type in migrations:
+                if column in existing[table]:
+                    continue
                 try:
-                    # Prüfen ob Spalte existiert
-                    result = conn.execute(text(f"PRAGMA table_info({table})"))
-                    columns = [row[1] for row in result.fetchall()]
-
-                    if column not in columns:
-                        # Spalte hinzufügen
-                        conn.execute(text(
-                            f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"
-                        ))
-                        conn.commit()
-                        print(f"Migration: Spalte '{column}' zu '{table}' hinzugefügt")
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"
+                    ))
+                    print(f"Migration: Spalte '{column}' zu '{table}' hinzugefügt")
                 except Exception as e:
+                    complete = False
                     print(f"Migration-Warnung für {table}.{column}: {e}")
+            conn.commit()
+
+            # Normalisierte Schlüsselwörter für ältere Einträge nachtragen
+            # (in Python, da SQLite lower() keine Umlaute kennt)
+            for table in _KEYWORD_INDEXED_TABLES:
+                try:
+                    rows = conn.execute(text(
+                        f"SELECT id, keywords FROM {table} "
+                        "WHERE keywords IS NOT NULL AND keywords_normalized IS NULL"
+                    )).fetchall()
+                    if rows:
+                        conn.execute(
+                            text(f"UPDATE {table} SET keywords_normalized = :normalized WHERE id = :id"),
+                            [
+                                {"id": row_id, "normalized": _normalize_keywords(keywords.split(","))}
+                                for row_id, keywords in rows
+                            ],
+                        )
+                        conn.commit()
+                except Exception as e:
+                    complete = False
+                    print(f"Migration-Warnung für {table}.keywords_normalized: {e}")
+
+            # Inhalts-Hashes für ältere Einträge nachtragen (blockweise, da
+            # dafür die vollständigen Texte gelesen werden)
+            try:
+                last_id = 0
+                while True:
+                    rows = conn.execute(text(
+                        "SELECT id, extracted_text FROM sorting_history "
+                        "WHERE id > :last_id AND text_hash IS NULL "
+                        "AND extracted_text IS NOT NULL AND extracted_text != '' "
+                        "ORDER BY id LIMIT :limit"
+                    ), {"last_id": last_id, "limit": _STREAM_BATCH_SIZE}).fetchall()
+                    if not rows:
+                        break
+                    conn.execute(
+                        text("UPDATE sorting_history SET text_hash = :text_hash WHERE id = :id"),
+                        [
+                            {"id": row_id, "text_hash": _text_hash(_decompress_text(body))}
+                            for row_id, body in rows
+                        ],
+                    )
+                    conn.commit()
+                    last_id = rows[-1][0]
+            except Exception as e:
+                complete = False
+                print(f"Migration-Warnung für sorting_history.text_hash: {e}")
+
+            # Nicht mehr benötigten Index auf text_hash entfernen
+            conn.execute(text("DROP INDEX IF EXISTS ix_sorting_history_text_hash"))
+            conn.commit()
+
+            # Eindeutiger Index auf target_folders.path: einziger Suchweg des
+            # Upserts in _update_folder_stats (ON CONFLICT(path) braucht ihn)
+            try:
+                if not self._has_unique_index(conn, "target_folders", "path"):
+                    # Doppelte Ordner vorher zusammenführen
+                    conn.execute(text("""
+                        UPDATE target_folders SET usage_count = (
+                            SELECT SUM(usage_count) FROM target_folders AS t
+                            WHERE t.path = target_folders.path
+                        )
+                        WHERE id IN (
+                            SELECT MIN(id) FROM target_folders
+                            GROUP BY path HAVING COUNT(*) > 1
+                        )
+                    """))
+                    conn.execute(text("""
+                        DELETE FROM target_folders WHERE id NOT IN (
+                            SELECT MIN(id) FROM target_folders GROUP BY path
+                        )
+                    """))
+                    conn.execute(text(
+                        "CREATE UNIQUE INDEX ux_target_folders_path ON target_folders(path)"
+                    ))
+                    conn.commit()
+                    print("Migration: Eindeutiger Index auf target_folders.path angelegt")
+            except Exception as e:
+                complete = False
+                print(f"Migration-Warnung für Index ux_target_folders_path: {e}")
+
+        # Indizes anlegen, die in älteren Datenbanken fehlen (create_all legt
+        # sie nur für neue Tabellen an; manche Spalten kommen erst oben dazu)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(self.engine, checkfirst=True)
+                except Exception as e:
+                    complete = False
+                    print(f"Migration-Warnung für Index {index.name}: {e}")
+
+        return complete
+
+    @staticmethod
+    def _has_unique_index(conn, table: str, column: str) -> bool:
+        """Prüft, ob die Spalte allein durch einen eindeutigen Index abgedeckt ist."""
+        for index in conn.execute(text(f"PRAGMA index_list({table})")):
+            name, unique = index[1], index[2]
+            if not unique:
+                continue
+            columns = [row[2] for row in conn.execute(text(f"PRAGMA index_info('{name}')"))]
+            if columns == [column]:
+                return True
+        return False
 
     def _create_fts_index(self):
         """Erstellt die FTS5-Volltextsuche-Tabelle (Phase 17)."""
@@ -238,6 +574,81 @@ class Database:
         except Exception as e:
             print(f"FTS5-Index Warnung: {e}")
 
+    def _create_keyword_index(self) -> bool:
+        """
+        Erstellt FTS5-Indizes über die Schlüsselwörter der Historientabellen.
+
+        Die Indizes speichern keinen eigenen Inhalt (external content) und
+        werden per Trigger aktuell gehalten. Beim ersten Anlegen werden
+        bestehende Einträge einmalig indexiert.
+
+        Returns:
+            True, wenn die Indizes verfügbar sind (sonst wird ohne Index gesucht)
+        """
+        import sqlite3
+
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            try:
+                for table in _KEYWORD_INDEXED_TABLES:
+                    fts = f"{table}_fts"
+                    exists = conn.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (fts,),
+                    ).fetchone()
+                    conn.executescript(f"""
+                        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                            keywords,
+                            content='{table}',
+                            content_rowid='id',
+                            tokenize='unicode61 remove_diacritics 2'
+                        );
+                        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                            INSERT INTO {fts}(rowid, keywords) VALUES (new.id, new.keywords);
+                        END;
+                        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                            INSERT INTO {fts}({fts}, rowid, keywords)
+                            VALUES ('delete', old.id, old.keywords);
+                        END;
+                        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF keywords ON {table} BEGIN
+                            INSERT INTO {fts}({fts}, rowid, keywords)
+                            VALUES ('delete', old.id, old.keywords);
+                            INSERT INTO {fts}(rowid, keywords) VALUES (new.id, new.keywords);
+                        END;
+                    """)
+                    if not exists:
+                        conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                conn.commit()
+            finally:
+                conn.close()
+            return True
+        except sqlite3.Error as e:
+            print(f"FTS5-Schlüsselwortindex Warnung: {e}")
+            return False
+
+    def _query_by_keywords(self, session, model, keywords: list[str]):
+        """
+        Abfrage auf Einträge mit einem der Schlüsselwörter (exakt, ohne
+        Beachtung der Groß-/Kleinschreibung).
+
+        Mit FTS5-Index grenzt der Index die Kandidaten ein, sonst prüft
+        SQLite alle Einträge; geladen werden nur die Treffer.
+
+        Returns:
+            SQLAlchemy-Query oder None (kann keine Treffer liefern)
+        """
+        match = _keyword_match_query([k.lower() for k in keywords])
+        if match is None:
+            return None
+        query = session.query(model).filter(_keyword_condition(model, keywords))
+        if not self._keyword_index:
+            return query
+
+        table = model.__tablename__
+        return query.filter(text(
+            f"{table}.id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH :match)"
+        )).params(match=match)
+
     # === Volltextsuche (Phase 17) ===
 
     def index_document(
@@ -383,6 +794,7 @@ class Database:
         confidence: float = 1.0,
         target_relative_path: str = None,
         metadata: dict = None,
+        preprocessed_text: str = None,
     ) -> SortingHistory:
         """
         Fügt einen neuen Eintrag zur Sortierhistorie hinzu.
@@ -399,75 +811,134 @@ class Database:
             confidence: Konfidenz (1.0 = Benutzerentscheidung)
             target_relative_path: Relativer Pfad (z.B. "Steuer 2026/Banken")
             metadata: Dokument-Metadaten (Phase 16)
+            preprocessed_text: Vorverarbeiteter Text für den Klassifikator
 
         Returns:
             Der erstellte Eintrag
         """
-        session = self.get_session()
-        try:
-            entry = SortingHistory(
+        with self._session() as session:
+            entry = SortingHistory(**self._sorting_row(
                 original_filename=original_filename,
                 original_path=original_path,
                 target_folder=target_folder,
                 target_folder_name=target_folder_name,
-                target_relative_path=target_relative_path,
                 extracted_text=extracted_text,
-                keywords=",".join(keywords) if keywords else None,
+                keywords=keywords,
                 detected_date=detected_date,
                 new_filename=new_filename,
                 confidence=confidence,
-            )
-
-            # Metadaten-Felder setzen (Phase 16)
-            if metadata:
-                entry.korrespondent = metadata.get("korrespondent")
-                entry.betrag = metadata.get("betrag")
-                entry.waehrung = metadata.get("waehrung")
-                entry.mwst_satz = metadata.get("mwst_satz")
-                entry.steuerjahr = metadata.get("steuerjahr")
-                entry.steuerlich_absetzbar = metadata.get("steuerlich_absetzbar")
-                entry.kategorie = metadata.get("subject")
-                entry.zusammenfassung = metadata.get("description")
-
+                target_relative_path=target_relative_path,
+                metadata=metadata,
+                preprocessed_text=preprocessed_text,
+            ))
             session.add(entry)
 
             # Zielordner-Statistik aktualisieren
             self._update_folder_stats(
                 session, target_folder, target_folder_name, target_relative_path
             )
+        self._invalidate_cache()
+        return entry
 
-            session.commit()
-            return entry
-        finally:
-            session.close()
+    @staticmethod
+    def _sorting_row(
+        original_filename: str,
+        original_path: str,
+        target_folder: str,
+        target_folder_name: str,
+        extracted_text: str = None,
+        keywords: list[str] = None,
+        detected_date: str = None,
+        new_filename: str = None,
+        confidence: float = 1.0,
+        target_relative_path: str = None,
+        metadata: dict = None,
+        preprocessed_text: str = None,
+    ) -> dict:
+        """Spaltenwerte eines Sortierhistorie-Eintrags (Parameter wie add_sorting_entry)."""
+        metadata = metadata or {}
+        return {
+            "original_filename": original_filename,
+            "original_path": original_path,
+            "target_folder": target_folder,
+            "target_folder_name": target_folder_name,
+            "target_relative_path": target_relative_path,
+            "extracted_text": extracted_text,
+            "preprocessed_text": preprocessed_text,
+            "text_hash": _text_hash(extracted_text),
+            "keywords": ",".join(keywords) if keywords else None,
+            "keywords_normalized": _normalize_keywords(keywords),
+            "detected_date": detected_date,
+            "new_filename": new_filename,
+            "confidence": confidence,
+            # Metadaten-Felder (Phase 16)
+            "korrespondent": metadata.get("korrespondent"),
+            "betrag": metadata.get("betrag"),
+            "waehrung": metadata.get("waehrung"),
+            "mwst_satz": metadata.get("mwst_satz"),
+            "steuerjahr": metadata.get("steuerjahr"),
+            "steuerlich_absetzbar": metadata.get("steuerlich_absetzbar"),
+            "kategorie": metadata.get("subject"),
+            "zusammenfassung": metadata.get("description"),
+        }
+
+    def add_sorting_entries_bulk(self, entries: list[dict]) -> int:
+        """
+        Fügt viele Sortierhistorie-Einträge in einer Transaktion hinzu.
 
-    def get_all_sorting_entries(self) -> list[SortingHistory]:
-        """Gibt alle Sortierhistorie-Einträge zurück."""
-        session = self.get_session()
-        try:
-            return session.query(SortingHistory).order_by(
+        Statt je Datei INSERT, Ordner-Abfrage und Commit gibt es ein
+        mehrzeiliges INSERT und eine Statistik-Aktualisierung je Zielordner.
+
+        Args:
+            entries: Einträge als Dicts mit den Parametern von add_sorting_entry
+
+        Returns:
+            Anzahl der gespeicherten Einträge
+        """
+        if not entries:
+            return 0
+        # Ein Zeitstempel für den ganzen Block statt datetime.utcnow() je Zeile
+        now = datetime.utcnow()
+        rows = [{**self._sorting_row(**entry), "created_at": now} for entry in entries]
+        with self._session() as session:
+            session.execute(insert(SortingHistory), rows)
+            self._update_folder_stats_bulk(
+                session,
+                [
+                    (row["target_folder"], row["target_folder_name"], row["target_relative_path"])
+                    for row in rows
+                ],
+            )
+        self._invalidate_cache()
+        return len(rows)
+
+    def get_all_sorting_entries(self) -> Iterator[SortingHistory]:
+        """
+        Liefert alle Sortierhistorie-Einträge (neueste zuerst).
+
+        Die Einträge werden blockweise gelesen statt die ganze Tabelle samt
+        Texten auf einmal zu laden; wer eine Liste braucht, nimmt list(...).
+        """
+        with self._session() as session:
+            yield from session.query(SortingHistory).order_by(
                 SortingHistory.created_at.desc()
-            ).all()
-        finally:
-            session.close()
+            ).yield_per(_STREAM_BATCH_SIZE)
 
     def get_entries_for_folder(self, target_folder: str) -> list[SortingHistory]:
         """Gibt alle Einträge für einen bestimmten Zielordner zurück."""
-        session = self.get_session()
-        try:
-            return session.query(SortingHistory).filter(
-                SortingHistory.target_folder == target_folder
+        with self._session() as session:
+            return session.scalars(
+                _ENTRIES_FOR_FOLDER, {"target_folder": target_folder}
             ).all()
-        finally:
-            session.close()
 
     def get_entry_count(self) -> int:
         """Gibt die Anzahl der Einträge zurück."""
-        session = self.get_session()
-        try:
+        return self._cached("entry_count", self._count_sorting_entries)
+
+    def _count_sorting_entries(self) -> int:
+        """Zählt die Einträge in der Datenbank (ohne Cache)."""
+        with self._session() as session:
             return session.query(SortingHistory).count()
-        finally:
-            session.close()
 
     # === Zielordner-Statistiken ===
 
@@ -478,50 +949,95 @@ class Database:
         folder_name: str,
         relative_path: str = None
     ):
-        """Aktualisiert die Statistiken eines Zielordners."""
-        folder = session.query(TargetFolder).filter(
-            TargetFolder.path == folder_path
-        ).first()
-
-        if folder:
-            folder.usage_count += 1
-            folder.last_used = datetime.utcnow()
-            # Relativen Pfad aktualisieren wenn vorhanden
-            if relative_path and not folder.relative_path:
-                folder.relative_path = relative_path
-        else:
-            # Parent-Pfad ermitteln
-            from pathlib import Path
-            parent_path = str(Path(folder_path).parent)
-
-            folder = TargetFolder(
-                path=folder_path,
-                name=folder_name,
-                relative_path=relative_path,
-                parent_path=parent_path,
-                usage_count=1,
-            )
-            session.add(folder)
+        """
+        Aktualisiert die Statistiken eines Zielordners.
+
+        Ein einziges Upsert statt Abfrage plus INSERT bzw. UPDATE; ein
+        vorhandener relativer Pfad bleibt erhalten.
+        """
+        now = datetime.utcnow()
+        statement = sqlite_insert(TargetFolder).values(
+            path=folder_path,
+            name=folder_name,
+            relative_path=relative_path or None,
+            parent_path=str(Path(folder_path).parent),
+            usage_count=1,
+            last_used=now,
+            created_at=now,
+        )
+        session.execute(statement.on_conflict_do_update(
+            index_elements=[TargetFolder.path],
+            set_={
+                "usage_count": TargetFolder.usage_count + 1,
+                "last_used": statement.excluded.last_used,
+                "relative_path": func.coalesce(
+                    TargetFolder.relative_path, statement.excluded.relative_path
+                ),
+            },
+        ))
+
+    def _update_folder_stats_bulk(
+        self, session, folders: list[tuple[str, str, Optional[str]]]
+    ):
+        """
+        Aktualisiert die Statistiken mehrerer Zielordner auf einmal.
+
+        Args:
+            session: Offene Session (der Aufrufer committet)
+            folders: (Pfad, Name, relativer Pfad) je gespeichertem Eintrag
+        """
+        counts = Counter(path for path, _, _ in folders)
+        first = {}
+        for path, name, relative_path in folders:
+            first.setdefault(path, (name, relative_path))
+        now = datetime.utcnow()
+
+        # Neue Ordner mit Zähler 0 anlegen, danach alle gemeinsam hochzählen
+        session.execute(
+            insert(TargetFolder).prefix_with("OR IGNORE"),
+            [
+                {
+                    "path": path,
+                    "name": name,
+                    "relative_path": relative_path,
+                    "parent_path": str(Path(path).parent),
+                    "usage_count": 0,
+                    "last_used": now,
+                    "created_at": now,
+                }
+                for path, (name, relative_path) in first.items()
+            ],
+        )
+        session.connection().execute(
+            update(TargetFolder.__table__)
+            .where(TargetFolder.path == bindparam("folder_path"))
+            .values(
+                usage_count=TargetFolder.usage_count + bindparam("count"),
+                last_used=bindparam("now"),
+                relative_path=func.coalesce(
+                    TargetFolder.relative_path, bindparam("new_relative_path")
+                ),
+            ),
+            [
+                {
+                    "folder_path": path,
+                    "count": count,
+                    "now": now,
+                    "new_relative_path": first[path][1] or None,
+                }
+                for path, count in counts.items()
+            ],
+        )
 
     def get_folder_stats(self) -> list[TargetFolder]:
         """Gibt alle Zielordner mit Statistiken zurück."""
-        session = self.get_session()
-        try:
-            return session.query(TargetFolder).order_by(
-                TargetFolder.usage_count.desc()
-            ).all()
-        finally:
-            session.close()
+        with self._session() as session:
+            return session.scalars(_FOLDERS_BY_USAGE).all()
 
     def get_most_used_folders(self, limit: int = 5) -> list[TargetFolder]:
         """Gibt die am häufigsten verwendeten Ordner zurück."""
-        session = self.get_session()
-        try:
-            return session.query(TargetFolder).order_by(
-                TargetFolder.usage_count.desc()
-            ).limit(limit).all()
-        finally:
-            session.close()
+        # Die (kleine) sortierte Ordnerliste wird komplett gecacht
+        return self._cached("folders_by_usage", self.get_folder_stats)[:limit]
 
     def get_subfolders_for_parent(self, parent_path: str) -> list[TargetFolder]:
         """
@@ -533,15 +1049,10 @@ class Database:
         Returns:
             Liste der Unterordner (nach Nutzung sortiert)
         """
-        session = self.get_session()
-        try:
-            return session.query(TargetFolder).filter(
-                TargetFolder.parent_path == parent_path
-            ).order_by(
-                TargetFolder.usage_count.desc()
+        with self._session() as session:
+            return session.scalars(
+                _SUBFOLDERS_FOR_PARENT, {"parent_path": parent_path}
             ).all()
-        finally:
-            session.close()
 
     def get_folders_by_relative_path_pattern(
         self, pattern: str, limit: int = 10
@@ -556,15 +1067,12 @@ class Database:
         Returns:
             Liste passender Ordner
         """
-        session = self.get_session()
-        try:
+        with self._session() as session:
             return session.query(TargetFolder).filter(
                 TargetFolder.relative_path.ilike(f"%{pattern}%")
             ).order_by(
                 TargetFolder.usage_count.desc()
             ).limit(limit).all()
-        finally:
-            session.close()
 
     def get_sorting_history_by_relative_path(
         self, relative_path: str, limit: int = 10
@@ -579,28 +1087,62 @@ class Database:
         Returns:
             Liste der Sortierhistorie-Einträge
         """
-        session = self.get_session()
-        try:
-            return session.query(SortingHistory).filter(
-                SortingHistory.target_relative_path == relative_path
-            ).order_by(
-                SortingHistory.created_at.desc()
-            ).limit(limit).all()
-        finally:
-            session.close()
+        with self._session() as session:
+            return session.scalars(
+                _HISTORY_FOR_RELATIVE_PATH, {"relative_path": relative_path, "limit": limit}
+            ).all()
 
     # === Textsuche für Ähnlichkeit ===
 
-    def get_entries_with_text(self) -> list[SortingHistory]:
-        """Gibt alle Einträge mit extrahiertem Text zurück."""
-        session = self.get_session()
-        try:
-            return session.query(SortingHistory).filter(
+    def get_entries_with_text(self) -> Iterator[SortingHistory]:
+        """Liefert alle Einträge mit extrahiertem Text (blockweise gelesen)."""
+        with self._session() as session:
+            yield from session.query(SortingHistory).filter(
                 SortingHistory.extracted_text.isnot(None),
                 SortingHistory.extracted_text != "",
-            ).all()
-        finally:
-            session.close()
+            ).yield_per(_STREAM_BATCH_SIZE)
+
+    def iter_entries_with_text(
+        self, batch_size: int = 1024
+    ) -> Iterator[list[SortingHistory]]:
+        """
+        Liefert alle Einträge mit extrahiertem Text blockweise (nach ID).
+
+        Es liegt immer nur ein Block im Speicher; jeder Block wird in einer
+        eigenen Session geladen.
+
+        Args:
+            batch_size: Maximale Anzahl Einträge pro Block
+        """
+        last_id = 0
+        while True:
+            with self._session() as session:
+                batch = session.query(SortingHistory).filter(
+                    SortingHistory.extracted_text.isnot(None),
+                    SortingHistory.extracted_text != "",
+                    SortingHistory.id > last_id,
+                ).order_by(SortingHistory.id).limit(batch_size).all()
+
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].id
+
+    def update_preprocessed_texts(self, texts: dict[int, str]):
+        """
+        Speichert vorverarbeitete Texte für bestehende Einträge.
+
+        Args:
+            texts: Dict mit Eintrags-ID -> vorverarbeiteter Text
+        """
+        if not texts:
+            return
+
+        with self._session() as session:
+            session.bulk_update_mappings(SortingHistory, [
+                {"id": entry_id, "preprocessed_text": text}
+                for entry_id, text in texts.items()
+            ])
 
     def search_similar_keywords(self, keywords: list[str]) -> list[SortingHistory]:
         """
@@ -612,18 +1154,11 @@ class Database:
         Returns:
             Liste passender Einträge
         """
-        session = self.get_session()
-        try:
-            results = []
-            for entry in session.query(SortingHistory).all():
-                if entry.keywords:
-                    entry_keywords = set(entry.keywords.lower().split(","))
-                    search_keywords = set(k.lower() for k in keywords)
-                    if entry_keywords & search_keywords:  # Schnittmenge
-                        results.append(entry)
-            return results
-        finally:
-            session.close()
+        with self._session() as session:
+            query = self._query_by_keywords(session, SortingHistory, keywords)
+            if query is None:
+                return []
+            return query.order_by(SortingHistory.id).all()
 
     def get_learned_folder_names(self) -> dict[str, int]:
         """
@@ -635,16 +1170,13 @@ class Database:
         Returns:
             Dict mit Ordnername -> Anzahl der Nutzungen
         """
-        session = self.get_session()
-        try:
+        with self._session() as session:
             folder_counts: dict[str, int] = {}
             for entry in session.query(SortingHistory).all():
                 name = entry.target_folder_name
                 if name:
                     folder_counts[name] = folder_counts.get(name, 0) + 1
             return folder_counts
-        finally:
-            session.close()
 
     def get_learned_relative_paths(self) -> dict[str, int]:
         """
@@ -655,16 +1187,13 @@ class Database:
         Returns:
             Dict mit relativer Pfad -> Anzahl der Nutzungen
         """
-        session = self.get_session()
-        try:
+        with self._session() as session:
             path_counts: dict[str, int] = {}
             for entry in session.query(SortingHistory).all():
                 rel_path = entry.target_relative_path
                 if rel_path:
                     path_counts[rel_path] = path_counts.get(rel_path, 0) + 1
             return path_counts
-        finally:
-            session.close()
 
     def get_folder_name_to_keywords_mapping(self) -> dict[str, set[str]]:
         """
@@ -673,8 +1202,7 @@ class Database:
         Returns:
             Dict mit Ordnername -> Set von Keywords die zu diesem Ordner führten
         """
-        session = self.get_session()
-        try:
+        with self._session() as session:
             folder_keywords: dict[str, set[str]] = {}
             for entry in session.query(SortingHistory).all():
                 name = entry.target_folder_name
@@ -684,8 +1212,6 @@ class Database:
                     keywords = entry.keywords.lower().split(",")
                     folder_keywords[name].update(k.strip() for k in keywords if k.strip())
             return folder_keywords
-        finally:
-            session.close()
 
     # === Umbenennungshistorie ===
 
@@ -712,21 +1238,50 @@ class Database:
         Returns:
             Der erstellte Eintrag
         """
-        session = self.get_session()
-        try:
+        with self._session() as session:
             entry = RenameHistory(
                 original_filename=original_filename,
                 new_filename=new_filename,
                 extracted_text=extracted_text,
                 keywords=",".join(keywords) if keywords else None,
+                keywords_normalized=_normalize_keywords(keywords),
                 detected_date=detected_date,
                 target_folder=target_folder,
             )
             session.add(entry)
-            session.commit()
-            return entry
-        finally:
-            session.close()
+        self._invalidate_cache()
+        return entry
+
+    def add_rename_entries_bulk(self, entries: list[dict]) -> int:
+        """
+        Fügt viele Umbenennungseinträge mit einem INSERT hinzu.
+
+        Args:
+            entries: Einträge als Dicts mit den Parametern von add_rename_entry
+
+        Returns:
+            Anzahl der gespeicherten Einträge
+        """
+        if not entries:
+            return 0
+        now = datetime.utcnow()
+        rows = [
+            {
+                "original_filename": entry["original_filename"],
+                "new_filename": entry["new_filename"],
+                "extracted_text": entry.get("extracted_text"),
+                "keywords": ",".join(entry["keywords"]) if entry.get("keywords") else None,
+                "keywords_normalized": _normalize_keywords(entry.get("keywords")),
+                "detected_date": entry.get("detected_date"),
+                "target_folder": entry.get("target_folder"),
+                "created_at": now,
+            }
+            for entry in entries
+        ]
+        with self._session() as session:
+            session.execute(insert(RenameHistory), rows)
+        self._invalidate_cache()
+        return len(rows)
 
     def get_rename_suggestions_by_keywords(
         self, keywords: list[str], limit: int = 5
@@ -741,22 +1296,11 @@ class Database:
         Returns:
             Liste passender Umbenennungseinträge
         """
-        session = self.get_session()
-        try:
-            results = []
-            for entry in session.query(RenameHistory).order_by(
-                RenameHistory.created_at.desc()
-            ).all():
-                if entry.keywords:
-                    entry_keywords = set(entry.keywords.lower().split(","))
-                    search_keywords = set(k.lower() for k in keywords)
-                    if entry_keywords & search_keywords:
-                        results.append(entry)
-                        if len(results) >= limit:
-                            break
-            return results
-        finally:
-            session.close()
+        with self._session() as session:
+            query = self._query_by_keywords(session, RenameHistory, keywords)
+            if query is None:
+                return []
+            return query.order_by(RenameHistory.created_at.desc()).limit(limit).all()
 
     def get_rename_suggestions_by_folder(
         self, target_folder: str, limit: int = 5
@@ -771,23 +1315,27 @@ class Database:
         Returns:
             Liste passender Umbenennungseinträge
         """
-        session = self.get_session()
-        try:
-            return session.query(RenameHistory).filter(
-                RenameHistory.target_folder == target_folder
-            ).order_by(
-                RenameHistory.created_at.desc()
-            ).limit(limit).all()
-        finally:
-            session.close()
+        with self._session() as session:
+            return session.scalars(
+                _RENAMES_FOR_FOLDER, {"target_folder": target_folder, "limit": limit}
+            ).all()
 
     def get_rename_count(self) -> int:
         """Gibt die Anzahl der Umbenennungseinträge zurück."""
-        session = self.get_session()
-        try:
+        return self._cached("rename_count", self._count_rename_entries)
+
+    def _count_rename_entries(self) -> int:
+        """Zählt die Umbenennungseinträge in der Datenbank (ohne Cache)."""
+        with self._session() as session:
             return session.query(RenameHistory).count()
-        finally:
-            session.close()
+
+    def clear_history(self):
+        """Löscht Sortier- und Umbenennungshistorie samt Ordnerstatistiken."""
+        with self._session() as session:
+            session.query(SortingHistory).delete()
+            session.query(TargetFolder).delete()
+            session.query(RenameHistory).delete()
+        self._invalidate_cache()
 
     # === Korrespondent-Metadaten (lernendes System) ===
 
@@ -807,8 +1355,7 @@ class Database:
             return
 
         korrespondent = korrespondent.strip()
-        session = self.get_session()
-        try:
+        with self._session() as session:
             existing = session.query(KorrespondentMetadata).filter(
                 KorrespondentMetadata.korrespondent == korrespondent
             ).first()
@@ -836,10 +1383,6 @@ class Database:
                 )
                 session.add(entry)
 
-            session.commit()
-        finally:
-            session.close()
-
     def get_korrespondent_metadata(self, korrespondent: str) -> Optional[dict]:
         """
         Gibt gelernte Metadaten für einen Korrespondenten zurück.
@@ -853,8 +1396,7 @@ class Database:
         if not korrespondent or not korrespondent.strip():
             return None
 
-        session = self.get_session()
-        try:
+        with self._session() as session:
             entry = session.query(KorrespondentMetadata).filter(
                 KorrespondentMetadata.korrespondent == korrespondent.strip()
             ).first()
@@ -882,28 +1424,26 @@ class Database:
             if entry.steuerlich_absetzbar:
                 result["steuerlich_absetzbar"] = entry.steuerlich_absetzbar
             return result if result else None
-        finally:
-            session.close()
 
     def get_all_korrespondenten(self) -> list[str]:
         """Gibt alle bekannten Korrespondenten zurück (für Autovervollständigung)."""
-        session = self.get_session()
-        try:
+        with self._session() as session:
             entries = session.query(KorrespondentMetadata).order_by(
                 KorrespondentMetadata.usage_count.desc()
             ).all()
             return [e.korrespondent for e in entries]
-        finally:
-            session.close()
 
 
 # Globale Datenbankinstanz
 _db_instance: Optional[Database] = None
+_db_lock = threading.Lock()
 
 
 def get_database() -> Database:
-    """Gibt die globale Datenbankinstanz zurück."""
+    """Gibt die globale Datenbankinstanz zurück (höchstens eine je Prozess)."""
     global _db_instance
     if _db_instance is None:
-        _db_instance = Database()
+        with _db_lock:
+            if _db_instance is None:
+                _db_instance = Database()
     return _db_instance
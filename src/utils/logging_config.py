@@ -3,26 +3,378 @@ Zentrales Logging-System für PDF Sortier Meister
 
 Konfiguriert das Python logging-Modul für die gesamte Anwendung.
 Logs werden sowohl in die Konsole als auch in eine Datei geschrieben.
+
+Die aufrufenden Threads legen Log-Einträge nur in eine Warteschlange;
+Formatieren und Schreiben übernimmt ein Hintergrund-Thread, damit GUI und
+Worker nicht auf die Festplatte warten.
 """
 
+import atexit
 import logging
+import mmap
 import os
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 
 # Globale Logger-Instanz
 _logger: logging.Logger | None = None
 
+# Hintergrund-Thread, der die eigentlichen Handler bedient
+_listener: "_BatchingQueueListener | None" = None
+
+# Schützt Leeren und Beenden des Hintergrund-Threads vor gleichzeitigen Aufrufen
+_listener_lock = threading.Lock()
+
+# Datei-Handler (für flush vor dem Lesen)
+_file_handler: "_BufferedRotatingFileHandler | None" = None
+
+# sys.excepthook vor setup_logging (wird nach dem Loggen weiter aufgerufen)
+_previous_excepthook = None
+
+# Logger der Convenience-Funktionen ("pdf", "llm", "user"), einmal aufgelöst
+_category_loggers: dict[str, logging.Logger] = {}
+
+# Der Hintergrund-Thread sammelt Einträge bis zu BATCH_WINDOW Sekunden bzw.
+# BATCH_SIZE Einträge und schreibt sie dann gemeinsam
+BATCH_WINDOW = 0.05
+BATCH_SIZE = 256
+
+
+class _RawQueueHandler(QueueHandler):
+    """
+    QueueHandler, der Einträge unformatiert weiterreicht.
+
+    Zeitstempel und Nachricht werden erst im Hintergrund-Thread formatiert
+    (der Standard-QueueHandler formatiert schon im aufrufenden Thread).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# Datumsformat der Log-Datei (wird ohne strftime erzeugt, siehe _SecondCachedFormatter)
+_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class _SecondCachedFormatter(logging.Formatter):
+    """
+    Formatter, der den Zeitstempel nur einmal je Sekunde formatiert.
+
+    Das Datumsformat hat Sekundenauflösung; bei vielen Einträgen pro Sekunde
+    wäre localtime/strftime je Eintrag doppelte Arbeit. Das Standardformat
+    _DATE_FORMAT wird per f-String statt strftime erzeugt. Läuft nur im
+    Hintergrund-Thread, braucht also keine Sperre.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_second = -1
+        self._last_time = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        if datefmt is not None and datefmt != self.datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._last_second:
+            if self.datefmt == _DATE_FORMAT:
+                t = self.converter(second)
+                self._last_time = (
+                    f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d} "
+                    f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}"
+                )
+            else:
+                self._last_time = super().formatTime(record, datefmt)
+            self._last_second = second
+        return self._last_time
+
+
+class _DetailedFormatter(_SecondCachedFormatter):
+    """
+    Formatter der Log-Datei ("Zeit | Level | Logger:Zeile | Nachricht").
+
+    Setzt die Zeile direkt zusammen, statt das %-Format je Eintrag über
+    record.__dict__ auszuwerten; Exceptions und Stack hängt weiterhin
+    logging.Formatter.format an.
+    """
+
+    def __init__(self):
+        super().__init__(
+            "%(asctime)s | %(levelname)-8s | %(name)s:%(lineno)d | %(message)s",
+            datefmt=_DATE_FORMAT,
+        )
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        return f"{record.asctime} | {record.levelname:<8} | {record.name}:{record.lineno} | {record.message}"
+
+
+class _SimpleFormatter(logging.Formatter):
+    """Formatter der Konsole ("Level | Nachricht"), ohne %-Format je Eintrag."""
+
+    def __init__(self):
+        super().__init__("%(levelname)-8s | %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        return f"{record.levelname:<8} | {record.message}"
+
+
+class _BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler, der nicht nach jedem Eintrag auf die Platte schreibt.
+
+    Die Zeilen werden einmal formatiert, kodiert und in einem
+    wiederverwendeten bytearray gesammelt; geschrieben wird ab ERROR sofort,
+    sonst nach jedem Block des Hintergrund-Threads (oder ab _BUFFER_LIMIT
+    Bytes) in einem Stück. Die Dateigröße für die Rotation wird beim Öffnen
+    einmal per tell() ermittelt und danach mitgezählt, statt sie je Eintrag
+    abzufragen; ob die Datei rotiert werden darf, wird erst an der
+    Größengrenze geprüft. Welche Sicherungsdateien existieren, wird bei der
+    ersten Rotation einmal ermittelt und danach mitgeführt.
+    """
+
+    # Ab dieser Puffergröße wird auch innerhalb eines Blocks geschrieben
+    _BUFFER_LIMIT = 64 * 1024
+
+    def __init__(self, *args, **kwargs):
+        self._buffer = bytearray()
+        self._size = 0
+        # _backups[i] = Sicherung "<datei>.<i + 1>" existiert (None = noch nicht geprüft)
+        self._backups: list[bool] | None = None
+        super().__init__(*args, **kwargs)
+
+    def _open(self):
+        # Verzeichnis erst beim ersten Schreiben anlegen (im Hintergrund-Thread)
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        # Binär und ungepuffert: kodiert und gepuffert wird schon im bytearray,
+        # jedes write ist damit direkt ein os.write auf den Dateideskriptor
+        stream = open(self.baseFilename, "ab", buffering=0)
+        try:
+            self._size = stream.tell()
+        except OSError:
+            # z.B. Pipes
+            self._size = 0
+        return stream
+
+    def _encode(self, record: logging.LogRecord) -> bytes:
+        msg = self.format(record) + self.terminator
+        return msg.encode(self.encoding or "utf-8", errors="replace")
+
+    def _should_rollover(self, length: int) -> bool:
+        if self.maxBytes <= 0:
+            return False
+        if self._size + len(self._buffer) + length < self.maxBytes:
+            return False
+        # Erst an der Grenze prüfen (wie die Standardbibliothek, aber ohne
+        # zwei stat-Aufrufe je Eintrag): Sonderdateien nie rotieren
+        if os.path.exists(self.baseFilename) and not os.path.isfile(self.baseFilename):
+            self.maxBytes = 0
+            return False
+        return True
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        # Die Rotation prüft emit anhand der schon kodierten Zeile
+        return False
+
+    def _backup_name(self, index: int) -> str:
+        return self.rotation_filename(f"{self.baseFilename}.{index}")
+
+    def doRollover(self):
+        # Wie RotatingFileHandler.doRollover, aber ohne exists-Prüfung je
+        # Sicherungsdatei: nur belegte Nummern werden verschoben
+        self.flush()
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if self.backupCount > 0:
+            if self._backups is None:
+                self._backups = [
+                    os.path.exists(self._backup_name(i))
+                    for i in range(1, self.backupCount + 1)
+                ]
+            if self._backups[-1]:
+                os.remove(self._backup_name(self.backupCount))
+            for i in range(self.backupCount - 1, 0, -1):
+                if self._backups[i - 1]:
+                    os.replace(self._backup_name(i), self._backup_name(i + 1))
+            self.rotate(self.baseFilename, self._backup_name(1))
+            self._backups = [True] + self._backups[:-1]
+        if not self.delay:
+            self.stream = self._open()
+        self._size = 0
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            data = self._encode(record)
+            if self._should_rollover(len(data)):
+                self.doRollover()
+            self._buffer += data
+            if record.levelno >= logging.ERROR or len(self._buffer) >= self._BUFFER_LIMIT:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        with self.lock:
+            if not self._buffer:
+                return
+            if self.stream is None:
+                self.stream = self._open()
+            view = memoryview(self._buffer)
+            try:
+                # Ungepuffertes write kann weniger als alles schreiben
+                while view:
+                    view = view[self.stream.write(view):]
+            finally:
+                view.release()
+            self._size += len(self._buffer)
+            self._buffer.clear()
+
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler, der nur ab ERROR sofort leert (sonst nach jedem Block)."""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class _FlushRequest:
+    """Markierung in der Warteschlange: alles davor schreiben, dann done setzen."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class _BatchingQueueListener(QueueListener):
+    """
+    QueueListener, der Einträge blockweise abarbeitet.
+
+    Nach dem ersten Eintrag wartet er bis zu BATCH_WINDOW Sekunden auf
+    weitere und leert die Handler erst nach dem ganzen Block - bei vielen
+    Einträgen ein Schreibvorgang je Block statt je Zeile.
+    """
+
+    def _monitor(self):
+        while True:
+            batch = [self.dequeue(True)]
+            deadline = time.monotonic() + BATCH_WINDOW
+            while batch[-1] is not self._sentinel and len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            for record in batch:
+                if record is self._sentinel:
+                    self._flush_handlers()
+                    return
+                if isinstance(record, _FlushRequest):
+                    self._flush_handlers()
+                    record.done.set()
+                    continue
+                self.handle(record)
+            self._flush_handlers()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wartet, bis alle bisher eingereihten Einträge geschrieben sind.
+
+        Der Thread läuft dabei weiter (anders als stop/start).
+
+        Returns:
+            False, wenn der Thread nicht läuft oder nicht rechtzeitig fertig wurde
+        """
+        if self._thread is None:
+            return False
+        request = _FlushRequest()
+        self.queue.put_nowait(request)
+        return request.done.wait(timeout)
+
+    def _flush_handlers(self):
+        for handler in self.handlers:
+            handler.flush()
+
+
+def _stop_listener():
+    """Schreibt ausstehende Einträge, beendet den Hintergrund-Thread und schließt die Handler."""
+    global _listener, _file_handler
+    with _listener_lock:
+        _file_handler = None
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def _drain_listener():
+    """Wartet, bis der Hintergrund-Thread alle wartenden Einträge geschrieben hat."""
+    # Unter der Sperre: _stop_listener kann die Markierung nicht überholen
+    with _listener_lock:
+        if _listener is not None:
+            _listener.flush()
+
+
+def _log_uncaught_exception(exc_type, exc, tb):
+    """sys.excepthook: loggt unbehandelte Exceptions, bevor das Programm endet."""
+    if _logger is not None and not issubclass(exc_type, KeyboardInterrupt):
+        log_exception(_logger, exc, "Unbehandelte Exception")
+        _drain_listener()
+    (_previous_excepthook or sys.__excepthook__)(exc_type, exc, tb)
+
+
+def _install_shutdown_hooks():
+    """
+    Sorgt dafür, dass unbehandelte Exceptions geloggt und sofort geschrieben werden.
+
+    Signal-Handler werden bewusst nicht gesetzt: während app.exec() liefen
+    Python-Handler erst beim nächsten Rückruf aus Qt, ein wartendes Fenster
+    würde auf SIGTERM nicht mehr beendet. Stattdessen schreibt die GUI beim
+    Beenden flush_logs() (QApplication.aboutToQuit), den Rest _stop_listener
+    (atexit).
+    """
+    global _previous_excepthook
+    if sys.excepthook is not _log_uncaught_exception:
+        _previous_excepthook = sys.excepthook
+        sys.excepthook = _log_uncaught_exception
+
+
+def flush_logs():
+    """Schreibt alle wartenden Log-Einträge (z.B. beim Beenden der GUI)."""
+    _drain_listener()
 
+
+@lru_cache(maxsize=1)
 def get_log_directory() -> Path:
-    """Gibt das Log-Verzeichnis zurück (im AppData-Ordner)."""
+    """
+    Gibt das Log-Verzeichnis zurück (im AppData-Ordner).
+
+    Wird nur einmal ermittelt (Tests: get_log_directory.cache_clear()); angelegt
+    wird es erst, wenn der Datei-Handler zum ersten Mal schreibt.
+    """
     app_data = os.environ.get("APPDATA", os.path.expanduser("~"))
-    log_dir = Path(app_data) / "PDF_Sortier_Meister" / "logs"
-    log_dir.mkdir(parents=True, exist_ok=True)
-    return log_dir
+    return Path(app_data) / "PDF_Sortier_Meister" / "logs"
 
 
 def setup_logging(
@@ -45,46 +397,55 @@ def setup_logging(
     Returns:
         Konfigurierter Root-Logger
     """
-    global _logger
+    global _logger, _listener, _file_handler
 
     # Root-Logger für die Anwendung
     logger = logging.getLogger("pdf_sortier_meister")
     logger.setLevel(level)
 
     # Vorhandene Handler entfernen (für Rekonfiguration)
+    _stop_listener()
+    _category_loggers.clear()
     logger.handlers.clear()
+    handlers: list[logging.Handler] = []
 
     # Format für Log-Nachrichten
-    detailed_format = logging.Formatter(
-        "%(asctime)s | %(levelname)-8s | %(name)s:%(lineno)d | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-    simple_format = logging.Formatter(
-        "%(levelname)-8s | %(message)s"
-    )
+    detailed_format = _DetailedFormatter()
+    simple_format = _SimpleFormatter()
 
     # Konsolen-Handler
     if console_output:
-        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler = _BufferedStreamHandler(sys.stdout)
         console_handler.setLevel(level)
         console_handler.setFormatter(simple_format)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
 
     # Datei-Handler mit Rotation
     if file_output:
         log_dir = get_log_directory()
         log_file = log_dir / "pdf_sortier_meister.log"
 
-        file_handler = RotatingFileHandler(
+        file_handler = _BufferedRotatingFileHandler(
             log_file,
             maxBytes=max_file_size,
             backupCount=backup_count,
-            encoding="utf-8"
+            encoding="utf-8",
+            delay=True,  # Datei erst beim ersten Schreiben öffnen
         )
         file_handler.setLevel(logging.DEBUG)  # Datei bekommt mehr Details
         file_handler.setFormatter(detailed_format)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+        _file_handler = file_handler
 
+    # Handler laufen im Hintergrund-Thread, der Logger füllt nur die Warteschlange
+    if handlers:
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(_RawQueueHandler(log_queue))
+        _listener = _BatchingQueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        _install_shutdown_hooks()
+
+    if file_output:
         # Erste Log-Nachricht mit Startzeit
         logger.info(f"=== PDF Sortier Meister gestartet ===")
         logger.debug(f"Log-Datei: {log_file}")
@@ -123,17 +484,67 @@ def log_exception(logger: logging.Logger, exc: Exception, context: str = ""):
         exc: Die Exception
         context: Optionaler Kontext (z.B. "beim Laden der PDF")
     """
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+    # Traceback der übergebenen Exception (nicht sys.exc_info(): log_exception
+    # darf auch außerhalb des except-Blocks aufgerufen werden)
+    exc_info = (type(exc), exc, exc.__traceback__)
     if context:
-        logger.error(f"{context}: {type(exc).__name__}: {exc}", exc_info=True)
+        logger.error("%s: %s: %s", context, type(exc).__name__, exc, exc_info=exc_info)
     else:
-        logger.error(f"{type(exc).__name__}: {exc}", exc_info=True)
+        logger.error("%s: %s", type(exc).__name__, exc, exc_info=exc_info)
 
 
+@lru_cache(maxsize=1)
 def get_log_file_path() -> Path:
     """Gibt den Pfad zur aktuellen Log-Datei zurück."""
     return get_log_directory() / "pdf_sortier_meister.log"
 
 
+# Blockgröße beim Rückwärtslesen der Log-Datei
+_TAIL_BLOCK_SIZE = 8192
+
+
+def _tail(path: Path, lines: int) -> str:
+    """
+    Liest die letzten Zeilen einer Datei, ohne die ganze Datei zu laden.
+
+    Die Datei wird in den Speicher eingeblendet und von hinten nach
+    Zeilenumbrüchen durchsucht; das Betriebssystem lädt nur die Seiten am
+    Dateiende. Geht das nicht (z.B. leere Datei), wird blockweise gelesen.
+    """
+    if lines <= 0:
+        return ""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Abschließenden Zeilenumbruch nicht als eigene Zeile zählen
+            pos = len(mm) - 1 if mm[-1:] == b"\n" else len(mm)
+            for _ in range(lines):
+                pos = mm.rfind(b"\n", 0, pos)
+                if pos < 0:
+                    break
+            return mm[pos + 1:].decode("utf-8", errors="replace")
+    except (OSError, ValueError):
+        return _tail_by_seeking(path, lines)
+
+
+def _tail_by_seeking(path: Path, lines: int) -> str:
+    """Wie _tail, liest aber von hinten blockweise mit seek/read."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buffer = b""
+        # Eine Zeile mehr: die erste gelesene ist meist nur ein Bruchstück
+        while pos > 0 and buffer.count(b"\n") <= lines:
+            read_size = min(_TAIL_BLOCK_SIZE, pos)
+            pos -= read_size
+            f.seek(pos)
+            buffer = f.read(read_size) + buffer
+
+    tail = buffer.splitlines(keepends=True)[-lines:]
+    return b"".join(tail).decode("utf-8", errors="replace")
+
+
 def get_recent_logs(lines: int = 100) -> str:
     """
     Liest die letzten Zeilen aus der Log-Datei.
@@ -144,45 +555,72 @@ def get_recent_logs(lines: int = 100) -> str:
     Returns:
         Log-Inhalt als String
     """
+    # Gepufferte Zeilen zuerst schreiben
+    if _file_handler is not None:
+        _file_handler.flush()
+
     log_file = get_log_file_path()
     if not log_file.exists():
         return "Keine Log-Datei gefunden."
 
     try:
-        with open(log_file, "r", encoding="utf-8") as f:
-            all_lines = f.readlines()
-            return "".join(all_lines[-lines:])
+        return _tail(log_file, lines)
     except Exception as e:
         return f"Fehler beim Lesen der Logs: {e}"
 
 
+def _category_logger(name: str) -> logging.Logger:
+    """Logger einer Kategorie; nach dem ersten Aufruf ohne getLogger-Sperre."""
+    logger = _category_loggers.get(name)
+    if logger is None:
+        logger = _category_loggers[name] = get_logger(name)
+    return logger
+
+
+def _log_fast(logger: logging.Logger, level: int, msg: str, *args):
+    """
+    Erzeugt den Eintrag direkt, ohne Logger.info.
+
+    Logger._log ermittelt per Stack-Durchlauf Datei und Zeile des Aufrufers -
+    für die Convenience-Funktionen stünde dort ohnehin immer diese Datei.
+    Die Zeilennummer im Dateiformat ist für diese Einträge daher 0.
+    """
+    record = logger.makeRecord(logger.name, level, __file__, 0, msg, args, None)
+    logger.handle(record)
+
+
 # Convenience-Funktionen für häufige Log-Kategorien
+# (Nachrichten werden erst formatiert, wenn ein Handler sie ausgibt)
 def log_pdf_operation(action: str, pdf_path: Path, details: str = ""):
     """Loggt eine PDF-Operation."""
-    logger = get_logger("pdf")
-    msg = f"{action}: {pdf_path.name}"
+    logger = _category_logger("pdf")
+    if not logger.isEnabledFor(logging.INFO):
+        return
     if details:
-        msg += f" | {details}"
-    logger.info(msg)
+        _log_fast(logger, logging.INFO, "%s: %s | %s", action, pdf_path.name, details)
+    else:
+        _log_fast(logger, logging.INFO, "%s: %s", action, pdf_path.name)
 
 
 def log_llm_request(provider: str, success: bool, details: str = ""):
     """Loggt eine LLM-Anfrage."""
-    logger = get_logger("llm")
+    logger = _category_logger("llm")
+    level = logging.INFO if success else logging.WARNING
+    if not logger.isEnabledFor(level):
+        return
     status = "OK" if success else "FEHLER"
-    msg = f"[{provider}] {status}"
     if details:
-        msg += f" | {details}"
-    if success:
-        logger.info(msg)
+        _log_fast(logger, level, "[%s] %s | %s", provider, status, details)
     else:
-        logger.warning(msg)
+        _log_fast(logger, level, "[%s] %s", provider, status)
 
 
 def log_user_action(action: str, details: str = ""):
     """Loggt eine Benutzeraktion."""
-    logger = get_logger("user")
-    msg = action
+    logger = _category_logger("user")
+    if not logger.isEnabledFor(logging.INFO):
+        return
     if details:
-        msg += f" | {details}"
-    logger.info(msg)
+        _log_fast(logger, logging.INFO, "%s | %s", action, details)
+    else:
+        _log_fast(logger, logging.INFO, "%s", action)
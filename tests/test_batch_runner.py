@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from src.ml.batch_runner import BatchRunner, _TokenBucket
+
+
+def test_batch_runner_keeps_order_and_limits_concurrency() -> None:
+    active = 0
+    max_active = 0
+
+    async def worker(item: int) -> int:
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01 * (5 - item))
+        active -= 1
+        return item * 10
+
+    results = asyncio.run(BatchRunner(max_concurrency=2).run(list(range(5)), worker))
+
+    assert results == [0, 10, 20, 30, 40]
+    assert max_active == 2
+
+
+def test_token_bucket_waits_once_the_minute_budget_is_used() -> None:
+    async def consume() -> float:
+        bucket = _TokenBucket(per_minute=6000)  # 100 pro Sekunde
+        await bucket.acquire(6000)
+        start = time.monotonic()
+        await bucket.acquire(10)
+        return time.monotonic() - start
+
+    assert asyncio.run(consume()) >= 0.08
@@ -0,0 +1,465 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import src.ml.classifier as classifier_module
+from src.ml.classifier import PDFClassifier
+from src.utils.config import Config
+from src.utils.database import Database
+
+
+@pytest.fixture
+def classifier(tmp_path: Path, monkeypatch) -> PDFClassifier:
+    config = Config(str(tmp_path / "config.json"))
+    database = Database(tmp_path / "history.db")
+    monkeypatch.setattr(classifier_module, "get_config", lambda: config)
+    monkeypatch.setattr(classifier_module, "get_database", lambda: database)
+    return PDFClassifier()
+
+
+def _learn(classifier: PDFClassifier, tmp_path: Path, folder: str, text: str) -> Path:
+    target = tmp_path / "ziel" / folder
+    target.mkdir(parents=True, exist_ok=True)
+    classifier.learn(tmp_path / "scan.pdf", target, text)
+    return target
+
+
+def test_learn_appends_without_full_retrain(classifier, tmp_path: Path, monkeypatch) -> None:
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+
+    retrains = []
+    original_retrain = classifier._retrain
+    monkeypatch.setattr(classifier, "_retrain", lambda: retrains.append(original_retrain()))
+
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand")
+
+    assert retrains == []
+    assert classifier.tfidf_matrix.shape[0] == 2
+    assert len(classifier.training_entries) == 2
+
+    suggestions = classifier.suggest("Haftpflicht Versicherungsschein", max_suggestions=1)
+    assert suggestions[0].folder_name == "Versicherung"
+    assert classifier.training_entries[-1].target_folder_name == "Strom"
+
+
+def test_preprocess_text_removes_stopwords_and_short_words(classifier) -> None:
+    processed = classifier._preprocess_text("Die Rechnung für den Monat über 20 EUR\n\nvon Strom und Gas")
+
+    assert processed == "rechnung monat eur strom gas"
+
+
+def test_retrain_backfills_preprocessed_text(classifier, tmp_path: Path) -> None:
+    classifier.db.add_sorting_entry(
+        original_filename="alt.pdf",
+        original_path=str(tmp_path / "alt.pdf"),
+        target_folder=str(tmp_path / "ziel" / "Bank"),
+        target_folder_name="Bank",
+        extracted_text="Kontoauszug der Sparkasse",
+    )
+
+    classifier._retrain()
+
+    entry = next(classifier.db.get_entries_with_text())
+    assert entry.preprocessed_text == "kontoauszug sparkasse"
+
+
+def test_retrain_streams_entries_in_batches(classifier, tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(classifier_module, "_RETRAIN_BATCH_SIZE", 2)
+    for folder in ("Strom", "Versicherung", "Strom", "Bank", "Strom"):
+        _learn(classifier, tmp_path, folder, f"Dokument Ablage {folder}")
+
+    classifier._retrain()
+    expected = classifier._transform(
+        [e.preprocessed_text for e in classifier.db.get_entries_with_text()]
+    )
+
+    assert [e.target_folder_name for e in classifier.training_entries] == [
+        "Strom", "Versicherung", "Strom", "Bank", "Strom"
+    ]
+    assert classifier.training_entries[0].extracted_text is None
+    np.testing.assert_allclose(
+        classifier.tfidf_matrix.toarray(), expected.toarray(), rtol=1e-6
+    )
+
+
+def test_text_similarity_groups_scores_by_folder(classifier, tmp_path: Path) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Jahresabrechnung Stadtwerke")
+
+    suggestions = classifier._suggest_by_text_similarity(
+        classifier._vectorize_query("Stromrechnung Stadtwerke"), 5
+    )
+
+    assert [s.folder_name for s in suggestions] == ["Strom"]
+    assert 0.1 < suggestions[0].confidence <= 0.95
+
+
+def test_model_round_trip(classifier, tmp_path: Path) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+
+    classifier.flush()
+    reloaded = PDFClassifier()
+
+    assert reloaded.tfidf_matrix.shape == classifier.tfidf_matrix.shape
+    assert [e.target_folder_name for e in reloaded.training_entries] == ["Strom", "Versicherung"]
+    query = ["Stromrechnung Stadtwerke Abschlag"]
+    assert (reloaded.vectorizer.transform(query) != classifier.vectorizer.transform(query)).nnz == 0
+    suggestions = reloaded._suggest_by_text_similarity(
+        reloaded._vectorize_query("Stromrechnung Stadtwerke"), 1
+    )
+    assert suggestions[0].folder_name == "Strom"
+
+
+def test_legacy_pickle_model_is_retrained_as_float32(classifier, tmp_path: Path) -> None:
+    import pickle
+
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    with open(classifier._legacy_model_path, "wb") as f:
+        pickle.dump({
+            "vectorizer": classifier.vectorizer,
+            "tfidf_matrix": classifier.tfidf_matrix,
+            "training_entries": classifier.training_entries,
+        }, f)
+    classifier.model_path.unlink()
+
+    classifier.flush()
+    reloaded = PDFClassifier()
+
+    assert reloaded.model_path.exists()
+    assert not reloaded._legacy_model_path.exists()
+    assert reloaded.tfidf_matrix.shape[0] == 1
+    assert reloaded.tfidf_matrix.dtype == np.float32
+
+
+def test_folder_cache_prefers_shallow_folders(classifier, tmp_path: Path) -> None:
+    root = tmp_path / "ablage"
+    (root / "Banken").mkdir(parents=True)
+    (root / "Archiv" / "Alt" / "Banken").mkdir(parents=True)
+    (root / ".versteckt" / "Intern").mkdir(parents=True)
+
+    classifier._build_folder_cache([root])
+
+    assert classifier._folder_cache["banken"] == root / "Banken"
+    assert classifier._folder_cache["ablage"] == root
+    assert "intern" not in classifier._folder_cache
+
+
+def test_tfidf_matrix_uses_float32(classifier, tmp_path: Path) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+
+    assert classifier.tfidf_matrix.dtype == np.float32
+
+
+def test_folder_ids_are_persisted_with_the_model(classifier, tmp_path: Path) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Jahresabrechnung Stadtwerke")
+
+    classifier.flush()
+    reloaded = PDFClassifier()
+
+    assert reloaded._entry_folder_ids.dtype == np.int32
+    assert reloaded._entry_folder_ids.tolist() == [0, 1, 0]
+    assert reloaded._folder_names == ["Strom", "Versicherung"]
+
+
+def test_idf_drops_singleton_terms_with_enough_data(classifier) -> None:
+    texts = [f"stromrechnung stadtwerke einzelwort{i}" for i in range(6)]
+    texts += [f"haftpflicht beitrag einzelwort{i + 6}" for i in range(6)]
+
+    classifier._fit_tfidf(classifier._count_terms(texts))
+
+    assert classifier._transform(["stromrechnung stadtwerke"]).nnz == 3
+    assert classifier._transform(["einzelwort0"]).nnz == 0
+
+
+def test_parallel_term_counts_match_serial(classifier, monkeypatch) -> None:
+    texts = [f"stromrechnung stadtwerke abschlag{i % 3}" for i in range(8)]
+    serial = classifier._count_terms(texts)
+
+    monkeypatch.setattr(classifier_module, "_PARALLEL_COUNT_MIN", 1)
+    parallel = classifier._count_terms(texts)
+
+    assert (serial != parallel).nnz == 0
+
+
+def test_parallel_preprocessing_matches_serial(classifier, tmp_path: Path, monkeypatch) -> None:
+    texts = [f"Rechnung der Stadtwerke Nummer {i} für Strom" for i in range(5)]
+    for i, text in enumerate(texts):
+        classifier.db.add_sorting_entry(
+            original_filename=f"{i}.pdf",
+            original_path=str(tmp_path / f"{i}.pdf"),
+            target_folder=str(tmp_path / "ziel" / "Strom"),
+            target_folder_name="Strom",
+            extracted_text=text,
+        )
+    monkeypatch.setattr(classifier_module, "_PARALLEL_PREPROCESS_MIN", 1)
+    monkeypatch.setattr(classifier.db, "update_preprocessed_texts", lambda texts: None)
+
+    batch = list(classifier.db.get_entries_with_text())
+    assert classifier._batch_texts(batch) == [
+        classifier_module._preprocess_text_uncached(e.extracted_text) for e in batch
+    ]
+
+
+def test_retrain_processes_duplicate_texts_once(classifier, tmp_path: Path, monkeypatch) -> None:
+    for name, text in [("a", "Kontoauszug Sparkasse Girokonto"), ("b", "Stromrechnung Stadtwerke"),
+                       ("c", "Kontoauszug Sparkasse Girokonto")]:
+        classifier.db.add_sorting_entry(
+            original_filename=f"{name}.pdf",
+            original_path=str(tmp_path / f"{name}.pdf"),
+            target_folder=str(tmp_path / "ziel" / name),
+            target_folder_name=name,
+            extracted_text=text,
+        )
+    counted = []
+    count_terms = classifier._count_terms
+    monkeypatch.setattr(classifier, "_count_terms", lambda texts: counted.extend(texts) or count_terms(texts))
+
+    classifier._retrain()
+
+    assert len(counted) == 2
+    matrix = classifier.tfidf_matrix
+    assert matrix.shape[0] == 3
+    assert (matrix[0] != matrix[2]).nnz == 0
+    assert [e.target_folder_name for e in classifier.training_entries] == ["a", "b", "c"]
+
+
+def test_idf_keeps_all_seen_terms_for_small_training_sets(classifier) -> None:
+    classifier._fit_tfidf(
+        classifier._count_terms(["stromrechnung stadtwerke", "haftpflicht beitrag"])
+    )
+
+    assert classifier._transform(["haftpflicht"]).nnz == 1
+    assert classifier._transform(["unbekannt"]).nnz == 0
+
+
+def test_iter_by_score_yields_descending_indices() -> None:
+    scores = np.array([0.2, 0.9, 0.1, 0.5, 0.7])
+
+    assert list(classifier_module._iter_by_score(scores, 2)) == [1, 4, 3, 0, 2]
+    assert list(classifier_module._iter_by_score(scores, 10)) == [1, 4, 3, 0, 2]
+
+
+def test_loaded_matrix_is_memory_mapped(classifier, tmp_path: Path) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+
+    classifier.flush()
+    reloaded = PDFClassifier()
+
+    assert not reloaded.tfidf_matrix.data.flags.writeable
+    assert (reloaded.tfidf_matrix != classifier.tfidf_matrix).nnz == 0
+
+    _learn(reloaded, tmp_path, "Versicherung", "Haftpflicht Beitragsrechnung")
+    assert reloaded.tfidf_matrix.shape[0] == 3
+
+
+def test_learn_after_load_saves_to_new_files(classifier, tmp_path: Path) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+    classifier.flush()
+
+    reloaded = PDFClassifier()
+    mapped = reloaded.tfidf_matrix.data
+    loaded_values = np.array(mapped)
+    reloaded.suggest("Haftpflicht Versicherungsschein")
+    _learn(reloaded, tmp_path, "Bank", "Kontoauszug Girokonto Sparkasse Umsätze")
+    reloaded.flush()
+
+    # Die eingeblendete Datei wurde nicht überschrieben
+    assert np.array_equal(mapped, loaded_values)
+    assert reloaded._csc is None
+    again = PDFClassifier()
+    assert again.tfidf_matrix.shape[0] == 3
+    assert again.training_entries[-1].target_folder_name == "Bank"
+    assert sorted(p.name for p in again.model_path.parent.glob("classifier.*.npy")) == [
+        f"classifier.{part}.{reloaded._generation}.npy"
+        for part in ("data", "idf", "indices", "indptr")
+    ]
+
+
+def test_suggest_batch_matches_single_suggestions(classifier, tmp_path: Path) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+    classifier._retrain()
+    texts = ["Stromrechnung der Stadtwerke", "Haftpflicht Beitrag 2024", ""]
+
+    batch = classifier.suggest_batch(texts, max_suggestions=2)
+
+    assert len(batch) == 3
+    for text, suggestions in zip(texts, batch):
+        single = classifier.suggest(text, max_suggestions=2)
+        assert [(s.folder_name, s.reason) for s in suggestions] == [
+            (s.folder_name, s.reason) for s in single
+        ]
+    assert batch[1][0].folder_name == "Versicherung"
+
+
+def test_folder_cache_only_scans_added_roots(classifier, tmp_path: Path, monkeypatch) -> None:
+    first = tmp_path / "erste"
+    second = tmp_path / "zweite"
+    (first / "Banken").mkdir(parents=True)
+    (second / "Steuer").mkdir(parents=True)
+    classifier._update_folder_cache([first])
+
+    scanned = []
+    original_scan = classifier._scan_folder_tree
+    monkeypatch.setattr(
+        classifier, "_scan_folder_tree", lambda root: scanned.append(root) or original_scan(root)
+    )
+
+    classifier._update_folder_cache([first, second])
+    assert scanned == [second]
+    assert classifier._folder_cache["steuer"] == second / "Steuer"
+
+    classifier._update_folder_cache([second])
+    assert scanned == [second]
+    assert "banken" not in classifier._folder_cache
+
+
+def test_keyword_suggestions_are_ranked_by_count(classifier, tmp_path: Path) -> None:
+    for folder, keywords in [
+        ("Strom", ["stadtwerke"]),
+        ("Strom", ["stadtwerke", "abschlag"]),
+        ("Bank", ["stadtwerke", "lastschrift"]),
+    ]:
+        target = tmp_path / "ziel" / folder
+        target.mkdir(parents=True, exist_ok=True)
+        classifier.learn(tmp_path / "scan.pdf", target, "", keywords=keywords)
+
+    suggestions = classifier._suggest_by_keywords(["Stadtwerke"], 5)
+
+    assert [s.folder_name for s in suggestions] == ["Strom", "Bank"]
+    assert suggestions[0].confidence > suggestions[1].confidence
+
+
+def test_german_analyzer_matches_preprocessed_text() -> None:
+    text = "Die Rechnung für den Monat über 20 EUR, z.B. Strom-Abschlag"
+
+    tokens = classifier_module.german_analyzer(text)
+
+    assert tokens[:5] == ["rechnung", "monat", "eur", "strom", "abschlag"]
+    assert "strom abschlag" in tokens
+    assert classifier_module.german_analyzer(
+        classifier_module._preprocess_text_uncached(text)
+    ) == tokens
+
+
+def test_preload_classifier_creates_single_instance(tmp_path: Path, monkeypatch) -> None:
+    config = Config(str(tmp_path / "config.json"))
+    database = Database(tmp_path / "history.db")
+    monkeypatch.setattr(classifier_module, "get_config", lambda: config)
+    monkeypatch.setattr(classifier_module, "get_database", lambda: database)
+    monkeypatch.setattr(classifier_module, "_classifier_instance", None)
+
+    classifier_module.preload_classifier()
+    instance = classifier_module.get_classifier()
+
+    assert isinstance(instance, PDFClassifier)
+    assert classifier_module.get_classifier() is instance
+
+
+def test_learn_defers_saving_until_flush(classifier, tmp_path: Path, monkeypatch) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    saves = []
+    monkeypatch.setattr(classifier, "_write_model_files", lambda: saves.append(True))
+
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Jahresabrechnung Stadtwerke")
+    assert saves == []
+
+    classifier.flush()
+    classifier.flush()
+    assert saves == [True]
+
+
+@pytest.mark.parametrize("date_str, year", [
+    ("15.03.2024", 2024),
+    ("2023-12-01", 2023),
+    ("20. Mai 2025", 2025),
+    ("Rechnung vom 1.1.20", None),
+    ("", None),
+])
+def test_extract_year_from_date(classifier, date_str: str, year) -> None:
+    assert classifier._extract_year_from_date(date_str) == year
+
+
+def test_refit_after_enough_incremental_adds(classifier, tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(classifier_module, "_MIN_ADDS_BEFORE_REFIT", 2)
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+    assert classifier._adds_since_refit == 1
+    assert classifier._transform(["haftpflicht"]).nnz == 0
+
+    _learn(classifier, tmp_path, "Versicherung", "Haftpflicht Beitragsrechnung")
+    assert classifier._adds_since_refit == 0
+    assert classifier._transform(["haftpflicht"]).nnz == 1
+
+
+def test_similarity_equals_cosine_similarity(classifier, tmp_path: Path) -> None:
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Stadtwerke")
+    classifier.tfidf_transformer.set_params(norm=None)
+    classifier._retrain()
+
+    query = classifier._vectorize_query("Stadtwerke Haftpflicht")
+    similarities = (classifier.tfidf_matrix @ query.T).toarray().ravel()
+
+    assert classifier.tfidf_transformer.norm == "l2"
+    np.testing.assert_allclose(
+        similarities, cosine_similarity(query, classifier.tfidf_matrix)[0], rtol=1e-5
+    )
+
+
+def test_inverted_index_matches_matrix_product(classifier, tmp_path: Path, monkeypatch) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Stadtwerke")
+    classifier._retrain()
+    query = classifier._vectorize_query("Stadtwerke Haftpflicht Abschlag")
+
+    via_index = classifier._compute_similarities(query)
+    monkeypatch.setattr(classifier_module, "_INVERTED_INDEX_MAX_TERMS", 0)
+    via_product = classifier._compute_similarities(query)
+
+    np.testing.assert_allclose(via_index, via_product, rtol=1e-6)
+    assert via_index.max() > 0
+
+
+def test_live_path_caches_existence_checks(classifier, tmp_path: Path, monkeypatch) -> None:
+    folder = tmp_path / "Strom"
+    assert classifier._live_path(str(folder)) is None
+
+    folder.mkdir()
+    assert classifier._live_path(str(folder)) is None
+
+    monkeypatch.setattr(classifier_module, "_PATH_CHECK_TTL", -1.0)
+    assert classifier._live_path(str(folder)) == folder
+
+
+def test_suggest_batch_uses_keywords_per_text(classifier, tmp_path: Path) -> None:
+    _learn(classifier, tmp_path, "Strom", "Stromrechnung Abschlag Zählerstand Stadtwerke")
+    _learn(classifier, tmp_path, "Versicherung", "Versicherungsschein Haftpflicht Beitrag")
+    classifier._retrain()
+    texts = ["Stromrechnung der Stadtwerke", "Unbekanntes Schreiben"]
+    keywords = [None, ["Haftpflicht"]]
+
+    batch = classifier.suggest_batch(texts, max_suggestions=2, keywords=keywords)
+
+    for text, text_keywords, suggestions in zip(texts, keywords, batch):
+        single = classifier.suggest(text, text_keywords, max_suggestions=2)
+        assert [(s.folder_name, s.reason) for s in suggestions] == [
+            (s.folder_name, s.reason) for s in single
+        ]
+
+
+def test_get_loaded_classifier_does_not_create_instance(monkeypatch) -> None:
+    monkeypatch.setattr(classifier_module, "_classifier_instance", None)
+    assert classifier_module.get_loaded_classifier() is None
@@ -0,0 +1,94 @@
+from src.ml.claude_provider import ClaudeProvider
+from src.ml.llm_provider import LLMConfig
+
+
+def _provider() -> ClaudeProvider:
+    return ClaudeProvider(LLMConfig(api_key="", model="haiku-4.5"))
+
+
+def test_sanitize_filename_replaces_invalid_chars_and_umlauts() -> None:
+    filename = _provider()._sanitize_filename('Größe: Ä/Ö "Übersicht" Straße?')
+
+    assert filename == "Groesse__Ae_Oe__Uebersicht__Strasse_.pdf"
+
+
+def test_find_similar_folder_prefers_exact_match() -> None:
+    provider = _provider()
+    folders = ["Versicherungen", "Versicherung", "Bank"]
+
+    assert provider._find_similar_folder("versicherung", folders) == "Versicherung"
+    assert provider._find_similar_folder("Bank-Auszüge", folders) == "Bank"
+    assert provider._find_similar_folder("Steuer", folders) is None
+
+
+def test_classify_batch_keeps_document_order() -> None:
+    import asyncio
+    from types import SimpleNamespace
+
+    class FakeAsyncAnthropic:
+        def __init__(self, api_key: str) -> None:
+            self.messages = self
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info) -> None:
+            pass
+
+        async def create(self, messages: list[dict], **kwargs):
+            blocks = messages[0]["content"]
+            assert blocks[0]["cache_control"] == {"type": "ephemeral"}
+            assert "VERFÜGBARE ORDNER" in blocks[0]["text"]
+            folder = "Bank" if "Kontoauszug" in blocks[1]["text"] else "Strom"
+            return SimpleNamespace(
+                content=[SimpleNamespace(text=f"ORDNER: {folder}\nKONFIDENZ: 80")],
+                usage=SimpleNamespace(input_tokens=10, output_tokens=5),
+            )
+
+    provider = ClaudeProvider(LLMConfig(api_key="test", model="haiku-4.5"))
+    provider._client = object()
+    provider._anthropic = SimpleNamespace(AsyncAnthropic=FakeAsyncAnthropic)
+    folders = ["Bank", "Strom"]
+
+    responses = asyncio.run(provider.classify_batch([
+        {"text": "Kontoauszug Sparkasse", "available_folders": folders},
+        {"text": "Stromrechnung Stadtwerke", "available_folders": folders},
+        {"text": "Leer", "available_folders": []},
+    ], concurrency=2))
+
+    assert [r.folder_suggestion for r in responses] == ["Bank", "Strom", None]
+    assert responses[0].tokens_used == 15
+    assert not responses[2].success
+
+
+def test_classify_document_stops_streaming_after_answer() -> None:
+    from types import SimpleNamespace
+
+    consumed = []
+
+    def text_stream():
+        for chunk in ['{"folder": "Ba', 'nk", "reason": "Konto {1}", ', '"confidence": 90}', "\nDenn ..."]:
+            consumed.append(chunk)
+            yield chunk
+
+    class FakeStream:
+        current_message_snapshot = SimpleNamespace(
+            usage=SimpleNamespace(input_tokens=100, output_tokens=12)
+        )
+
+        def __enter__(self):
+            self.text_stream = text_stream()
+            return self
+
+        def __exit__(self, *exc_info) -> None:
+            pass
+
+    provider = ClaudeProvider(LLMConfig(api_key="test", model="haiku-4.5"))
+    provider._client = SimpleNamespace(messages=SimpleNamespace(stream=lambda **kwargs: FakeStream()))
+
+    response = provider.classify_document("Kontoauszug", ["Bank", "Strom"])
+
+    assert response.folder_suggestion == "Bank"
+    assert response.folder_reason == "Konto {1}"
+    assert response.tokens_used == 112
+    assert len(consumed) == 3
@@ -0,0 +1,62 @@
+from pathlib import Path
+
+from src.utils.config import Config
+
+
+def test_batch_writes_config_once(tmp_path: Path, monkeypatch) -> None:
+    config = Config(str(tmp_path / "config.json"))
+    saves = []
+    monkeypatch.setattr(config, "save", lambda: saves.append(True))
+
+    with config.batch():
+        config.set("thumbnail_size", 200)
+        config.set("max_suggestions", 3)
+        assert saves == []
+
+    assert saves == [True]
+    assert config.get("thumbnail_size") == 200
+    assert config.get("max_suggestions") == 3
+
+
+def test_batch_persists_values(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.json"
+    config = Config(str(config_path))
+
+    with config.batch():
+        config.set("owner_name", "Erika Mustermann")
+        config.set("thumbnail_size", 180)
+
+    reloaded = Config(str(config_path))
+    assert reloaded.get("owner_name") == "Erika Mustermann"
+    assert reloaded.get("thumbnail_size") == 180
+
+
+def test_set_saves_once_after_delay_and_flush_writes_atomically(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.json"
+    config = Config(str(config_path))
+    config.SAVE_DELAY = 60
+    saves = []
+    original_save = config.save
+    config.save = lambda: (saves.append(True), original_save())
+
+    config.add_to_last_used("A")
+    config.add_to_last_used("B")
+    assert saves == []
+
+    config.flush()
+    assert saves == [True]
+    assert Config(str(config_path)).get("last_used_folders") == ["A", "B"]
+    assert not (tmp_path / "config.json.tmp").exists()
+
+
+def test_load_merges_nested_defaults(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.json"
+    config_path.write_text('{"llm": {"provider": "openai", "api_key": "x"}}', encoding="utf-8")
+
+    config = Config(str(config_path))
+    config.set_llm_model("gpt-4o-mini")
+
+    llm = config.get_llm_config()
+    assert llm["api_key"] == "x"
+    assert llm["batch_size"] == Config.DEFAULTS["llm"]["batch_size"]
+    assert Config.DEFAULTS["llm"]["model"] == ""
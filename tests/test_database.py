@@ -0,0 +1,284 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from src.utils.database import Database, _text_hash
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> Database:
+    return Database(tmp_path / "history.db")
+
+
+def test_add_rename_entry_stores_entry(database) -> None:
+    database.add_rename_entry("scan.pdf", "2026-01-15_Rechnung.pdf", "Text", ["rechnung"])
+
+    assert database.get_rename_count() == 1
+    entries = database.get_rename_suggestions_by_keywords(["Rechnung"])
+    assert [e.new_filename for e in entries] == ["2026-01-15_Rechnung.pdf"]
+
+
+def _add_sorting_entry(database: Database, folder: str, keywords: list[str]) -> None:
+    database.add_sorting_entry("scan.pdf", "/scan/scan.pdf", f"/ziel/{folder}", folder, keywords=keywords)
+
+
+def test_search_similar_keywords_matches_whole_keywords(database) -> None:
+    _add_sorting_entry(database, "Strom", ["Stromrechnung", "Stadtwerke München"])
+    _add_sorting_entry(database, "Bank", ["Kontoauszug"])
+
+    assert [e.target_folder_name for e in database.search_similar_keywords(["STROMRECHNUNG"])] == ["Strom"]
+    assert [e.target_folder_name for e in database.search_similar_keywords(["stadtwerke münchen"])] == ["Strom"]
+    # Nur ein Teil eines Schlüsselworts zählt nicht
+    assert database.search_similar_keywords(["stadtwerke"]) == []
+    assert database.search_similar_keywords(['"', "-"]) == []
+
+
+def test_keyword_index_is_built_for_existing_databases(tmp_path: Path) -> None:
+    import sqlite3
+
+    db_path = tmp_path / "history.db"
+    _add_sorting_entry(Database(db_path), "Bank", ["Kontoauszug"])
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        DROP TRIGGER sorting_history_fts_ai;
+        DROP TRIGGER sorting_history_fts_ad;
+        DROP TRIGGER sorting_history_fts_au;
+        DROP TABLE sorting_history_fts;
+    """)
+    conn.close()
+
+    reopened = Database(db_path)
+
+    assert [e.target_folder_name for e in reopened.search_similar_keywords(["kontoauszug"])] == ["Bank"]
+
+
+def test_migration_adds_missing_indexes(tmp_path: Path) -> None:
+    import sqlite3
+
+    db_path = tmp_path / "history.db"
+    Database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX ix_target_folders_parent_usage")
+    conn.execute("PRAGMA user_version = 0")  # Datenbank einer älteren Version
+    conn.close()
+
+    database = Database(db_path)
+    database.add_sorting_entry("a.pdf", "/scan/a.pdf", "/ziel/Bank", "Bank")
+
+    conn = sqlite3.connect(db_path)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM target_folders WHERE parent_path = ? ORDER BY usage_count DESC",
+        ("/ziel",),
+    ))
+    conn.close()
+    assert "ix_target_folders_parent_usage" in names
+    assert "ix_target_folders_parent_usage" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_connections_use_wal_journal(database) -> None:
+    with database.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+
+
+def test_reads_do_not_wait_for_open_write_transaction(database) -> None:
+    from src.utils.database import RenameHistory
+
+    writer = database.get_session()
+    try:
+        writer.add(RenameHistory(original_filename="a.pdf", new_filename="b.pdf"))
+        writer.flush()  # hält die Schreibsperre bis zum Commit
+
+        assert database._count_rename_entries() == 0
+    finally:
+        writer.commit()
+        writer.close()
+    assert database._count_rename_entries() == 1
+
+
+def test_bulk_insert_updates_folder_stats_once_per_folder(database) -> None:
+    _add_sorting_entry(database, "Bank", ["Kontoauszug"])
+    entry = {"original_path": "/scan/a.pdf", "keywords": ["Stromrechnung"]}
+
+    count = database.add_sorting_entries_bulk([
+        {**entry, "original_filename": "a.pdf", "target_folder": "/ziel/Strom",
+         "target_folder_name": "Strom", "target_relative_path": "Strom"},
+        {**entry, "original_filename": "b.pdf", "target_folder": "/ziel/Strom",
+         "target_folder_name": "Strom"},
+        {**entry, "original_filename": "c.pdf", "target_folder": "/ziel/Bank",
+         "target_folder_name": "Bank", "target_relative_path": "Bank"},
+    ])
+    database.add_rename_entries_bulk([
+        {"original_filename": "a.pdf", "new_filename": "Strom_2026.pdf", "keywords": ["strom"]},
+    ])
+
+    assert count == 3
+    assert database.get_entry_count() == 4
+    assert database.get_rename_count() == 1
+    folders = {f.name: f for f in database.get_folder_stats()}
+    assert folders["Strom"].usage_count == 2
+    assert folders["Strom"].relative_path == "Strom"
+    assert folders["Strom"].parent_path == str(Path("/ziel"))
+    assert folders["Bank"].usage_count == 2
+    assert folders["Bank"].relative_path == "Bank"
+    assert len(database.search_similar_keywords(["stromrechnung"])) == 3
+
+
+def test_folder_stats_are_upserted(database) -> None:
+    database.add_sorting_entry("a.pdf", "/scan/a.pdf", "/ziel/Bank", "Bank")
+    database.add_sorting_entry("b.pdf", "/scan/b.pdf", "/ziel/Bank", "Bank", target_relative_path="Bank")
+    database.add_sorting_entry("c.pdf", "/scan/c.pdf", "/ziel/Bank", "Bank", target_relative_path="Anders")
+
+    [folder] = database.get_folder_stats()
+    assert folder.usage_count == 3
+    assert folder.relative_path == "Bank"
+    assert folder.parent_path == str(Path("/ziel"))
+
+
+def test_history_getters_stream_entries(database) -> None:
+    _add_sorting_entry(database, "Bank", ["Kontoauszug"])
+    database.add_sorting_entry("b.pdf", "/scan/b.pdf", "/ziel/Strom", "Strom", extracted_text="Strom")
+
+    assert len(list(database.get_all_sorting_entries())) == 2
+    assert [e.target_folder_name for e in database.get_entries_with_text()] == ["Strom"]
+
+
+def test_migration_backfills_normalized_keywords(tmp_path: Path) -> None:
+    import sqlite3
+
+    db_path = tmp_path / "history.db"
+    _add_sorting_entry(Database(db_path), "Strom", ["Stromrechnung", "Überweisung"])
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE sorting_history SET keywords_normalized = NULL")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    reopened = Database(db_path)
+
+    assert [e.target_folder_name for e in reopened.search_similar_keywords(["ÜBERWEISUNG"])] == ["Strom"]
+    [entry] = list(reopened.get_all_sorting_entries())
+    assert entry.keywords_normalized == "|stromrechnung|überweisung|"
+
+
+def test_counts_are_cached_until_next_write(database, monkeypatch) -> None:
+    _add_sorting_entry(database, "Bank", ["Kontoauszug"])
+    assert database.get_entry_count() == 1
+    assert [f.name for f in database.get_most_used_folders(1)] == ["Bank"]
+
+    monkeypatch.setattr(database, "get_session", lambda: pytest.fail("Cache nicht genutzt"))
+    assert database.get_entry_count() == 1
+    assert [f.name for f in database.get_most_used_folders(1)] == ["Bank"]
+    monkeypatch.undo()
+
+    _add_sorting_entry(database, "Strom", ["Stromrechnung"])
+    _add_sorting_entry(database, "Strom", ["Stromrechnung"])
+    database.add_rename_entry("a.pdf", "b.pdf")
+    assert database.get_entry_count() == 3
+    assert database.get_rename_count() == 1
+    assert [f.name for f in database.get_most_used_folders(1)] == ["Strom"]
+
+    database.clear_history()
+    assert database.get_entry_count() == 0
+    assert database.get_most_used_folders() == []
+
+
+def test_migrations_are_skipped_for_current_schema(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "history.db"
+    Database(db_path)
+
+    monkeypatch.setattr(Database, "_migrate_database", lambda self: pytest.fail("Migration erneut ausgeführt"))
+    reopened = Database(db_path)
+
+    assert reopened._get_schema_version() >= 1
+
+
+def test_migration_adds_missing_columns(tmp_path: Path) -> None:
+    import sqlite3
+
+    db_path = tmp_path / "history.db"
+    Database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE sorting_history DROP COLUMN preprocessed_text")
+    conn.execute("ALTER TABLE rename_history DROP COLUMN keywords_normalized")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    Database(db_path)
+
+    conn = sqlite3.connect(db_path)
+    sorting_columns = {row[1] for row in conn.execute("PRAGMA table_info(sorting_history)")}
+    rename_columns = {row[1] for row in conn.execute("PRAGMA table_info(rename_history)")}
+    conn.close()
+    assert "preprocessed_text" in sorting_columns
+    assert "keywords_normalized" in rename_columns
+
+
+def test_migration_adds_unique_folder_path_index(tmp_path: Path) -> None:
+    import sqlite3
+
+    db_path = tmp_path / "history.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE target_folders (id INTEGER PRIMARY KEY, path VARCHAR(1000) NOT NULL, "
+        "name VARCHAR(255) NOT NULL, usage_count INTEGER, last_used DATETIME, created_at DATETIME)"
+    )
+    conn.executemany(
+        "INSERT INTO target_folders (path, name, usage_count) VALUES (?, ?, ?)",
+        [("/ziel/Bank", "Bank", 2), ("/ziel/Bank", "Bank", 3)],
+    )
+    conn.commit()
+    conn.close()
+
+    database = Database(db_path)
+    database.add_sorting_entry("a.pdf", "/scan/a.pdf", "/ziel/Bank", "Bank")
+
+    [folder] = database.get_folder_stats()
+    assert folder.usage_count == 6
+
+
+def test_prepared_folder_queries(database) -> None:
+    database.add_sorting_entry("a.pdf", "/scan/a.pdf", "/ziel/Bank", "Bank", target_relative_path="Bank")
+    database.add_sorting_entry("b.pdf", "/scan/b.pdf", "/ziel/Bank", "Bank", target_relative_path="Bank")
+    database.add_rename_entry("a.pdf", "Bank_2026.pdf", target_folder="/ziel/Bank")
+
+    assert len(database.get_entries_for_folder("/ziel/Bank")) == 2
+    assert [e.original_filename for e in database.get_sorting_history_by_relative_path("Bank", limit=1)] == ["b.pdf"]
+    assert [f.name for f in database.get_subfolders_for_parent(str(Path("/ziel")))] == ["Bank"]
+    assert [r.new_filename for r in database.get_rename_suggestions_by_folder("/ziel/Bank")] == ["Bank_2026.pdf"]
+    assert database.get_rename_suggestions_by_folder("/ziel/Strom") == []
+
+
+def test_text_hashes_are_backfilled_by_migration(tmp_path: Path) -> None:
+    import sqlite3
+
+    db_path = tmp_path / "history.db"
+    database = Database(db_path)
+    for name, body in [("a.pdf", "Kontoauszug"), ("b.pdf", "Kontoauszug"), ("c.pdf", None)]:
+        database.add_sorting_entry(name, f"/scan/{name}", "/ziel/Bank", "Bank", extracted_text=body)
+
+    # Ältere Datenbank ohne Hashes: die Migration trägt sie nach
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE sorting_history SET text_hash = NULL")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    hashes = {e.original_filename: e.text_hash for e in Database(db_path).get_all_sorting_entries()}
+    assert hashes == {"a.pdf": _text_hash("Kontoauszug"), "b.pdf": _text_hash("Kontoauszug"), "c.pdf": None}
+
+
+def test_long_texts_are_stored_compressed(database) -> None:
+    long_text = "Kontoauszug Sparkasse Buchung Überweisung " * 100
+    database.add_sorting_entry("a.pdf", "/scan/a.pdf", "/ziel/Bank", "Bank", extracted_text=long_text)
+    database.add_sorting_entry("b.pdf", "/scan/b.pdf", "/ziel/Bank", "Bank", extracted_text="kurz")
+
+    with database.engine.connect() as conn:
+        stored = conn.execute(text("SELECT extracted_text FROM sorting_history ORDER BY id")).scalars().all()
+    assert isinstance(stored[0], bytes) and len(stored[0]) < len(long_text)
+    assert stored[1] == "kurz"
+    assert [e.extracted_text for e in database.get_entries_with_text()] == [long_text, "kurz"]
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import src.ml.hybrid_classifier as hybrid_module
+from src.ml.hybrid_classifier import HybridClassifier
+from src.ml.llm_provider import LLMProviderType, LLMResponse
+from src.utils.config import Config
+
+
+class SlowProvider:
+    def __init__(self) -> None:
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def classify_document(self, text, available_folders, keywords=None, detected_date=None):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        folder = "Bank" if "Konto" in text else "Strom"
+        return LLMResponse(success=True, folder_suggestion=folder, confidence=0.8, tokens_used=10)
+
+
+@pytest.fixture
+def hybrid(tmp_path: Path, monkeypatch) -> HybridClassifier:
+    config = Config(str(tmp_path / "config.json"))
+    config.set("llm", {"provider": "none", "cache_enabled": False})
+    monkeypatch.setattr(hybrid_module, "get_config", lambda: config)
+    classifier = HybridClassifier()
+    classifier.llm_provider = SlowProvider()
+    classifier.llm_enabled = True
+    monkeypatch.setattr(classifier, "_get_local_folder_suggestions", lambda *args: [])
+    monkeypatch.setattr(
+        classifier, "_get_local_folder_suggestions_batch", lambda documents, _: [[] for _ in documents]
+    )
+    return classifier
+
+
+def test_asuggest_folders_many_runs_llm_calls_concurrently(hybrid, tmp_path: Path) -> None:
+    folders = [tmp_path / "Bank", tmp_path / "Strom"]
+    documents = [{"text": "Kontoauszug"}, {"text": "Stromrechnung"}] * 3
+
+    results = asyncio.run(
+        hybrid.asuggest_folders_many(documents, folders, max_concurrency=3)
+    )
+
+    assert [r[0].folder_name for r in results] == ["Bank", "Strom"] * 3
+    assert hybrid.llm_provider.max_active == 3
+    assert hybrid.get_tokens_used() == 60
+
+
+def test_asuggest_folders_many_without_provider_stays_local(hybrid, tmp_path: Path) -> None:
+    hybrid.llm_provider = None
+    hybrid.llm_enabled = True  # wie nach einer gescheiterten Provider-Erstellung
+
+    results = asyncio.run(
+        hybrid.asuggest_folders_many(
+            [{"text": "Kontoauszug"}], [tmp_path / "Bank"], tokens_per_minute=1000
+        )
+    )
+
+    assert results == [[]]
+
+
+@pytest.mark.parametrize("text, keywords, skipped", [
+    ("Rechnung " * 40, ["Rechnung"], 1),  # Datum + Kategorie ist sicher genug
+    ("Rechnung " * 40, None, 0),
+    ("Kurz", None, 1),
+])
+def test_suggest_filename_skips_llm_when_not_needed(hybrid, text, keywords, skipped) -> None:
+    llm_calls = []
+    hybrid._get_llm_filename_suggestion = lambda *args: llm_calls.append(args)
+
+    hybrid.suggest_filename(text, "scan.pdf", keywords=keywords, detected_date="2026-01-15")
+
+    assert hybrid.get_llm_calls_skipped() == skipped
+    assert len(llm_calls) == 1 - skipped
+
+
+def test_llm_provider_is_created_on_first_use(tmp_path: Path, monkeypatch) -> None:
+    config = Config(str(tmp_path / "config.json"))
+    config.set("llm", {"provider": "ollama", "model": "llama3.1"})
+    monkeypatch.setattr(hybrid_module, "get_config", lambda: config)
+    created = []
+
+    class RecordingOllama(hybrid_module.OllamaProvider):
+        def __init__(self, llm_config) -> None:
+            created.append(llm_config)
+            super().__init__(llm_config)
+
+    monkeypatch.setitem(hybrid_module._PROVIDER_CLASSES, LLMProviderType.OLLAMA, RecordingOllama)
+
+    classifier = HybridClassifier()
+
+    assert classifier.is_llm_available()
+    assert classifier.get_llm_provider_name() == "Ollama"
+    assert created == []
+
+    assert classifier.llm_provider is classifier.llm_provider
+    assert len(created) == 1
+
+
+def test_suggest_folders_batch_sends_duplicates_once(hybrid, tmp_path: Path) -> None:
+    class BatchProvider:
+        def __init__(self) -> None:
+            self.batches = []
+
+        def _truncate_text(self, text, max_chars=None, keywords=None):
+            return text[:20]
+
+        def classify_documents_batch(self, documents, available_folders):
+            self.batches.append([d["text"] for d in documents])
+            return [
+                LLMResponse(success=True, folder_suggestion="Bank" if "Konto" in d["text"] else "Strom",
+                            confidence=0.8)
+                for d in documents
+            ]
+
+    hybrid.llm_provider = BatchProvider()
+    folders = [tmp_path / "Bank", tmp_path / "Strom"]
+    documents = [
+        {"text": "Kontoauszug Januar"},
+        {"text": "Stromrechnung Stadtwerke"},
+        {"text": "Kontoauszug Januar"},
+        # Unterschied erst nach dem Text-Limit -> gleicher Prompt
+        {"text": "Stromrechnung Stadtwerke, Seite 2"},
+    ]
+
+    results = hybrid.suggest_folders_batch(documents, folders)
+
+    assert hybrid.llm_provider.batches == [["Kontoauszug Januar", "Stromrechnung Stadtwerke"]]
+    assert [r[0].folder_name for r in results] == ["Bank", "Strom", "Bank", "Strom"]
+    assert results[0][0] is not results[2][0]
+
+
+def test_local_filename_suggestions_strip_only_the_extension(hybrid) -> None:
+    suggestions = hybrid._generate_local_filename_suggestions(
+        "bericht.pdf_backup.PDF", None, "2026-01-15"
+    )
+
+    assert suggestions[0][0] == "2026-01-15_bericht.pdf_backup.pdf"
+
+
+def test_llm_cache_only_serves_cacheable_methods(hybrid, monkeypatch) -> None:
+    hybrid.config.set("llm", {"provider": "none", "cache_enabled": True})
+    stored = {}
+
+    class DictCache:
+        def get(self, key):
+            return stored.get(key)
+
+        def set(self, key, response):
+            stored[key] = response
+
+    monkeypatch.setattr(hybrid_module, "get_llm_cache", lambda: DictCache())
+    hybrid.llm_provider.config = hybrid_module.LLMConfig(api_key="", model="test")
+    calls = []
+
+    def call():
+        calls.append(1)
+        return LLMResponse(success=True, folder_suggestion="Bank")
+
+    hybrid.llm_provider.CACHEABLE_METHODS = frozenset({"classify_document"})
+    for _ in range(2):
+        hybrid._cached_llm_call("classify_document", lambda: "prompt", call)
+        hybrid._cached_llm_call("send_mail", lambda: "prompt", call)
+
+    assert len(calls) == 3
+    assert len(stored) == 1
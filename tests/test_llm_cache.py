@@ -0,0 +1,46 @@
+import time
+from pathlib import Path
+
+from src.ml.llm_cache import LLMCache
+from src.ml.llm_provider import LLMResponse
+
+
+def test_cache_returns_stored_response_without_tokens(tmp_path: Path) -> None:
+    cache = LLMCache(tmp_path / "llm_cache.db")
+    key = LLMCache.make_key("ClaudeProvider", "haiku-4.5", "Prompt")
+
+    cache.set(key, LLMResponse(
+        success=True, folder_suggestion="Strom", tokens_used=120, metadata={"betrag": "12.50"}
+    ))
+    cached = cache.get(key)
+
+    assert cached.folder_suggestion == "Strom"
+    assert cached.metadata == {"betrag": "12.50"}
+    assert cached.tokens_used == 0
+    assert cache.get(LLMCache.make_key("ClaudeProvider", "sonnet-4", "Prompt")) is None
+
+
+def test_cache_skips_errors_and_expired_entries(tmp_path: Path) -> None:
+    cache = LLMCache(tmp_path / "llm_cache.db", ttl_seconds=-1)
+
+    cache.set("fehler", LLMResponse(success=False, error_message="Rate-Limit"))
+    cache.set("alt", LLMResponse(success=True, folder_suggestion="Bank"))
+
+    assert cache.get("fehler") is None
+    assert cache.get("alt") is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = LLMCache(tmp_path / "llm_cache.db", max_entries=2)
+
+    cache.set("a", LLMResponse(success=True, folder_suggestion="A"))
+    time.sleep(0.01)
+    cache.set("b", LLMResponse(success=True, folder_suggestion="B"))
+    time.sleep(0.01)
+    assert cache.get("a") is not None
+    time.sleep(0.01)
+    cache.set("c", LLMResponse(success=True, folder_suggestion="C"))
+
+    assert cache.get("b") is None
+    assert cache.get("a").folder_suggestion == "A"
+    assert cache.get("c").folder_suggestion == "C"
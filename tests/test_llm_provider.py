@@ -0,0 +1,174 @@
+import pytest
+
+from src.ml.llm_provider import LLMConfig, LLMProvider, LLMResponse
+
+
+class FakeBatchProvider(LLMProvider):
+    SUPPORTS_BATCH_PROMPT = True
+
+    def __init__(self, replies: list[str]) -> None:
+        super().__init__(LLMConfig(api_key="test", model="fake", batch_size=2))
+        self.replies = replies
+        self.prompts: list[str] = []
+        self.max_tokens: list[int] = []
+
+    def _initialize_client(self) -> None:
+        pass
+
+    def is_available(self) -> bool:
+        return True
+
+    def classify_document(self, text, available_folders, keywords=None, detected_date=None):
+        return LLMResponse(success=True, folder_suggestion="Einzeln", tokens_used=1)
+
+    def suggest_filename(self, *args, **kwargs):
+        return LLMResponse(success=False)
+
+    def _complete(self, prompt: str, max_tokens: int) -> tuple[str, int]:
+        self.prompts.append(prompt)
+        self.max_tokens.append(max_tokens)
+        return self.replies.pop(0), 30
+
+
+def test_classify_documents_batch_bundles_documents_per_request() -> None:
+    provider = FakeBatchProvider([
+        "=== DOKUMENT 2 ===\nORDNER: Strom\nKONFIDENZ: 90\n"
+        "**DOKUMENT 1**\nORDNER: Bank\nBEGRÜNDUNG: Kontoauszug\nKONFIDENZ: 80",
+    ])
+    documents = [
+        {"text": "Kontoauszug Sparkasse", "keywords": ["Konto"]},
+        {"text": "Stromrechnung Stadtwerke"},
+        {"text": "Versicherungsschein"},
+    ]
+
+    responses = provider.classify_documents_batch(documents, ["Bank", "Strom"])
+
+    assert len(provider.prompts) == 1
+    assert provider.max_tokens == [2 * 150]
+    assert "=== DOKUMENT 2 ===\nStromrechnung Stadtwerke" in provider.prompts[0]
+    assert [r.folder_suggestion for r in responses] == ["Bank", "Strom", "Einzeln"]
+    assert responses[0].folder_reason == "Kontoauszug"
+    assert [r.tokens_used for r in responses] == [30, 0, 1]
+
+
+def test_classify_documents_batch_reports_missing_sections() -> None:
+    provider = FakeBatchProvider(["=== DOKUMENT 1 ===\nORDNER: Bank\nKONFIDENZ: 80"])
+
+    responses = provider.classify_documents_batch(
+        [{"text": "Kontoauszug"}, {"text": "Stromrechnung"}], ["Bank", "Strom"]
+    )
+
+    assert responses[0].success
+    assert not responses[1].success
+
+
+def test_truncate_text_keeps_head_tail_and_keyword_context() -> None:
+    provider = FakeBatchProvider([])
+    text = "Kopf " * 100 + "Füllung " * 300 + "Stromzähler Nr. 4711 " + "Füllung " * 300 + "Summe 99 EUR"
+
+    truncated = provider._truncate_text(text, max_chars=1000, keywords=["stromzähler"])
+
+    assert truncated.startswith("Kopf Kopf")
+    assert "Stromzähler Nr. 4711" in truncated
+    assert truncated.endswith("Summe 99 EUR")
+    assert len(truncated) <= 1000 + 2 * len("\n[...]\n")
+
+
+def test_truncate_text_without_keyword_match_cuts_the_end() -> None:
+    provider = FakeBatchProvider([])
+
+    truncated = provider._truncate_text("a" * 2000, max_chars=100, keywords=["strom"])
+
+    assert truncated == "a" * 100 + "\n[... Text gekürzt ...]"
+
+
+def test_parse_response_reads_fields_and_metadata() -> None:
+    provider = FakeBatchProvider([])
+    response = (
+        "Hier meine Einschätzung:\n"
+        "  ORDNER: Finanzen/Bank  \n"
+        "BEGRÜNDUNG: Kontoauszug der Sparkasse\r\n"
+        "KONFIDENZ: 85%\n"
+        "KORRESPONDENT: Sparkasse\n"
+        "BETRAG: UNBEKANNT\n"
+    )
+
+    parsed = provider._parse_response(response)
+
+    assert parsed["folder"] == "Finanzen/Bank"
+    assert parsed["reason"] == "Kontoauszug der Sparkasse"
+    assert parsed["confidence"] == pytest.approx(0.85)
+    assert parsed["filename"] is None
+    assert parsed["metadata"] == {"korrespondent": "Sparkasse"}
+    assert provider._parse_response("KONFIDENZ: hoch")["confidence"] == 0.5
+
+
+def test_parse_response_reads_json_answer() -> None:
+    provider = FakeBatchProvider([])
+    response = '```json\n{"folder": "Energie/Strom", "reason": "Stromrechnung", "confidence": 92}\n```'
+
+    parsed = provider._parse_response(response)
+
+    assert parsed["folder"] == "Energie/Strom"
+    assert parsed["reason"] == "Stromrechnung"
+    assert parsed["confidence"] == pytest.approx(0.92)
+
+
+def test_read_until_classified_waits_for_complete_lines() -> None:
+    chunks = iter(["ORDNER: Bank\nBEGRÜNDUNG: Konto\nKONFIDENZ: 8", "5\n", "Weitere Erklärung"])
+
+    text = LLMProvider._read_until_classified(chunks)
+
+    assert text == "ORDNER: Bank\nBEGRÜNDUNG: Konto\nKONFIDENZ: 85\n"
+    assert next(chunks) == "Weitere Erklärung"
+
+
+def test_classify_documents_batch_reads_json_answer() -> None:
+    provider = FakeBatchProvider([
+        '{"1": {"folder": "Bank", "reason": "Kontoauszug", "confidence": 80},'
+        ' "2": {"folder": "Strom", "confidence": "90%"}}',
+    ])
+
+    responses = provider.classify_documents_batch(
+        [{"text": "Kontoauszug"}, {"text": "Stromrechnung"}], ["Bank", "Strom"]
+    )
+
+    assert [r.folder_suggestion for r in responses] == ["Bank", "Strom"]
+    assert responses[0].folder_reason == "Kontoauszug"
+    assert responses[1].confidence == pytest.approx(0.9)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Größe: Übung/März", "Groesse__Uebung_Maerz.pdf"),
+    ("Rechnung 2026.PDF", "Rechnung_2026.PDF"),
+    ("x" * 100, "x" * 80 + ".pdf"),
+])
+def test_sanitize_filename(raw, expected) -> None:
+    assert FakeBatchProvider([])._sanitize_filename(raw) == expected
+
+
+def test_prompts_start_with_document_independent_prefix() -> None:
+    provider = FakeBatchProvider([])
+    folders = ["Bank", "Strom"]
+
+    first = provider._split_prompt_prefix(
+        provider._build_classification_prompt("Kontoauszug", folders, ["Konto"], "2026-01-31")
+    )
+    second = provider._split_prompt_prefix(
+        provider._build_classification_prompt("Stromrechnung", folders)
+    )
+
+    assert first[0] == second[0]
+    assert "Antworte NUR mit JSON" in first[0]
+    assert "Kontoauszug" in first[1] and "2026-01-31" in first[1]
+
+
+@pytest.mark.parametrize("suggested, expected", [
+    ("bank", "Bank"),
+    ("Versicherungen/Auto", "Versicherungen"),
+    ("Strom", "Strom und Gas"),
+    ("Urlaub", None),
+])
+def test_find_similar_folder(suggested, expected) -> None:
+    folders = ["Bank", "Versicherungen", "Strom und Gas"]
+    assert FakeBatchProvider([])._find_similar_folder(suggested, folders) == expected
@@ -0,0 +1,305 @@
+import logging
+import os
+import queue
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.utils import logging_config
+
+
+@pytest.fixture
+def log_dir(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    monkeypatch.setattr(logging_config, "_install_shutdown_hooks", lambda: None)
+    logging_config.get_log_directory.cache_clear()
+    logging_config.get_log_file_path.cache_clear()
+    yield tmp_path / "PDF_Sortier_Meister" / "logs"
+    logging_config.get_log_directory.cache_clear()
+    logging_config.get_log_file_path.cache_clear()
+    logging_config._stop_listener()
+    logging.getLogger("pdf_sortier_meister").handlers.clear()
+    logging_config._logger = None
+
+
+def test_records_are_written_by_background_listener(log_dir: Path) -> None:
+    logger = logging_config.setup_logging(console_output=False)
+    assert [type(h) for h in logger.handlers] == [logging_config._RawQueueHandler]
+
+    logging_config.log_user_action("Ordner gewählt", "Bank")
+    logging_config._stop_listener()
+
+    content = (log_dir / "pdf_sortier_meister.log").read_text(encoding="utf-8")
+    assert "=== PDF Sortier Meister gestartet ===" in content
+    assert "pdf_sortier_meister.user" in content
+    assert "Ordner gewählt | Bank" in content
+
+
+def test_log_file_is_created_on_first_write(log_dir: Path) -> None:
+    logging_config.setup_logging(level=logging.WARNING, console_output=False)
+    assert not log_dir.exists()
+
+    logging_config.get_logger("test").warning("erste Zeile")
+    logging_config._stop_listener()
+
+    content = (log_dir / "pdf_sortier_meister.log").read_text(encoding="utf-8")
+    assert "erste Zeile" in content
+
+
+def test_exceptions_are_formatted_in_listener(log_dir: Path) -> None:
+    logger = logging_config.setup_logging(console_output=False)
+
+    try:
+        raise ValueError("kaputt")
+    except ValueError as exc:
+        logging_config.log_exception(logger, exc, "beim Laden der PDF")
+    logging_config._stop_listener()
+
+    content = (log_dir / "pdf_sortier_meister.log").read_text(encoding="utf-8")
+    assert "beim Laden der PDF: ValueError: kaputt" in content
+    assert "Traceback (most recent call last)" in content
+
+
+def test_uncaught_exceptions_are_written_before_exit(log_dir: Path, monkeypatch) -> None:
+    seen: list[type] = []
+    monkeypatch.setattr(logging_config, "_previous_excepthook", lambda t, e, tb: seen.append(t))
+    logging_config.setup_logging(console_output=False)
+
+    try:
+        raise RuntimeError("abgestürzt")
+    except RuntimeError as exc:
+        logging_config._log_uncaught_exception(RuntimeError, exc, exc.__traceback__)
+
+    content = (log_dir / "pdf_sortier_meister.log").read_text(encoding="utf-8")
+    assert "Unbehandelte Exception: RuntimeError: abgestürzt" in content
+    assert seen == [RuntimeError]
+
+    # Der Hintergrund-Thread läuft danach weiter
+    logging_config.get_logger("test").warning("weiter")
+    logging_config._stop_listener()
+    assert "weiter" in (log_dir / "pdf_sortier_meister.log").read_text(encoding="utf-8")
+
+
+def test_flush_logs_writes_queued_records_and_keeps_logging(log_dir: Path) -> None:
+    logging_config.setup_logging(console_output=False)
+
+    logging_config.get_logger("test").info("vor dem Beenden")
+    logging_config.flush_logs()
+
+    content = (log_dir / "pdf_sortier_meister.log").read_text(encoding="utf-8")
+    assert "vor dem Beenden" in content
+    assert logging_config._listener._thread is not None
+
+
+def test_concurrent_flushes_keep_a_single_listener_thread(log_dir: Path) -> None:
+    logging_config.setup_logging(console_output=False)
+    listener_thread = logging_config._listener._thread
+
+    flushers = [threading.Thread(target=logging_config.flush_logs) for _ in range(8)]
+    for thread in flushers:
+        thread.start()
+    for thread in flushers:
+        thread.join()
+
+    assert logging_config._listener._thread is listener_thread
+    logging_config.get_logger("test").warning("danach")
+    logging_config._stop_listener()
+    assert "danach" in (log_dir / "pdf_sortier_meister.log").read_text(encoding="utf-8")
+
+
+def test_log_exception_outside_except_block(caplog) -> None:
+    logger = logging.getLogger("pdf_sortier_meister.test_exc")
+    try:
+        raise KeyError("fehlt")
+    except KeyError as exc:
+        error = exc
+    caplog.set_level(logging.ERROR, logger=logger.name)
+
+    logging_config.log_exception(logger, error)
+
+    assert caplog.records[0].getMessage() == "KeyError: 'fehlt'"
+    assert caplog.records[0].exc_info[1] is error
+
+
+def test_file_handler_buffers_until_error_and_rotates(tmp_path: Path) -> None:
+    log_file = tmp_path / "app.log"
+    handler = logging_config._BufferedRotatingFileHandler(
+        log_file, maxBytes=200, backupCount=1, encoding="utf-8"
+    )
+    logger = logging.getLogger("pdf_sortier_meister.test_buffer")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        logger.warning("gepuffert")
+        assert log_file.read_text(encoding="utf-8") == ""
+
+        logger.error("sofort")
+        assert log_file.read_text(encoding="utf-8") == "gepuffert\nsofort\n"
+
+        for i in range(30):
+            logger.warning("Zeile %d", i)
+        handler.flush()
+        assert (tmp_path / "app.log.1").exists()
+        assert log_file.stat().st_size < 200
+        assert handler._size == log_file.stat().st_size
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def test_rollover_shifts_only_existing_backups(tmp_path: Path, monkeypatch) -> None:
+    log_file = tmp_path / "app.log"
+    (tmp_path / "app.log.2").write_text("alt\n", encoding="utf-8")
+    handler = logging_config._BufferedRotatingFileHandler(
+        log_file, maxBytes=1, backupCount=3, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    probes: list[str] = []
+    exists = os.path.exists
+    monkeypatch.setattr(os.path, "exists", lambda p: probes.append(str(p)) or exists(p))
+    try:
+        for text in ("eins", "zwei", "drei"):
+            log_file.write_text(text + "\n", encoding="utf-8")
+            handler.doRollover()
+
+        assert [(tmp_path / f"app.log.{i}").read_text(encoding="utf-8") for i in (1, 2, 3)] == [
+            "drei\n", "zwei\n", "eins\n",
+        ]
+        assert sum(".log." in p for p in probes) == 3
+    finally:
+        handler.close()
+
+
+def test_file_handler_continues_size_of_existing_file(tmp_path: Path) -> None:
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes(b"x" * 150)
+    handler = logging_config._BufferedRotatingFileHandler(
+        log_file, maxBytes=200, backupCount=1, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    try:
+        assert handler._size == 150
+        handler.handle(logging.makeLogRecord({"msg": "y" * 60}))
+        handler.flush()
+        assert (tmp_path / "app.log.1").read_bytes() == b"x" * 150
+        assert log_file.read_bytes() == b"y" * 60 + b"\n"
+    finally:
+        handler.close()
+
+
+def test_tail_reads_last_lines(tmp_path: Path, monkeypatch) -> None:
+    log_file = tmp_path / "app.log"
+    log_file.write_text("".join(f"Zeile {i} äöü\n" for i in range(5000)), encoding="utf-8")
+    monkeypatch.setattr(logging_config, "_TAIL_BLOCK_SIZE", 64)
+
+    for tail in (logging_config._tail, logging_config._tail_by_seeking):
+        assert tail(log_file, 3) == "Zeile 4997 äöü\nZeile 4998 äöü\nZeile 4999 äöü\n"
+        assert tail(log_file, 10000).count("\n") == 5000
+    assert logging_config._tail(log_file, 0) == ""
+
+    # Leere Datei (mmap nicht möglich) und fehlender Zeilenumbruch am Ende
+    empty = tmp_path / "leer.log"
+    empty.write_bytes(b"")
+    assert logging_config._tail(empty, 5) == ""
+    partial = tmp_path / "teil.log"
+    partial.write_bytes(b"a\nb\nc")
+    assert logging_config._tail(partial, 2) == "b\nc"
+
+
+def test_convenience_functions_skip_disabled_levels(log_dir: Path, caplog) -> None:
+    logging_config.setup_logging(level=logging.WARNING, console_output=False, file_output=False)
+    caplog.set_level(logging.WARNING, logger="pdf_sortier_meister")
+
+    logging_config.log_pdf_operation("Verschoben", Path("/scan/a.pdf"), "Bank")
+    logging_config.log_llm_request("OpenAI", True)
+    logging_config.log_llm_request("OpenAI", False, "Timeout")
+
+    assert [r.getMessage() for r in caplog.records] == ["[OpenAI] FEHLER | Timeout"]
+    assert caplog.records[0].lineno == 0
+
+
+def test_special_files_are_never_rotated() -> None:
+    if not Path(os.devnull).exists():
+        pytest.skip("kein Gerätedateisystem")
+    handler = logging_config._BufferedRotatingFileHandler(os.devnull, maxBytes=10, encoding="utf-8")
+    try:
+        assert not handler._should_rollover(50)
+        assert handler.maxBytes == 0
+    finally:
+        handler.close()
+
+
+def test_listener_flushes_once_per_batch() -> None:
+    class CountingHandler(logging.Handler):
+        def __init__(self) -> None:
+            super().__init__()
+            self.records: list[str] = []
+            self.flushes = 0
+
+        def emit(self, record: logging.LogRecord) -> None:
+            self.records.append(record.getMessage())
+
+        def flush(self) -> None:
+            self.flushes += 1
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = CountingHandler()
+    listener = logging_config._BatchingQueueListener(log_queue, handler)
+    for i in range(10):
+        log_queue.put(logging.makeLogRecord({"msg": f"Eintrag {i}"}))
+    listener.start()
+    listener.stop()
+
+    assert handler.records == [f"Eintrag {i}" for i in range(10)]
+    assert handler.flushes <= 2
+
+
+def test_formatter_caches_timestamp_per_second() -> None:
+    formatter = logging_config._SecondCachedFormatter("%(asctime)s", datefmt="%Y-%m-%d %H:%M:%S")
+    reference = logging.Formatter("%(asctime)s", datefmt="%Y-%m-%d %H:%M:%S")
+    record = logging.makeLogRecord({"msg": "x", "created": 1_700_000_000.2})
+    later = logging.makeLogRecord({"msg": "x", "created": 1_700_000_000.9})
+    next_second = logging.makeLogRecord({"msg": "x", "created": 1_700_000_001.1})
+
+    for r in (record, later, next_second):
+        assert formatter.format(r) == reference.format(r)
+    assert formatter._last_second == 1_700_000_001
+
+    custom = logging_config._SecondCachedFormatter("%(asctime)s", datefmt="%d.%m.%Y")
+    assert custom.format(record) == logging.Formatter("%(asctime)s", datefmt="%d.%m.%Y").format(record)
+
+
+def test_file_handler_writes_buffered_lines_in_one_piece(tmp_path: Path) -> None:
+    log_file = tmp_path / "app.log"
+    handler = logging_config._BufferedRotatingFileHandler(log_file, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    writes: list[int] = []
+    stream_write = handler.stream.write
+    handler.stream.write = lambda data: writes.append(len(data)) or stream_write(data)
+    try:
+        for text in ("Überweisung", "Kontoauszug", "Gebühr"):
+            handler.handle(logging.makeLogRecord({"msg": text, "levelno": logging.INFO}))
+        handler.flush()
+
+        assert len(writes) == 1
+        assert log_file.read_text(encoding="utf-8") == "Überweisung\nKontoauszug\nGebühr\n"
+    finally:
+        handler.close()
+
+
+def test_fast_formatters_match_format_strings() -> None:
+    detailed = logging_config._DetailedFormatter()
+    simple = logging_config._SimpleFormatter()
+    try:
+        raise ValueError("kaputt")
+    except ValueError:
+        exc_info = sys.exc_info()
+    record = logging.LogRecord(
+        "pdf_sortier_meister.test", logging.ERROR, __file__, 42, "Datei %s", ("a.pdf",), exc_info
+    )
+
+    for fast in (detailed, simple):
+        reference = logging.Formatter(fast._fmt, datefmt=fast.datefmt)
+        assert fast.format(record) == reference.format(record)
@@ -0,0 +1,88 @@
+import json
+from types import SimpleNamespace
+
+from src.ml.llm_provider import LLMConfig
+from src.ml.openai_batch import OpenAIBatchJob
+from src.ml.openai_provider import OpenAIProvider
+
+
+class FakeBatchClient:
+    def __init__(self, statuses: list[str]) -> None:
+        self.statuses = statuses
+        self.uploaded: list[dict] = []
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.cancelled: list[str] = []
+        self.batches = SimpleNamespace(
+            create=self._create_batch, retrieve=self._retrieve, cancel=self.cancelled.append
+        )
+
+    def _create_file(self, file, purpose):
+        assert purpose == "batch"
+        self.uploaded = [json.loads(line) for line in file[1].decode("utf-8").splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        assert input_file_id == "file-in"
+        return SimpleNamespace(id="batch-1")
+
+    def _retrieve(self, batch_id):
+        status = self.statuses.pop(0)
+        return SimpleNamespace(
+            id=batch_id,
+            status=status,
+            output_file_id="file-out" if status == "completed" else None,
+        )
+
+    def _file_content(self, file_id):
+        assert file_id == "file-out"
+        ok = {
+            "custom_id": "a",
+            "response": {
+                "status_code": 200,
+                "body": {
+                    "choices": [{"message": {"content": '{"folder": "Bank", "confidence": 80}'}}],
+                    "usage": {"total_tokens": 42},
+                },
+            },
+            "error": None,
+        }
+        failed = {
+            "custom_id": "b",
+            "response": {"status_code": 400, "body": {"error": {"message": "zu lang"}}},
+            "error": None,
+        }
+        return SimpleNamespace(text=json.dumps(ok) + "\n" + json.dumps(failed) + "\n")
+
+
+def test_batch_job_submits_polls_and_maps_results() -> None:
+    provider = OpenAIProvider(LLMConfig(api_key="test", model="gpt-4o-mini"))
+    provider._client = FakeBatchClient(["validating", "in_progress", "completed"])
+    sleeps: list[float] = []
+    job = OpenAIBatchJob(provider, poll_interval=1.0, max_poll_interval=1.5, sleep=sleeps.append)
+
+    results = job.run(
+        {"a": {"text": "Kontoauszug"}, "b": {"text": "Stromrechnung"}, "c": {"text": "Brief"}},
+        ["Bank", "Strom"],
+    )
+
+    uploaded = provider._client.uploaded
+    assert [line["custom_id"] for line in uploaded] == ["a", "b", "c"]
+    schema = uploaded[0]["body"]["response_format"]["json_schema"]["schema"]
+    assert schema["properties"]["folder"]["enum"] == ["Bank", "Strom"]
+    assert sleeps == [1.0, 1.5]
+    assert results["a"].folder_suggestion == "Bank"
+    assert results["a"].tokens_used == 42
+    assert results["b"].error_message == "OpenAI-Batch Fehler: zu lang"
+    assert not results["c"].success
+
+
+def test_batch_job_cancels_batch_after_timeout() -> None:
+    provider = OpenAIProvider(LLMConfig(api_key="test", model="gpt-4o-mini"))
+    provider._client = FakeBatchClient(["in_progress"])
+    job = OpenAIBatchJob(provider, poll_interval=10.0, sleep=lambda _: None)
+
+    results = job.run({"a": {"text": "Kontoauszug"}}, ["Bank"], timeout=1.0)
+
+    assert provider._client.cancelled == ["batch-1"]
+    assert not results["a"].success
+    assert "in_progress" in results["a"].error_message
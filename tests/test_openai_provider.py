@@ -0,0 +1,113 @@
+import asyncio
+import sys
+import weakref
+from types import SimpleNamespace
+
+import src.ml.openai_clients as openai_clients
+from src.ml.llm_provider import LLMConfig
+from src.ml.openai_provider import OpenAIProvider
+
+
+def test_classify_batch_uses_async_client(monkeypatch) -> None:
+    class FakeCompletions:
+        async def create(self, messages, **kwargs):
+            folder = "Bank" if "Kontoauszug" in messages[1]["content"] else "Strom"
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=f'{{"folder": "{folder}"}}'))],
+                usage=SimpleNamespace(total_tokens=7),
+            )
+
+    created = []
+
+    def fake_async_openai(**kwargs):
+        created.append(kwargs)
+        return SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+
+    fake_httpx = SimpleNamespace(AsyncClient=lambda **kwargs: object(), Limits=lambda **kwargs: None)
+    monkeypatch.setattr(openai_clients, "load_openai", lambda: SimpleNamespace(AsyncOpenAI=fake_async_openai))
+    monkeypatch.setitem(sys.modules, "httpx", fake_httpx)
+    monkeypatch.setattr(openai_clients, "_async_clients", weakref.WeakKeyDictionary())
+
+    providers = [OpenAIProvider(LLMConfig(api_key="test", model="gpt-4o-mini")) for _ in range(2)]
+    for provider in providers:
+        provider._client = object()
+    assert created == []
+    folders = ["Bank", "Strom"]
+
+    async def classify_with_both():
+        return [
+            response
+            for provider in providers
+            for response in await provider.classify_batch([
+                {"text": "Kontoauszug", "available_folders": folders},
+                {"text": "Stromrechnung", "available_folders": folders},
+            ])
+        ]
+
+    responses = asyncio.run(classify_with_both())
+
+    assert [r.folder_suggestion for r in responses] == ["Bank", "Strom"] * 2
+    assert [r.tokens_used for r in responses] == [7] * 4
+    assert len(created) == 1
+
+
+def test_providers_share_one_client_per_endpoint_and_key(monkeypatch) -> None:
+    created = []
+
+    class FakeOpenAI:
+        def __init__(self, **kwargs):
+            created.append(kwargs)
+
+    fake_httpx = SimpleNamespace(Client=lambda **kwargs: object(), Limits=lambda **kwargs: None)
+    monkeypatch.setattr(openai_clients, "load_openai", lambda: SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setitem(sys.modules, "httpx", fake_httpx)
+    monkeypatch.setattr(openai_clients, "_clients", {})
+
+    first = openai_clients.get_openai_client("key")
+    assert openai_clients.get_openai_client("key") is first
+    assert openai_clients.get_openai_client("key", "https://api.poe.com/v1") is not first
+    assert openai_clients.get_openai_client("other") is not first
+    assert openai_clients.get_openai_client("key", max_retries=5) is not first
+    assert [kwargs["max_retries"] for kwargs in created] == [2, 2, 2, 5]
+
+
+def test_classify_document_streams_until_answer_is_complete() -> None:
+    pieces = ['{"folder": "Ba', 'nk", "confidence": 90}', " Erklärung", " die niemand braucht"]
+    consumed = []
+
+    class FakeStream:
+        def __iter__(self):
+            for piece in pieces:
+                consumed.append(piece)
+                yield SimpleNamespace(
+                    choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None
+                )
+
+        def close(self):
+            consumed.append("closed")
+
+    provider = OpenAIProvider(LLMConfig(api_key="test", model="gpt-4o-mini", stream=True))
+    provider._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda stream, **kwargs: FakeStream()
+    )))
+
+    response = provider.classify_document("Kontoauszug", ["Bank", "Strom"])
+
+    assert response.folder_suggestion == "Bank"
+    assert response.tokens_used > 0
+    assert consumed == pieces[:2] + ["closed"]
+
+
+def test_classification_request_uses_structured_outputs_where_supported() -> None:
+    folders = ["Bank", "Strom"]
+    provider = OpenAIProvider(LLMConfig(api_key="test", model="gpt-4o-mini"))
+    schema = provider._classification_request("p", folders)["response_format"]["json_schema"]
+    assert schema["strict"] is True
+    assert schema["schema"]["properties"]["folder"]["enum"] == folders
+
+    many = [f"Ordner {i}" for i in range(600)]
+    schema = provider._classification_request("p", many)["response_format"]["json_schema"]
+    assert "enum" not in schema["schema"]["properties"]["folder"]
+
+    legacy = OpenAIProvider(LLMConfig(api_key="test", model="gpt-3.5-turbo"))
+    assert legacy._classification_request("p", folders)["response_format"] == {"type": "json_object"}
@@ -0,0 +1,75 @@
+import json
+
+import scipy.sparse as sp
+
+from src.ml.llm_provider import LLMResponse
+from src.ml.semantic_cache import SemanticCache
+
+INVOICE_MARCH = (
+    "Stadtwerke Musterstadt Stromrechnung Kundennummer 4711 Abrechnungszeitraum "
+    "März 2026 Verbrauch Arbeitspreis Grundpreis Abschlag Zahlung Lastschrift"
+)
+INVOICE_APRIL = (
+    "Stadtwerke Musterstadt Stromrechnung Kundennummer 4711 Abrechnungszeitraum "
+    "April 2026 Verbrauch Arbeitspreis Grundpreis Abschlag Zahlung Lastschrift"
+)
+FOLDERS = ["Strom", "Bank"]
+
+
+def _response() -> LLMResponse:
+    return LLMResponse(success=True, folder_suggestion="Strom", confidence=0.9, tokens_used=120)
+
+
+def test_near_duplicate_is_served_without_tokens(tmp_path) -> None:
+    cache = SemanticCache(tmp_path / "semcache", threshold=0.8)
+    cache.set(INVOICE_MARCH, FOLDERS, _response())
+
+    hit = cache.get(INVOICE_APRIL, FOLDERS)
+
+    assert hit.folder_suggestion == "Strom"
+    assert hit.tokens_used == 0
+    assert cache.get("Kontoauszug Sparkasse Girokonto Umsätze", FOLDERS) is None
+    # Geänderte Ordnerliste: kein Treffer
+    assert cache.get(INVOICE_APRIL, FOLDERS + ["Versicherung"]) is None
+
+
+def test_entries_are_persisted_and_bounded(tmp_path) -> None:
+    cache = SemanticCache(tmp_path / "semcache", threshold=0.8, max_entries=1)
+    cache.set("Kontoauszug Sparkasse Girokonto Umsätze", FOLDERS, _response())
+    cache.set(INVOICE_MARCH, FOLDERS, _response())
+    cache.set(INVOICE_MARCH, FOLDERS, LLMResponse(success=False, error_message="x"))
+
+    reloaded = SemanticCache(tmp_path / "semcache", threshold=0.8)
+
+    assert len(reloaded._entries) == 1
+    assert reloaded.get(INVOICE_APRIL, FOLDERS).folder_suggestion == "Strom"
+
+
+def test_set_many_appends_and_saves_once(tmp_path, monkeypatch) -> None:
+    cache = SemanticCache(tmp_path / "semcache", threshold=0.8)
+    saves = []
+    save = cache._save
+    monkeypatch.setattr(cache, "_save", lambda: saves.append(True) or save())
+
+    cache.set_many(
+        [(INVOICE_MARCH, _response()), ("Kontoauszug Sparkasse Girokonto Umsätze", _response()),
+         ("Brief", LLMResponse(success=False, error_message="x"))],
+        FOLDERS,
+    )
+
+    assert saves == [True]
+    assert not (tmp_path / "semcache.npz.tmp").exists()
+    reloaded = SemanticCache(tmp_path / "semcache", threshold=0.8)
+    assert len(reloaded._entries) == 2
+    assert reloaded.get(INVOICE_APRIL, FOLDERS).folder_suggestion == "Strom"
+
+
+def test_cache_in_two_file_format_is_still_loaded(tmp_path) -> None:
+    cache = SemanticCache(tmp_path / "semcache", threshold=0.8)
+    cache.set(INVOICE_MARCH, FOLDERS, _response())
+    sp.save_npz(tmp_path / "semcache.npz", cache._matrix)
+    (tmp_path / "semcache.json").write_text(json.dumps(cache._entries), encoding="utf-8")
+
+    reloaded = SemanticCache(tmp_path / "semcache", threshold=0.8)
+
+    assert reloaded.get(INVOICE_APRIL, FOLDERS).folder_suggestion == "Strom"
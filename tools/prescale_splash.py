@@ -0,0 +1,45 @@
+"""
+Erzeugt das vorskalierte Splashbild für PDF Sortier Meister
+
+Der Qt-Fallback-Splash in src/main.py zeigt das Bild in halber Größe an.
+Damit das Herunterskalieren nicht bei jedem Start passiert, wird es hier
+einmalig (z.B. beim Packaging) erledigt und als SplashScreen3@half.png
+neben dem Original abgelegt.
+
+Ausführen mit: python tools/prescale_splash.py
+"""
+
+import sys
+from pathlib import Path
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SOURCE = ROOT_DIR / "SplashScreen3.png"
+TARGET = ROOT_DIR / "SplashScreen3@half.png"
+
+
+def main() -> int:
+    """Skaliert das Splashbild auf die halbe Größe und speichert es."""
+    image = QImage(str(SOURCE))
+    if image.isNull():
+        print(f"Splashbild nicht gefunden oder ungültig: {SOURCE}")
+        return 1
+
+    scaled = image.scaled(
+        image.width() // 2,
+        image.height() // 2,
+        Qt.AspectRatioMode.KeepAspectRatio,
+        Qt.TransformationMode.SmoothTransformation
+    )
+    if not scaled.save(str(TARGET)):
+        print(f"Konnte {TARGET} nicht schreiben")
+        return 1
+
+    print(f"{TARGET.name} erstellt ({scaled.width()}x{scaled.height()})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())